@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 from typing import TYPE_CHECKING, Any, cast
 from urllib.parse import quote
 
@@ -33,6 +34,9 @@ def _login_user(
 ) -> bool:
     social_user = _get_social_user(authenticated_user)
     is_new = authenticated_user.is_new
+    # login() may rotate the session, keep the writes made so far in the
+    # session they belong to
+    backend.strategy.flush_session_writes()
     login(backend, authenticated_user, social_user)
     backend.strategy.session_set("social_auth_last_login_backend", social_user.provider)
     return is_new
@@ -78,7 +82,18 @@ def _handle_partial(
     return False, None
 
 
+def _session_buffer(backend: BaseAuth) -> contextlib.AbstractContextManager:
+    if backend.setting("BUFFER_SESSION_WRITES", False):
+        return backend.strategy.buffered_session()
+    return contextlib.nullcontext()
+
+
 def do_auth(backend: BaseAuth, redirect_name: str = "next") -> HttpResponseProtocol:
+    with _session_buffer(backend):
+        return _do_auth(backend, redirect_name)
+
+
+def _do_auth(backend: BaseAuth, redirect_name: str) -> HttpResponseProtocol:
     # Save any defined next value into session
     data = backend.strategy.request_data(merge=False)
 
@@ -115,6 +130,18 @@ def do_complete(
     redirect_name: str = "next",
     *args,
     **kwargs,
+) -> HttpResponseProtocol:
+    with _session_buffer(backend):
+        return _do_complete(backend, login, user, redirect_name, *args, **kwargs)
+
+
+def _do_complete(
+    backend: BaseAuth,
+    login: Callable,
+    user: UserProtocol | None,
+    redirect_name: str,
+    *args,
+    **kwargs,
 ) -> HttpResponseProtocol:
     data = backend.strategy.request_data()
 
@@ -66,12 +66,21 @@ class AppleIdAuth(BaseOAuth2):
         parameter is passed.
         """
         params = super().auth_params(*args, **kwargs)
-        if self.RESPONSE_MODE:
-            params["response_mode"] = self.RESPONSE_MODE
-        elif self.get_scope():
-            params["response_mode"] = "form_post"
+        response_mode = self.response_mode()
+        if response_mode:
+            params["response_mode"] = response_mode
         return params
 
+    def response_mode(self) -> str | None:
+        if self.RESPONSE_MODE:
+            return self.RESPONSE_MODE
+        if self.get_scope():
+            return "form_post"
+        return None
+
+    def uses_form_post(self) -> bool:
+        return self.response_mode() == "form_post"
+
     def get_private_key(self) -> str:
         """
         Return contents of the private key file. Override this method to provide
@@ -97,6 +106,10 @@ class AppleIdAuth(BaseOAuth2):
 
         return jwt.encode(payload, key=private_key, algorithm="ES256", headers=headers)
 
+    def signed_state_key(self) -> str:
+        # The client secret is a JWT generated on each call
+        return cast("str", self.setting("SIGNED_STATE_KEY") or self.get_private_key())
+
     def get_key_and_secret(self):
         client_id = self.data.get("client_id", self.setting("CLIENT"))
         client_secret = self.generate_client_secret()
@@ -37,12 +37,12 @@ from typing import Any, cast
 import jwt
 
 from social_core.exceptions import AuthMissingParameter, AuthTokenError
-from social_core.utils import cache
+from social_core.utils import cache, load_jwk
 
-from .oauth import BaseOAuth2
+from .resource_server import ResourceServerMixin
 
 
-class AzureADOAuth2(BaseOAuth2):
+class AzureADOAuth2(ResourceServerMixin):
     name = "azuread-oauth2"
     SCOPE_SEPARATOR = " "
     BASE_URL = "https://{authority_host}/{tenant_id}"
@@ -97,7 +97,7 @@ class AzureADOAuth2(BaseOAuth2):
 
     @cache(ttl=86400)
     def get_openid_configuration(self, url: str) -> dict[str, Any]:
-        return self.get_json(url)
+        return self.get_revalidated_json(url)
 
     def openid_configuration(self) -> dict[str, Any]:
         configuration = self.get_openid_configuration(self.openid_configuration_url())
@@ -111,7 +111,7 @@ class AzureADOAuth2(BaseOAuth2):
 
     @cache(ttl=86400)
     def get_jwks_keys_for_uri(self, uri: str) -> list[dict[str, Any]]:
-        jwks = self.get_json(uri)
+        jwks = self.get_revalidated_json(uri)
         keys = jwks.get("keys")
         if not isinstance(keys, list):
             raise AuthMissingParameter(self, "keys")
@@ -120,6 +120,9 @@ class AzureADOAuth2(BaseOAuth2):
     def get_jwks_keys(self) -> list[dict[str, Any]]:
         return self.get_jwks_keys_for_uri(self.jwks_uri())
 
+    def warm_up(self) -> None:
+        self.get_jwks_keys()
+
     def get_user_id(self, details, response):
         """Use upn as unique id"""
         upn = response.get("upn")
@@ -227,7 +230,7 @@ class AzureADOAuth2(BaseOAuth2):
         try:
             return jwt.decode(
                 id_token,
-                key=jwt.PyJWK(key).key,
+                key=load_jwk(key).key,
                 algorithms=self.get_jwt_algorithms(),
                 audience=self.setting("KEY"),
                 issuer=self.get_id_token_issuer(unverified_claims),
@@ -236,6 +239,37 @@ class AzureADOAuth2(BaseOAuth2):
         except jwt.PyJWTError as error:
             raise AuthTokenError(self, error) from error
 
+    def access_token_key(self, token: str, claims: dict[str, Any]) -> Any:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise AuthMissingParameter(self, "kid")
+        key = self.find_access_token_jwk(
+            kid,
+            self.jwks_uri(),
+            self.get_jwks_keys,
+            cast("Any", self.get_jwks_keys_for_uri).invalidate,
+        )
+        self.validate_key_issuer(key, claims)
+        if "alg" not in key:
+            key = {**key, "alg": self.get_jwt_algorithms()[0]}
+        return load_jwk(key).key
+
+    def access_token_algorithms(self) -> list[str]:
+        return self.get_jwt_algorithms()
+
+    def access_token_audience(self) -> str | list[str] | None:
+        """Expected audience, ACCESS_TOKEN_AUDIENCE, RESOURCE or the client
+        ID"""
+        return cast(
+            "str | list[str] | None",
+            self.setting("ACCESS_TOKEN_AUDIENCE")
+            or self.setting("RESOURCE")
+            or self.setting("KEY"),
+        )
+
+    def access_token_issuer(self, claims: dict[str, Any]) -> str | None:
+        return super().access_token_issuer(claims) or self.get_id_token_issuer(claims)
+
     def auth_extra_arguments(self):
         """Return extra arguments needed on auth process."""
         extra_arguments = super().auth_extra_arguments()
@@ -1,23 +1,79 @@
 from __future__ import annotations
 
 import base64
+import contextlib
+import functools
+import random
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import TYPE_CHECKING, Any, Literal, cast
+from urllib.parse import urlparse
 
 import requests
 
-from social_core.exceptions import AuthConnectionError, AuthUnknownError
+from social_core.exceptions import (
+    AuthConnectionError,
+    AuthFlowDeadlineExceeded,
+    AuthResponseTooLarge,
+    AuthUnknownError,
+    AuthUnreachableProvider,
+)
 from social_core.registry import REGISTRY
-from social_core.utils import module_member, parse_qs, social_logger, user_agent
+from social_core.utils import (
+    COMPILED_SETTINGS,
+    REQUEST_LATENCIES,
+    EmailAllowlist,
+    TTLCache,
+    get_circuit_breaker,
+    module_member,
+    parse_qs,
+    social_logger,
+    user_agent,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 
     from requests import Response
     from requests.auth import AuthBase
 
     from social_core.storage import PartialMixin, PipelineUserProtocol, UserProtocol
     from social_core.strategy import BaseStrategy, HttpResponseProtocol
+    from social_core.utils import CircuitBreaker
+
+# Responses worth retrying for idempotent requests
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+RESPONSE_CHUNK_SIZE = 16384
+# Validators and parsed bodies of documents fetched by get_revalidated_json
+REVALIDATION_CACHE = TTLCache(maxsize=256)
+REVALIDATION_CACHE_TTL = 7 * 86400
+
+
+@functools.lru_cache(maxsize=16)
+def load_json_loads(path: str) -> Callable[[str | bytes], Any]:
+    """Import the JSON_LOADS callable"""
+    return module_member(path)
+
+
+def compile_extra_data(
+    entries: Iterable[str | Sequence[Any]],
+) -> tuple[tuple[str, str, bool], ...]:
+    """Normalize EXTRA_DATA entries into (name, alias, discard) tuples"""
+    plan = []
+    for entry in entries:
+        discard = False
+        if isinstance(entry, str):
+            name = alias = entry
+        elif len(entry) == 3:
+            name, alias, discard = entry[0], entry[1], bool(entry[2])
+        elif len(entry) == 2:
+            name, alias = entry[0], entry[1]
+        elif len(entry) == 1:
+            name = alias = entry[0]
+        else:
+            raise ValueError(f"Invalid EXTRA_DATA item: {entry!r}")
+        plan.append((name, alias, discard))
+    return tuple(plan)
 
 
 class BaseAuth:
@@ -31,6 +87,16 @@ class BaseAuth:
     GET_ALL_EXTRA_DATA = False
     REQUIRES_EMAIL_VALIDATION = False
     SEND_USER_AGENT = True
+    # Retry policy for idempotent requests, overridable per backend through
+    # the settings of the same name
+    REQUEST_RETRIES = 0
+    REQUEST_RETRY_BACKOFF = 0.1
+    REQUEST_RETRY_BACKOFF_MAX = 2.0
+    REQUEST_HEDGE_PERCENTILE: float | None = None
+    # Largest response body read from the provider, in bytes
+    REQUESTS_MAX_RESPONSE_SIZE = 2 * 1024 * 1024
+    # time.monotonic() value at which the FLOW_DEADLINE budget is spent
+    flow_deadline: float | None = None
 
     def __init__(
         self, strategy: BaseStrategy | None = None, redirect_uri: str | None = None
@@ -53,12 +119,40 @@ class BaseAuth:
         return self.strategy.setting(name, default=default, backend=self)
 
     def start(self) -> HttpResponseProtocol:
-        if self.uses_redirect():
-            return self.strategy.redirect(self.auth_url())
-        return self.strategy.html(self.auth_html())
+        with self.flow_deadline_scope():
+            if self.uses_redirect():
+                return self.strategy.redirect(self.auth_url())
+            return self.strategy.html(self.auth_html())
 
     def complete(self, *args, **kwargs) -> HttpResponseProtocol | UserProtocol | None:
-        return self.auth_complete(*args, **kwargs)
+        with self.flow_deadline_scope():
+            return self.auth_complete(*args, **kwargs)
+
+    def warm_up(self) -> None:
+        """Prefetch provider metadata (discovery documents, signing keys) so
+        the first logins don't pay for it, see social_core.metadata"""
+
+    @contextlib.contextmanager
+    def flow_deadline_scope(self) -> Iterator[None]:
+        """Bound the requests made within the block by the FLOW_DEADLINE
+        budget, the budget ends with the block. Nested scopes share the
+        outer budget."""
+        if self.flow_deadline is not None:
+            yield
+            return
+        budget = self.setting("FLOW_DEADLINE")
+        self.flow_deadline = time.monotonic() + budget if budget else None
+        try:
+            yield
+        finally:
+            self.flow_deadline = None
+
+    def remaining_flow_time(self) -> float | None:
+        """Return the seconds left of the flow budget, None if unlimited or
+        outside of start() and complete()"""
+        if self.flow_deadline is None:
+            return None
+        return self.flow_deadline - time.monotonic()
 
     def auth_url(self) -> str:
         """Must return redirect URL to auth provider"""
@@ -168,58 +262,62 @@ class BaseAuth:
             # store the last time authentication took place
             "auth_time": int(time.time())
         }
-        extra_data_entries: (
-            list[str] | list[str | tuple[str, str] | tuple[str, str, bool]]
-        ) = []
         if self.GET_ALL_EXTRA_DATA or self.setting("GET_ALL_EXTRA_DATA", False):
-            extra_data_entries = list(response.keys())
+            plan = tuple((name, name, False) for name in response)
         else:
-            extra_data_entries = (self.EXTRA_DATA or []) + cast(
-                "list[str | tuple[str, str] | tuple[str, str, bool]]",
-                self.setting("EXTRA_DATA", []),
-            )
-        for entry in extra_data_entries:
-            if isinstance(entry, list):
-                entry = tuple(cast("list[str]", entry))
-            discard = False
-            if isinstance(entry, str):
-                name = alias = entry
-            elif len(entry) == 3:
-                name, alias, discard = entry
-            elif len(entry) == 2:
-                name, alias = entry
-            elif len(entry) == 1:
-                name = alias = entry[0]
-            else:
-                raise AuthUnknownError(self, f"Invalid EXTRA_DATA item: {entry!r}")
+            plan = self.extra_data_plan()
+        for name, alias, discard in plan:
             value = response.get(name, details.get(name, details.get(alias)))
             if discard and not value:
                 continue
             data[alias] = value
         return data
 
+    def extra_data_plan(self) -> tuple[tuple[str, str, bool], ...]:
+        """Return the (name, alias, discard) entries to store in extra_data.
+
+        The plan combines EXTRA_DATA and the EXTRA_DATA setting, it is compiled
+        once per backend class and recompiled when either value is replaced.
+        Invalid entries raise AuthUnknownError, call it on startup to validate
+        the configuration.
+        """
+        setting = self.setting("EXTRA_DATA")
+
+        def compile_plan() -> tuple[tuple[str, str, bool], ...]:
+            try:
+                return compile_extra_data([*(self.EXTRA_DATA or ()), *(setting or ())])
+            except ValueError as error:
+                raise AuthUnknownError(self, str(error)) from error
+
+        return cast(
+            "tuple[tuple[str, str, bool], ...]",
+            COMPILED_SETTINGS.get(
+                (type(self), "EXTRA_DATA"), (self.EXTRA_DATA, setting), compile_plan
+            ),
+        )
+
     def auth_allowed(self, response, details):
         """Return True if the user should be allowed to authenticate, by
         default check if email is whitelisted (if there's a whitelist)"""
-        emails = [
-            email.lower()
-            for email in cast("list[str]", self.setting("WHITELISTED_EMAILS", []))
-        ]
-        domains = [
-            domain.lower()
-            for domain in cast("list[str]", self.setting("WHITELISTED_DOMAINS", []))
-        ]
+        allowlist = self.email_allowlist()
         email = details.get("email")
-        allowed = True
-        if email and (emails or domains):
-            email = email.lower()
-            parts = email.split("@", 1)
-            if len(parts) != 2:
-                allowed = False
-            else:
-                domain = parts[1]
-                allowed = email in emails or domain in domains
-        return allowed
+        if email and allowlist:
+            return allowlist.email_allowed(email)
+        return True
+
+    def email_allowlist(self) -> EmailAllowlist:
+        """Return the compiled WHITELISTED_EMAILS and WHITELISTED_DOMAINS
+        matcher, it's reused until either setting is replaced"""
+        emails = cast("list[str] | None", self.setting("WHITELISTED_EMAILS"))
+        domains = cast("list[str] | None", self.setting("WHITELISTED_DOMAINS"))
+        return cast(
+            "EmailAllowlist",
+            COMPILED_SETTINGS.get(
+                (type(self), "WHITELISTED_EMAILS"),
+                (emails, domains),
+                lambda: EmailAllowlist(emails or (), domains or ()),
+            ),
+        )
 
     def id_key(self) -> str:
         """Return the ID_KEY to use for this backend, checking settings first."""
@@ -320,7 +418,10 @@ class BaseAuth:
         auth: tuple[str, str] | AuthBase | None = None,
         params: dict | None = None,
         timeout: float | None = None,
+        idempotent: bool | None = None,
     ) -> Response:
+        """Send a request to the provider. Idempotent requests may be retried
+        and hedged, idempotent_request() decides when it's not given"""
         headers = {} if headers is None else dict(headers)
         proxies = self.setting("PROXIES")
         verify = self.setting("VERIFY_SSL", True)
@@ -335,24 +436,210 @@ class BaseAuth:
         if self.SEND_USER_AGENT and "User-Agent" not in headers:
             headers["User-Agent"] = self.setting("USER_AGENT") or user_agent()
 
+        kwargs = {
+            "headers": headers,
+            "data": data,
+            "json": json,
+            "auth": auth,
+            "params": params,
+            "proxies": proxies,
+            "verify": verify,
+        }
+        retries = cast("int", self.setting("REQUEST_RETRIES", self.REQUEST_RETRIES))
+        hedge_percentile = self.setting(
+            "REQUEST_HEDGE_PERCENTILE", self.REQUEST_HEDGE_PERCENTILE
+        )
+        if idempotent is None:
+            idempotent = self.idempotent_request(method, url)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send_request(
+                    method, url, timeout, hedge_percentile, idempotent, kwargs
+                )
+            except (AuthConnectionError, requests.Timeout):
+                delay = self._retry_delay(idempotent, attempt, retries)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if response.status_code in RETRY_STATUS_CODES:
+                    delay = self._retry_delay(idempotent, attempt, retries)
+                if delay is None:
+                    break
+            self.log_debug("retrying %s %s in %.2f seconds", method, url, delay)
+            time.sleep(delay)
+            attempt += 1
+        response.raise_for_status()
+        return response
+
+    def idempotent_request(self, method: str, url: str) -> bool:
+        """Return True if the request can be safely retried or hedged, it
+        must be decided without making requests"""
+        return method == "GET"
+
+    def _retry_delay(
+        self, idempotent: bool, attempt: int, retries: int
+    ) -> float | None:
+        """Return the jittered exponential backoff before the next attempt,
+        None when the request can't be retried, no attempt is left or the
+        flow deadline would be exceeded"""
+        if attempt >= retries or not idempotent:
+            return None
+        backoff = cast(
+            "float", self.setting("REQUEST_RETRY_BACKOFF", self.REQUEST_RETRY_BACKOFF)
+        )
+        backoff_max = cast(
+            "float",
+            self.setting("REQUEST_RETRY_BACKOFF_MAX", self.REQUEST_RETRY_BACKOFF_MAX),
+        )
+        delay = random.uniform(0, min(backoff_max, backoff * 2**attempt))  # noqa: S311
+        remaining = self.remaining_flow_time()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def _send_request(
+        self,
+        method: str,
+        url: str,
+        timeout: float,
+        hedge_percentile: float | None,
+        idempotent: bool,
+        kwargs: dict[str, Any],
+    ) -> Response:
+        """Send the request once, or twice when hedging is enabled, the
+        request is idempotent and the first attempt is slower than the given
+        latency percentile"""
+        if hedge_percentile is None:
+            return self._request_once(method, url, timeout, kwargs)
+
+        key = f"{self.name}:{urlparse(url).netloc}"
+        hedge_after = REQUEST_LATENCIES.percentile(key, hedge_percentile)
+        start = time.monotonic()
+        if hedge_after is None or not idempotent:
+            response = self._request_once(method, url, timeout, kwargs)
+        else:
+            response = self._hedged_request(method, url, timeout, kwargs, hedge_after)
+        REQUEST_LATENCIES.record(key, time.monotonic() - start)
+        return response
+
+    def _hedged_request(
+        self,
+        method: str,
+        url: str,
+        timeout: float,
+        kwargs: dict[str, Any],
+        hedge_after: float,
+    ) -> Response:
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {
+                executor.submit(self._request_once, method, url, timeout, kwargs)
+            }
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                self.log_debug("hedging %s %s", method, url)
+                futures.add(
+                    executor.submit(self._request_once, method, url, timeout, kwargs)
+                )
+            while True:
+                done, pending = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                if not pending:
+                    # Every attempt failed
+                    return next(iter(done)).result()
+                futures = pending
+        finally:
+            # The slower request is left to finish on its own
+            executor.shutdown(wait=False)
+
+    def _request_once(
+        self, method: str, url: str, timeout: float, kwargs: dict[str, Any]
+    ) -> Response:
+        remaining = self.remaining_flow_time()
+        deadline_bound = remaining is not None and remaining < timeout
+        if remaining is not None:
+            if remaining <= 0:
+                raise AuthFlowDeadlineExceeded(self)
+            timeout = min(timeout, remaining)
+
+        breaker = self.circuit_breaker(url)
+        if breaker is not None and not breaker.allow():
+            raise AuthUnreachableProvider(self)
+
+        failed = True
         try:
             response = requests.request(
-                method,
-                url,
-                headers=headers,
-                data=data,
-                json=json,
-                auth=auth,
-                params=params,
-                timeout=timeout,
-                proxies=proxies,
-                verify=verify,
+                method, url, timeout=timeout, stream=True, **kwargs
             )
-        except requests.ConnectionError as err:
-            raise AuthConnectionError(self, str(err)) from err
-        response.raise_for_status()
+            self._read_response(response)
+            failed = response.status_code >= 500
+        except (requests.ConnectionError, requests.Timeout) as err:
+            if deadline_bound and isinstance(err, requests.Timeout):
+                raise AuthFlowDeadlineExceeded(self, str(err)) from err
+            if isinstance(err, requests.ConnectionError):
+                raise AuthConnectionError(self, str(err)) from err
+            raise
+        finally:
+            if breaker is not None:
+                breaker.record(success=not failed)
         return response
 
+    def _read_response(self, response: Response) -> None:
+        """Load the streamed response body, failing as soon as it exceeds
+        REQUESTS_MAX_RESPONSE_SIZE (after content decoding)"""
+        max_size = self.setting(
+            "REQUESTS_MAX_RESPONSE_SIZE", self.REQUESTS_MAX_RESPONSE_SIZE
+        )
+        if not max_size:
+            response.content  # noqa: B018
+            return
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > max_size:
+            response.close()
+            raise AuthResponseTooLarge(self)
+        body = bytearray()
+        for chunk in response.iter_content(RESPONSE_CHUNK_SIZE):
+            body += chunk
+            if len(body) > max_size:
+                response.close()
+                raise AuthResponseTooLarge(self)
+        response._content = bytes(body)  # noqa: SLF001
+
+    def json_loads(self, response: Response) -> Any:
+        """Decode a JSON response with the JSON_LOADS callable (an import
+        path), or with requests when it's not set. UTF-8 bodies are passed
+        as bytes to skip decoding them to text first."""
+        loads = self.setting("JSON_LOADS")
+        if not loads:
+            return response.json()
+        if isinstance(loads, str):
+            loads = load_json_loads(loads)
+        encoding = (response.encoding or "utf-8").lower()
+        if encoding in {"utf-8", "utf8"}:
+            return loads(response.content)
+        return loads(response.text)
+
+    def circuit_breaker(self, url: str) -> CircuitBreaker | None:
+        """Return the circuit breaker guarding requests to the url host.
+
+        Breakers are enabled with the CIRCUIT_BREAKER setting and shared
+        per backend and host across the process; connection errors,
+        timeouts and 5xx responses count as failures."""
+        if not self.setting("CIRCUIT_BREAKER", False):
+            return None
+        return get_circuit_breaker(
+            f"{self.name}:{urlparse(url).netloc}",
+            failure_rate=self.setting("CIRCUIT_BREAKER_FAILURE_RATE", 0.5),
+            min_requests=self.setting("CIRCUIT_BREAKER_MIN_REQUESTS", 10),
+            window=self.setting("CIRCUIT_BREAKER_WINDOW", 60),
+            reset_timeout=self.setting("CIRCUIT_BREAKER_RESET_TIMEOUT", 30),
+        )
+
     def get_json(  # noqa: PLR0913, PLR0917
         self,
         url: str,
@@ -364,7 +651,7 @@ class BaseAuth:
         params: dict | None = None,
         timeout: float | None = None,
     ) -> dict[Any, Any]:
-        return self.request(
+        response = self.request(
             url,
             method=method,
             headers=headers,
@@ -373,11 +660,41 @@ class BaseAuth:
             auth=auth,
             params=params,
             timeout=timeout,
-        ).json()
+        )
+        return self.json_loads(response)
 
     def get_querystring(self, url, *args, **kwargs) -> dict[str, str]:
         return parse_qs(self.request(url, *args, **kwargs).text)
 
+    def get_revalidated_json(self, url: str) -> Any:
+        """GET a JSON document, revalidating the copy fetched previously.
+
+        The ETag and Last-Modified validators are kept with the parsed
+        document, when the provider answers 304 Not Modified the previously
+        parsed object is returned as is."""
+        cached = REVALIDATION_CACHE.get(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = self.request(url, headers=headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if cached is not None and response.status_code == 304:
+            etag = etag or cached[0]
+            last_modified = last_modified or cached[1]
+            value = cached[2]
+        else:
+            value = self.json_loads(response)
+        if etag or last_modified:
+            REVALIDATION_CACHE.set(
+                url, (etag, last_modified, value), REVALIDATION_CACHE_TTL
+            )
+        return value
+
     def get_key_and_secret(self) -> tuple[str, str]:
         """Return tuple with Consumer Key and Consumer Secret for current
         service provider. Must return (key, secret), order *must* be respected.
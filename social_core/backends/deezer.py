@@ -56,6 +56,7 @@ class DeezerOAuth2(BaseOAuth2):
                 json=json,
                 auth=auth,
                 params=params,
+                idempotent=False,
             )
         return dict(parse_qsl(response.text))
 
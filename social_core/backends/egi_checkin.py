@@ -7,6 +7,7 @@ from __future__ import annotations
 
 from typing import Literal, cast
 
+from social_core.backends.entitlements import EntitlementsMixin
 from social_core.backends.open_id_connect import OpenIdConnectAuth
 
 CHECKIN_ENV_ENDPOINTS: dict[str, str] = {
@@ -16,7 +17,7 @@ CHECKIN_ENV_ENDPOINTS: dict[str, str] = {
 }
 
 
-class EGICheckinOpenIdConnect(OpenIdConnectAuth):
+class EGICheckinOpenIdConnect(EntitlementsMixin, OpenIdConnectAuth):
     name = "egi-checkin"
     # Check-in provides 3 environments: production, demo and development
     # Set the one to use as "prod", "demo" or "dev"
@@ -39,10 +40,6 @@ class EGICheckinOpenIdConnect(OpenIdConnectAuth):
         "eduperson_entitlement",
         "offline_access",
     ]
-    # This is the list of entitlements that are allowed to login into the
-    # service. A user with any of these will be allowed. If empty, all
-    # users will be allowed
-    ALLOWED_ENTITLEMENTS: list[str] = []
 
     def oidc_endpoint(self):
         endpoint = self.setting("OIDC_ENDPOINT", self.OIDC_ENDPOINT)
@@ -66,13 +63,6 @@ class EGICheckinOpenIdConnect(OpenIdConnectAuth):
             "last_name": last_name,
         }
 
-    def entitlement_allowed(self, user_entitlements):
-        allowed = True
-        allowed_ent = self.setting("ALLOWED_ENTITLEMENTS", self.ALLOWED_ENTITLEMENTS)
-        if allowed_ent:
-            allowed = any(e in user_entitlements for e in allowed_ent)
-        return allowed
-
     def auth_allowed(self, response, details):
         """Check-in promotes the use of eduperson_entitlements for AuthZ, if
         ALLOWED_ENTITLEMENTS is defined then use them to allow or not users"""
@@ -0,0 +1,37 @@
+"""
+eduPersonEntitlement based authorization shared by the research and education
+OpenID Connect backends
+"""
+
+from __future__ import annotations
+
+from typing import cast
+
+from social_core.utils import COMPILED_SETTINGS, EntitlementMatcher
+
+from .base import BaseAuth
+
+
+class EntitlementsMixin(BaseAuth):
+    # This is the list of entitlements that are allowed to login into the
+    # service. A user with any of these will be allowed. If empty, all
+    # users will be allowed
+    ALLOWED_ENTITLEMENTS: list[str] = []
+
+    def entitlement_matcher(self) -> EntitlementMatcher:
+        """Return the compiled ALLOWED_ENTITLEMENTS matcher, rebuilt only
+        when the setting values are replaced"""
+        allowed = self.setting("ALLOWED_ENTITLEMENTS", self.ALLOWED_ENTITLEMENTS)
+        ignore_authority = self.setting("ENTITLEMENT_IGNORE_AUTHORITY", False)
+        return cast(
+            "EntitlementMatcher",
+            COMPILED_SETTINGS.get(
+                (type(self), "ALLOWED_ENTITLEMENTS"),
+                (allowed, ignore_authority),
+                lambda: EntitlementMatcher(allowed or (), bool(ignore_authority)),
+            ),
+        )
+
+    def entitlement_allowed(self, user_entitlements) -> bool:
+        matcher = self.entitlement_matcher()
+        return not matcher or matcher.allowed(user_entitlements)
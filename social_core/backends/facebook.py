@@ -114,7 +114,7 @@ class FacebookOAuth2(BaseOAuth2):
         # #592, but it seems that this needs to be enabled(?), otherwise the
         # usual querystring type response is returned.
         try:
-            response = response.json()
+            response = self.json_loads(response)
         except ValueError:
             response = parse_qs(response.text)
         access_token = response["access_token"]
@@ -122,7 +122,7 @@ class FacebookOAuth2(BaseOAuth2):
 
     def process_refresh_token_response(self, response, *args, **kwargs):
         try:
-            return response.json()
+            return self.json_loads(response)
         except ValueError:
             return parse_qs(response.content)
 
@@ -27,7 +27,7 @@ class Fence(OpenIdConnectAuth):
 
     @cache(ttl=86400)
     def oidc_config(self):
-        return self.get_json(self._url(".well-known/openid-configuration"))
+        return self.get_revalidated_json(self._url(".well-known/openid-configuration"))
 
     def get_user_details(self, response):
         return {
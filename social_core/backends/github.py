@@ -3,15 +3,26 @@ Github OAuth2 backend, docs at:
     https://python-social-auth.readthedocs.io/en/latest/backends/github.html
 """
 
-from typing import Any
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING, Any, cast
 from urllib.parse import urljoin
 
 from requests import HTTPError
 
 from social_core.exceptions import AuthFailed
+from social_core.utils import TTLCache
 
 from .oauth import BaseOAuth2
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Organization and team membership checks, keyed by backend and membership URL
+MEMBERSHIP_CACHE = TTLCache()
+MEMBERSHIP_NEGATIVE_CACHE_TTL = 60
+
 
 class GithubOAuth2(BaseOAuth2):
     """Github OAuth authentication backend"""
@@ -31,7 +42,7 @@ class GithubOAuth2(BaseOAuth2):
     ]
 
     def api_url(self) -> str:
-        return self.API_URL
+        return cast("str", self.setting("API_URL") or self.API_URL)
 
     def get_user_details(self, response):
         """Return user details from Github account"""
@@ -44,16 +55,28 @@ class GithubOAuth2(BaseOAuth2):
             "last_name": last_name,
         }
 
+    def user_data_endpoints(
+        self, access_token: str, *args, **kwargs
+    ) -> dict[str, Callable[[], Any]]:
+        endpoints: dict[str, Callable[[], Any]] = {
+            "user": partial(self._user_data, access_token)
+        }
+        # The emails are needed anyway when the scope grants them
+        if "user:email" in self.get_scope():
+            endpoints["emails"] = partial(self._user_emails, access_token)
+        return endpoints
+
     def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
         """Loads user data from service"""
-        data = self._user_data(access_token)
-        if not data.get("email") or "user:email" in self.get_scope():
-            try:
-                emails = self._user_data(access_token, "/emails")
-            except (HTTPError, ValueError, TypeError):
-                emails = []
-            else:
-                data["emails"] = emails
+        results = self.fetch_user_data_endpoints(
+            self.user_data_endpoints(access_token, *args, **kwargs)
+        )
+        data = results["user"]
+        if "emails" not in results and not data.get("email"):
+            results["emails"] = self._user_emails(access_token)
+        emails = results.get("emails")
+        if emails is not None:
+            data["emails"] = emails
 
             if emails:
                 email = emails[0]
@@ -65,6 +88,13 @@ class GithubOAuth2(BaseOAuth2):
                 data["email"] = email["email"]
         return data
 
+    def _user_emails(self, access_token):
+        """Return the user emails, None when they can't be fetched"""
+        try:
+            return self._user_data(access_token, "/emails")
+        except (HTTPError, ValueError, TypeError):
+            return None
+
     def _user_data(self, access_token, path=None):
         url = urljoin(self.api_url(), f"user{path or ''}")
         return self.get_json(url, headers={"Authorization": f"token {access_token}"})
@@ -76,16 +106,37 @@ class GithubMemberOAuth2(GithubOAuth2):
     def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
         """Loads user data from service"""
         user_data = super().user_data(access_token, *args, **kwargs)
+        url = self.member_url(user_data)
+        # Memberships are cached when MEMBERSHIP_CACHE_TTL is set, users
+        # that don't belong to the organization for a shorter time
+        ttl = cast("int", self.setting("MEMBERSHIP_CACHE_TTL", 0))
+        cache_key = (self.name, url)
+        is_member = MEMBERSHIP_CACHE.get(cache_key) if ttl else None
+        if is_member is False:
+            raise AuthFailed(self, "User doesn't belong to the organization")
+        if is_member:
+            return user_data
         headers = {"Authorization": f"token {access_token}"}
         try:
-            self.request(self.member_url(user_data), headers=headers)
+            self.request(url, headers=headers)
         except HTTPError as err:
             # if the user is a member of the organization, response code
             # will be 204, see http://bit.ly/ZS6vFl
             if err.response.status_code != 204:
+                if ttl and err.response.status_code == 404:
+                    negative_ttl = cast(
+                        "int",
+                        self.setting(
+                            "MEMBERSHIP_NEGATIVE_CACHE_TTL",
+                            MEMBERSHIP_NEGATIVE_CACHE_TTL,
+                        ),
+                    )
+                    MEMBERSHIP_CACHE.set(cache_key, False, min(ttl, negative_ttl))
                 raise AuthFailed(
                     self, "User doesn't belong to the organization"
                 ) from err
+        if ttl:
+            MEMBERSHIP_CACHE.set(cache_key, True, ttl)
         return user_data
 
     def member_url(self, user_data):
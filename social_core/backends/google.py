@@ -3,7 +3,7 @@ Google OpenId, OAuth2, and OAuth1 backends, docs at:
     https://python-social-auth.readthedocs.io/en/latest/backends/google.html
 """
 
-from typing import Any, Literal
+from typing import Any, Literal, cast
 
 from social_core.backends.base import BaseAuth
 
@@ -42,10 +42,12 @@ class BaseGoogleAuth(BaseAuth):
 
 
 class BaseGoogleOAuth2API(BaseGoogleAuth):
+    USER_DATA_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+
     def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
         """Return user data from Google API"""
         return self.get_json(
-            "https://www.googleapis.com/oauth2/v3/userinfo",
+            cast("str", self.setting("USER_DATA_URL") or self.USER_DATA_URL),
             headers={
                 "Authorization": f"Bearer {access_token}",
             },
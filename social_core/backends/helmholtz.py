@@ -3,10 +3,11 @@ Backend for HelmholtzID Connect OPs of the HIFIS project
 https://hifis.net/aai/
 """
 
+from social_core.backends.entitlements import EntitlementsMixin
 from social_core.backends.open_id_connect import OpenIdConnectAuth
 
 
-class HelmholtzOpenIdConnect(OpenIdConnectAuth):
+class HelmholtzOpenIdConnect(EntitlementsMixin, OpenIdConnectAuth):
     name = "helmholtz"
     OIDC_ENDPOINT = "https://login.helmholtz.de/oauth2"
     # In order to get any scopes, you have to register your service with
@@ -29,10 +30,6 @@ class HelmholtzOpenIdConnect(OpenIdConnectAuth):
         "eduperson_assurance",
         # "offline_access",
     ]
-    # This is the list of entitlements that are allowed to login into the
-    # service. A user with any of these will be allowed. If empty, all
-    # users will be allowed
-    ALLOWED_ENTITLEMENTS: list[str] = []
     ENTITLEMENT_KEY = "eduperson_entitlement"
 
     def get_user_details(self, response):
@@ -50,13 +47,6 @@ class HelmholtzOpenIdConnect(OpenIdConnectAuth):
             "last_name": last_name,
         }
 
-    def entitlement_allowed(self, user_entitlements):
-        allowed = True
-        allowed_ent = self.setting("ALLOWED_ENTITLEMENTS", self.ALLOWED_ENTITLEMENTS)
-        if allowed_ent:
-            allowed = any(e in user_entitlements for e in allowed_ent)
-        return allowed
-
     def auth_allowed(self, response, details):
         """Check-in promotes the use of eduperson_entitlements for AuthZ, if
         ALLOWED_ENTITLEMENTS is defined then use them to allow or not users"""
@@ -2,11 +2,11 @@ from typing import Any, cast
 
 import jwt
 
-from social_core.backends.oauth import BaseOAuth2
+from social_core.backends.resource_server import ResourceServerMixin
 from social_core.exceptions import AuthTokenError
 
 
-class KeycloakOAuth2(BaseOAuth2):  # pylint: disable=abstract-method
+class KeycloakOAuth2(ResourceServerMixin):  # pylint: disable=abstract-method
     """Keycloak OAuth2 authentication backend
 
     This backend has been tested working with a standard Keycloak installation,
@@ -130,6 +130,21 @@ class KeycloakOAuth2(BaseOAuth2):  # pylint: disable=abstract-method
         except jwt.PyJWTError as error:
             raise AuthTokenError(self, error) from error
 
+    def access_token_key(self, token: str, claims: dict[str, Any]) -> Any:
+        return self.public_key()
+
+    def access_token_algorithms(self) -> list[str]:
+        return [cast("str", self.algorithm())]
+
+    def access_token_audience(self) -> str | list[str] | None:
+        return cast(
+            "str | list[str] | None",
+            self.setting("ACCESS_TOKEN_AUDIENCE") or self.audience(),
+        )
+
+    def introspection_url(self) -> str | None:
+        return super().introspection_url() or f"{self.access_token_url()}/introspect"
+
     def get_user_details(self, response):
         """Map fields in user_data into Django User fields"""
         return {
@@ -3,7 +3,6 @@ LINE Login OAuth2 backend, docs at:
     https://developers.line.me/en/docs/line-login/
 """
 
-import json
 from typing import Any
 
 import requests
@@ -64,7 +63,7 @@ class LineOAuth2(BaseOAuth2):
                 data=self.auth_complete_params(),
             )
         except requests.HTTPError as err:
-            self.process_error(json.loads(err.response.content))
+            self.process_error(self.json_loads(err.response))
             return None
         self.process_error(response)
 
@@ -96,6 +95,6 @@ class LineOAuth2(BaseOAuth2):
             )
             self.process_error(response)
         except requests.HTTPError as err:
-            self.process_error(err.response.json())
+            self.process_error(self.json_loads(err.response))
             return None
         return response
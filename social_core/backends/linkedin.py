@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import datetime
 from calendar import timegm
+from functools import partial
 from typing import TYPE_CHECKING, Any, Literal, cast
 
 from social_core.backends.open_id_connect import OpenIdConnectAuth
@@ -15,7 +16,7 @@ from social_core.exceptions import AuthCanceled, AuthTokenError
 from .oauth import BaseOAuth2
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Callable, Mapping
 
     from requests.auth import AuthBase
 
@@ -90,18 +91,31 @@ class LinkedinOAuth2(BaseOAuth2):
     def user_emails_url(self):
         return self.USER_EMAILS_URL
 
-    def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
-        response = self.get_json(
-            self.user_details_url(), headers=self.user_data_headers(access_token)
-        )
-
+    def user_data_endpoints(
+        self, access_token: str, *args, **kwargs
+    ) -> dict[str, Callable[[], Any]]:
+        endpoints: dict[str, Callable[[], Any]] = {
+            "user": partial(
+                self.get_json,
+                self.user_details_url(),
+                headers=self.user_data_headers(access_token),
+            )
+        }
         if "emailAddress" in set(
             cast("list[str]", self.setting("FIELD_SELECTORS", []))
         ):
-            emails = self.email_data(access_token, *args, **kwargs)
-            if emails:
-                response["emailAddress"] = emails[0]
+            endpoints["emails"] = partial(
+                self.email_data, access_token, *args, **kwargs
+            )
+        return endpoints
 
+    def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
+        results = self.fetch_user_data_endpoints(
+            self.user_data_endpoints(access_token, *args, **kwargs)
+        )
+        response = results["user"]
+        if results.get("emails"):
+            response["emailAddress"] = results["emails"][0]
         return response
 
     def email_data(self, access_token, *args, **kwargs):
@@ -26,7 +26,7 @@ class NaverOAuth2(BaseOAuth2):
 
     def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
         """Loads user data from service"""
-        response = self.request(
+        data = self.get_json(
             "https://openapi.naver.com/v1/nid/me",
             headers={
                 "Authorization": f"Bearer {access_token}",
@@ -34,8 +34,6 @@ class NaverOAuth2(BaseOAuth2):
             },
         )
 
-        data = response.json()
-
         return {
             "id": self._fetch(data, "id"),
             "email": self._fetch(data, "email"),
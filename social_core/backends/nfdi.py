@@ -5,6 +5,7 @@ https://doc.nfdi-aai.de/
 This is conceptually based on the egi_checkin backend
 """
 
+from social_core.backends.entitlements import EntitlementsMixin
 from social_core.backends.open_id_connect import OpenIdConnectAuth
 
 NFDI_ENDPOINTS = {
@@ -50,7 +51,7 @@ NFDI_ENDPOINTS = {
 }
 
 
-class NFDIOpenIdConnect(OpenIdConnectAuth):
+class NFDIOpenIdConnect(EntitlementsMixin, OpenIdConnectAuth):
     name = "helmholtz"
     OIDC_ENDPOINT = "https://login.helmholtz.de/oauth2"
     # In order to get any scopes, you have to register your service with
@@ -74,10 +75,6 @@ class NFDIOpenIdConnect(OpenIdConnectAuth):
         "orcid",
         # "offline_access",
     ]
-    # This is the list of entitlements that are allowed to login into the
-    # service. A user with any of these will be allowed. If empty, all
-    # users will be allowed
-    ALLOWED_ENTITLEMENTS: list[str] = []
 
     def get_user_details(self, response):
         username_key = self.setting("USERNAME_KEY", default=self.USERNAME_KEY)
@@ -94,13 +91,6 @@ class NFDIOpenIdConnect(OpenIdConnectAuth):
             "last_name": last_name,
         }
 
-    def entitlement_allowed(self, user_entitlements):
-        allowed = True
-        allowed_ent = self.setting("ALLOWED_ENTITLEMENTS", self.ALLOWED_ENTITLEMENTS)
-        if allowed_ent:
-            allowed = any(e in user_entitlements for e in allowed_ent)
-        return allowed
-
     def auth_allowed(self, response, details):
         """Check-in promotes the use of eduperson_entitlements for AuthZ, if
         ALLOWED_ENTITLEMENTS is defined then use them to allow or not users"""
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import base64
+import contextlib
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any, Literal, cast
 
 from oauthlib.oauth1 import SIGNATURE_TYPE_AUTH_HEADER
@@ -18,9 +21,13 @@ from social_core.exceptions import (
     AuthUnknownError,
 )
 from social_core.utils import (
+    TTLCache,
     constant_time_compare,
     handle_http_errors,
+    load_shared_cache,
+    open_token,
     parse_qs,
+    seal_token,
     url_add_parameters,
     wrap_access_token_error,
 )
@@ -28,11 +35,22 @@ from social_core.utils import (
 from .base import BaseAuth
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Callable, Mapping
 
     from requests import Response
     from requests.auth import AuthBase
 
+    from social_core.storage import UserProtocol
+    from social_core.strategy import HttpResponseProtocol
+
+# States already used to complete a SIGNED_STATE flow, a cache shared across
+# processes can be configured with SIGNED_STATE_CACHE
+SIGNED_STATE_CACHE = TTLCache(maxsize=10000)
+
+# Users resolved by API-token logins, see BaseOAuth2.do_auth. A cache shared
+# across processes can be configured with TOKEN_USER_CACHE
+TOKEN_USER_CACHE = TTLCache(maxsize=10000)
+
 
 class OAuthAuth(BaseAuth):
     """OAuth authentication backend base class.
@@ -60,6 +78,9 @@ class OAuthAuth(BaseAuth):
     SCOPE_SEPARATOR = " "
     REDIRECT_STATE = False
     STATE_PARAMETER = False
+    SIGNED_STATE_MAX_AGE = 600
+    state_data: dict[str, Any] | None = None
+    validated_state: str | None = None
 
     def extra_data(
         self,
@@ -81,8 +102,96 @@ class OAuthAuth(BaseAuth):
         """Generate csrf token to include as state parameter."""
         return self.strategy.random_string(32)
 
+    def uses_signed_state(self) -> bool:
+        """Return True if the state is kept in an encrypted browser cookie
+        instead of the session (SIGNED_STATE setting), the strategy must
+        implement the cookie methods"""
+        return bool(
+            (self.STATE_PARAMETER or self.REDIRECT_STATE)
+            and self.setting("SIGNED_STATE", False)
+        )
+
+    def signed_state_key(self) -> str:
+        key = self.setting("SIGNED_STATE_KEY") or self.get_key_and_secret()[1]
+        if not key:
+            raise AuthException(self, "SIGNED_STATE requires SIGNED_STATE_KEY")
+        return cast("str", key)
+
+    def signed_state_max_age(self) -> int:
+        return cast(
+            "int", self.setting("SIGNED_STATE_MAX_AGE", self.SIGNED_STATE_MAX_AGE)
+        )
+
+    def signed_state_cookie_name(self) -> str:
+        return f"{self.name}_state"
+
+    def uses_form_post(self) -> bool:
+        """Return True if the provider posts the authorization response back
+        to the site (response_mode=form_post)"""
+        return False
+
+    def signed_state_same_site(self) -> str:
+        """SameSite attribute of the state cookie, a cross-site form_post
+        callback only carries SameSite=None cookies"""
+        return "None" if self.uses_form_post() else "Lax"
+
+    def signed_state_payload(self) -> dict[str, Any]:
+        """Values sealed in the state cookie, available as state_data once
+        the state is validated"""
+        return {"state": self.state_token()}
+
+    def signed_state_cache(self):
+        """Return the cache remembering used states, configure a shared one
+        with SIGNED_STATE_CACHE when running several processes"""
+        return load_shared_cache(
+            cast("str | None", self.setting("SIGNED_STATE_CACHE")), SIGNED_STATE_CACHE
+        )
+
+    def create_signed_state(self) -> str:
+        """Return the state parameter, sealing it with the values needed to
+        complete the flow in a cookie bound to the browser"""
+        if self.state_data is None:
+            self.state_data = self.signed_state_payload()
+            self.strategy.cookie_set(
+                self.signed_state_cookie_name(),
+                seal_token(self.signed_state_key(), self.name, self.state_data),
+                self.signed_state_max_age(),
+                self.signed_state_same_site(),
+            )
+        return self.state_data["state"]
+
+    def validate_signed_state(self, request_state: str) -> str:
+        """Check the state parameter against the state cookie, each state is
+        accepted once"""
+        if self.validated_state is not None:
+            if not constant_time_compare(request_state, self.validated_state):
+                raise AuthStateForbidden(self)
+            return request_state
+        name = self.signed_state_cookie_name()
+        cookie = self.strategy.cookie_get(name)
+        if not cookie:
+            raise AuthStateMissing(self, "state")
+        max_age = self.signed_state_max_age()
+        try:
+            state_data = open_token(self.signed_state_key(), self.name, cookie, max_age)
+        except ValueError as error:
+            raise AuthStateForbidden(self) from error
+        if not constant_time_compare(request_state, state_data.get("state", "")):
+            raise AuthStateForbidden(self)
+        cache = self.signed_state_cache()
+        key = f"signed-state:{self.name}:{hashlib.sha256(cookie.encode()).hexdigest()}"
+        if cache.get(key) is not None:
+            raise AuthStateForbidden(self)
+        cache.set(key, True, max_age)
+        self.strategy.cookie_delete(name)
+        self.state_data = state_data
+        self.validated_state = request_state
+        return request_state
+
     def get_or_create_state(self) -> str | None:
-        if self.STATE_PARAMETER or self.REDIRECT_STATE:
+        if self.uses_signed_state():
+            state = self.create_signed_state()
+        elif self.STATE_PARAMETER or self.REDIRECT_STATE:
             # Store state in session for further request validation. The state
             # value is passed as state parameter (as specified in OAuth2 spec),
             # but also added to redirect, that way we can still verify the
@@ -111,8 +220,12 @@ class OAuthAuth(BaseAuth):
         value if valid."""
         if not self.STATE_PARAMETER and not self.REDIRECT_STATE:
             return None
-        state = self.get_session_state()
         request_state = self.get_request_state()
+        if self.uses_signed_state():
+            if not request_state:
+                raise AuthMissingParameter(self, "state")
+            return self.validate_signed_state(request_state)
+        state = self.get_session_state()
         if not request_state:
             raise AuthMissingParameter(self, "state")
         if not state:
@@ -164,6 +277,19 @@ class OAuthAuth(BaseAuth):
     def get_access_token_url_format(self) -> dict[str, str]:
         return {}
 
+    def token_urls(self) -> set[str]:
+        """Return the URLs handing out single-use or rotating credentials
+        that are known without making requests"""
+        return {self.access_token_url()}
+
+    def idempotent_request(self, method: str, url: str) -> bool:
+        """Token requests are never retried nor hedged. They are marked where
+        they are sent, requests to the known token URLs are caught here for
+        the backends sending their own"""
+        if not super().idempotent_request(method, url):
+            return False
+        return url.split("?", 1)[0] not in self.token_urls()
+
     def revoke_token_url(self, token, uid) -> str:
         return cast("str", self.setting("REVOKE_TOKEN_URL", self.REVOKE_TOKEN_URL))
 
@@ -206,6 +332,8 @@ class BaseOAuth1(OAuthAuth):
     OAUTH_TOKEN_PARAMETER_NAME = "oauth_token"
     REDIRECT_URI_PARAMETER_NAME = "redirect_uri"
     UNATHORIZED_TOKEN_SUFIX = "unauthorized_token_name"
+    UNAUTHORIZED_TOKENS_LIMIT = 10
+    UNAUTHORIZED_TOKENS_MAX_AGE = 3600
 
     def auth_url(self) -> str:
         """Return redirect url"""
@@ -239,9 +367,35 @@ class BaseOAuth1(OAuthAuth):
         kwargs.update({"response": data, "backend": self})
         return self.strategy.authenticate(*args, **kwargs)
 
+    def get_unauthorized_tokens(self) -> dict[str, list]:
+        """Return the unexpired unauthorized tokens stored in session, keyed by
+        oauth_token as [issue time, token] entries, oldest first"""
+        name = self.name + self.UNATHORIZED_TOKEN_SUFIX
+        stored = self.strategy.session_get(name) or {}
+        now = int(time.time())
+        if isinstance(stored, list):
+            # Tokens stored as a list by previous versions
+            stored = {
+                self.unauthorized_token_key(token): [now, token] for token in stored
+            }
+        max_age = cast(
+            "int",
+            self.setting(
+                "UNAUTHORIZED_TOKENS_MAX_AGE", self.UNAUTHORIZED_TOKENS_MAX_AGE
+            ),
+        )
+        return {
+            key: entry for key, entry in stored.items() if now - entry[0] <= max_age
+        }
+
+    def unauthorized_token_key(self, token) -> str:
+        if not isinstance(token, dict):
+            token = parse_qs(token)
+        return cast("str", token.get(self.OAUTH_TOKEN_PARAMETER_NAME, ""))
+
     def get_unauthorized_token(self):
         name = self.name + self.UNATHORIZED_TOKEN_SUFIX
-        unauthed_tokens = self.strategy.session_get(name, [])
+        unauthed_tokens = self.get_unauthorized_tokens()
         if not unauthed_tokens:
             raise AuthTokenError(self, "Missing unauthorized token")
 
@@ -250,25 +404,28 @@ class BaseOAuth1(OAuthAuth):
         if data_token is None:
             raise AuthTokenError(self, "Missing unauthorized token")
 
-        token = None
-        for utoken in unauthed_tokens:
-            orig_utoken = utoken
-            if not isinstance(utoken, dict):
-                utoken = parse_qs(utoken)
-            if utoken.get(self.OAUTH_TOKEN_PARAMETER_NAME) == data_token:
-                self.strategy.session_set(
-                    name, list(set(unauthed_tokens) - {orig_utoken})
-                )
-                token = utoken
-                break
-        else:
+        entry = unauthed_tokens.pop(data_token, None)
+        if entry is None:
             raise AuthTokenError(self, "Incorrect tokens")
+        self.strategy.session_set(name, unauthed_tokens)
+        token = entry[1]
+        if not isinstance(token, dict):
+            token = parse_qs(token)
         return token
 
     def set_unauthorized_token(self):
         token = self.unauthorized_token()
         name = self.name + self.UNATHORIZED_TOKEN_SUFIX
-        tokens = [*self.strategy.session_get(name, []), token]
+        tokens = self.get_unauthorized_tokens()
+        key = self.unauthorized_token_key(token)
+        tokens.pop(key, None)
+        tokens[key] = [int(time.time()), token]
+        limit = cast(
+            "int",
+            self.setting("UNAUTHORIZED_TOKENS_LIMIT", self.UNAUTHORIZED_TOKENS_LIMIT),
+        )
+        while len(tokens) > limit:
+            del tokens[next(iter(tokens))]
         self.strategy.session_set(name, tokens)
         return token
 
@@ -276,6 +433,9 @@ class BaseOAuth1(OAuthAuth):
         """Return extra arguments needed on request-token process"""
         return cast("dict[str, str]", self.setting("REQUEST_TOKEN_EXTRA_ARGUMENTS", {}))
 
+    def token_urls(self) -> set[str]:
+        return {*super().token_urls(), self.REQUEST_TOKEN_URL}
+
     def unauthorized_token(self):
         """Return request for unauthorized token (first stage)"""
         params = self.request_token_extra_arguments()
@@ -287,6 +447,7 @@ class BaseOAuth1(OAuthAuth):
             params=params,
             auth=OAuth1(key, secret, callback_uri=self.get_redirect_uri(state)),
             method=self.REQUEST_TOKEN_METHOD,
+            idempotent=False,
         )
         content = response.content
         if response.encoding or response.apparent_encoding:
@@ -351,6 +512,7 @@ class BaseOAuth1(OAuthAuth):
             self.access_token_url(),
             auth=self.oauth_auth(token),
             method=self.ACCESS_TOKEN_METHOD,
+            idempotent=False,
         )
 
     def user_data(self, access_token: dict, *args, **kwargs) -> dict[str, Any] | None:
@@ -371,6 +533,7 @@ class BaseOAuth2(OAuthAuth):
     REDIRECT_STATE = True
     STATE_PARAMETER = True
     USE_BASIC_AUTH = False
+    USER_DATA_MAX_WORKERS = 4
 
     def use_basic_auth(self) -> bool:
         return self.USE_BASIC_AUTH
@@ -453,7 +616,7 @@ class BaseOAuth2(OAuthAuth):
         params: dict | None = None,
     ) -> dict[Any, Any]:
         with wrap_access_token_error(self):
-            return self.get_json(
+            response = self.request(
                 url,
                 method=method,
                 headers=headers,
@@ -461,7 +624,9 @@ class BaseOAuth2(OAuthAuth):
                 auth=auth,
                 params=params,
                 json=json,
+                idempotent=False,
             )
+            return self.json_loads(response)
 
     def process_error(self, data) -> None:
         if data.get("error"):
@@ -501,15 +666,93 @@ class BaseOAuth2(OAuthAuth):
 
     @handle_http_errors
     def do_auth(self, access_token, *args, **kwargs):
-        """Finish the auth process once the access_token was retrieved"""
+        """Finish the auth process once the access_token was retrieved
+
+        When TOKEN_USER_CACHE_TTL is set, logins with a bare access token
+        (API-token logins) remember the resolved user for the token lifetime,
+        capped by that setting. Repeated logins with the same token skip the
+        user data request and the pipeline, so they don't refresh the user
+        details nor the stored extra data.
+        """
+        cache_key = self.token_user_cache_key(access_token, **kwargs)
+        if cache_key:
+            user = self.cached_token_user(cache_key, access_token, *args, **kwargs)
+            if user:
+                return user
         data = self.user_data(access_token, *args, **kwargs)
         response = kwargs.get("response") or {}
         response.update(data or {})
         if "access_token" not in response:
             response["access_token"] = access_token
         kwargs.update({"response": response, "backend": self})
+        user = self.strategy.authenticate(*args, **kwargs)
+        if cache_key:
+            self.cache_token_user(cache_key, user, response)
+        return user
+
+    def token_user_cache(self):
+        """Return the cache used for API-token logins"""
+        return load_shared_cache(
+            cast("str | None", self.setting("TOKEN_USER_CACHE")), TOKEN_USER_CACHE
+        )
+
+    def token_user_cache_key(self, access_token, **kwargs) -> str | None:
+        """Cache key of the user logged in with the given token, None when the
+        login must run the whole pipeline"""
+        if not self.setting("TOKEN_USER_CACHE_TTL"):
+            return None
+        # Logins completing the authorization flow or associating the
+        # account to the current user aren't cached
+        if kwargs.get("response") or kwargs.get("user"):
+            return None
+        digest = hashlib.sha256(str(access_token).encode()).hexdigest()
+        return f"token-user:{self.name}:{digest}"
+
+    def cached_token_user(
+        self, cache_key: str, access_token, *args, **kwargs
+    ) -> UserProtocol | HttpResponseProtocol | None:
+        """Authenticate the user previously resolved for the token, if any"""
+        cached = self.token_user_cache().get(cache_key)
+        if cached is None:
+            return None
+        kwargs.update(
+            {
+                "response": {"access_token": access_token},
+                "backend": self,
+                "token_user": cached,
+            }
+        )
         return self.strategy.authenticate(*args, **kwargs)
 
+    def cache_token_user(self, cache_key: str, user, response: dict) -> None:
+        social = getattr(user, "social_user", None)
+        if social is None:
+            # Partial pipeline or failed login
+            return
+        ttl = float(cast("float", self.setting("TOKEN_USER_CACHE_TTL")))
+        lifetime = response.get("expires_in") or response.get("expires")
+        if lifetime:
+            with contextlib.suppress(TypeError, ValueError):
+                ttl = min(ttl, float(lifetime))
+        if ttl > 0:
+            self.token_user_cache().set(cache_key, (social.uid, user.id), ttl)
+
+    def pipeline(
+        self, pipeline, pipeline_index: int = 0, *args, **kwargs
+    ) -> UserProtocol | HttpResponseProtocol | None:
+        token_user = kwargs.get("token_user")
+        if token_user is None:
+            return super().pipeline(pipeline, pipeline_index, *args, **kwargs)
+        # Cached API-token login, load the user from the stored association
+        uid, user_id = token_user
+        social = self.strategy.storage.user.get_social_auth(self.name, uid)
+        if social is None or social.user.id != user_id:
+            return None
+        user = social.user
+        user.social_user = social
+        user.is_new = False
+        return user
+
     def refresh_token_params(self, token: str, *args, **kwargs) -> dict[str, str]:
         client_id, client_secret = self.get_key_and_secret()
         return {
@@ -523,7 +766,7 @@ class BaseOAuth2(OAuthAuth):
         return None
 
     def process_refresh_token_response(self, response, *args, **kwargs) -> dict:
-        return response.json()
+        return self.json_loads(response)
 
     def refresh_token(self, token: str, *args, **kwargs) -> dict:
         params = self.refresh_token_params(token, *args, **kwargs)
@@ -537,16 +780,44 @@ class BaseOAuth2(OAuthAuth):
             auth=self.refresh_token_auth(),
             data=params if not is_get else None,
             params=params if is_get else None,
+            idempotent=False,
         )
         return self.process_refresh_token_response(request, *args, **kwargs)
 
     def refresh_token_url(self):
         return self.REFRESH_TOKEN_URL or self.access_token_url()
 
+    def token_urls(self) -> set[str]:
+        return {*super().token_urls(), self.refresh_token_url()}
+
     def user_data(self, access_token: str, *args, **kwargs) -> dict[str, Any] | None:
         """Loads user data from service. Implement in subclass"""
         return {}
 
+    def user_data_endpoints(
+        self, access_token: str, *args, **kwargs
+    ) -> dict[str, Callable[[], Any]]:
+        """Return independent profile requests keyed by name, override it
+        along with user_data() to fetch them with fetch_user_data_endpoints()"""
+        return {}
+
+    def fetch_user_data_endpoints(
+        self, endpoints: Mapping[str, Callable[[], Any]]
+    ) -> dict[str, Any]:
+        """Call the given profile requests concurrently and return their
+        results by name, the first error (in the given order) is raised"""
+        if len(endpoints) < 2:
+            return {name: call() for name, call in endpoints.items()}
+        max_workers = min(
+            len(endpoints),
+            cast(
+                "int", self.setting("USER_DATA_MAX_WORKERS", self.USER_DATA_MAX_WORKERS)
+            ),
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(call) for name, call in endpoints.items()}
+            return {name: future.result() for name, future in futures.items()}
+
 
 class BaseOAuth2PKCE(BaseOAuth2):
     """
@@ -562,8 +833,7 @@ class BaseOAuth2PKCE(BaseOAuth2):
     PKCE_DEFAULT_CODE_VERIFIER_LENGTH = 43
     DEFAULT_USE_PKCE = True
 
-    def create_code_verifier(self):
-        name = f"{self.name}_code_verifier"
+    def generate_code_verifier(self) -> str:
         code_verifier_len = cast(
             "int",
             self.setting(
@@ -571,11 +841,27 @@ class BaseOAuth2PKCE(BaseOAuth2):
                 default=self.PKCE_DEFAULT_CODE_VERIFIER_LENGTH,
             ),
         )
-        code_verifier = self.strategy.random_string(code_verifier_len)
+        return self.strategy.random_string(code_verifier_len)
+
+    def signed_state_payload(self) -> dict[str, Any]:
+        payload = super().signed_state_payload()
+        if self.setting("USE_PKCE", default=self.DEFAULT_USE_PKCE):
+            payload["code_verifier"] = self.generate_code_verifier()
+        return payload
+
+    def create_code_verifier(self):
+        if self.uses_signed_state():
+            # Sealed in the state cookie, it never travels in an URL
+            self.create_signed_state()
+            return cast("dict[str, Any]", self.state_data)["code_verifier"]
+        name = f"{self.name}_code_verifier"
+        code_verifier = self.generate_code_verifier()
         self.strategy.session_set(name, code_verifier)
         return code_verifier
 
     def get_code_verifier(self):
+        if self.uses_signed_state():
+            return (self.state_data or {}).get("code_verifier")
         name = f"{self.name}_code_verifier"
         return self.strategy.session_get(name)
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 from typing import TYPE_CHECKING, Any, cast
 
 from openid.consumer.consumer import CANCEL, FAILURE, SUCCESS, Consumer
-from openid.consumer.discover import DiscoveryFailure
+from openid.consumer.discover import DiscoveryFailure, discover
 from openid.extensions import ax, pape, sreg
 from openid.fetchers import HTTPFetchingError
 
@@ -15,7 +16,7 @@ from social_core.exceptions import (
     AuthUnknownError,
     AuthUnreachableProvider,
 )
-from social_core.utils import url_add_parameters
+from social_core.utils import TTLCache, load_shared_cache, url_add_parameters
 
 from .base import BaseAuth
 
@@ -40,6 +41,11 @@ AX_SCHEMA_ATTRS = [
 SREG_ATTR = [("email", "email"), ("fullname", "fullname"), ("nickname", "nickname")]
 OPENID_ID_FIELD = "openid_identifier"
 SESSION_NAME = "openid"
+DISCOVERY_CACHE_TTL = 3600
+
+# Discovery results shared by the backends in this process, a cache shared
+# across workers can be configured with OPENID_DISCOVERY_CACHE
+DISCOVERY_CACHE = TTLCache()
 
 
 class OpenIdAuth(BaseAuth):
@@ -50,6 +56,7 @@ class OpenIdAuth(BaseAuth):
     USERNAME_KEY = "username"
 
     _consumer = None
+    _prepared_request = None
 
     def get_user_id(self, details, response):
         """Return user unique id provided by service"""
@@ -170,13 +177,13 @@ class OpenIdAuth(BaseAuth):
 
     def auth_url(self):
         """Return auth URL returned by service"""
-        openid_request = self.setup_request(self.auth_extra_arguments())
+        openid_request = self.prepared_request()
         # Construct completion URL, including page we should redirect to
         return openid_request.redirectURL(self.trust_root(), self.get_return_to())
 
     def auth_html(self):
         """Return auth HTML returned by service"""
-        openid_request = self.setup_request(self.auth_extra_arguments())
+        openid_request = self.prepared_request()
         form_tag = {"id": "openid_message"}
         return openid_request.htmlMarkup(
             self.trust_root(), self.get_return_to(), form_tag_attrs=form_tag
@@ -223,6 +230,14 @@ class OpenIdAuth(BaseAuth):
         if data.status != SUCCESS:
             raise AuthUnknownError(self, data.status)
 
+    def prepared_request(self):
+        """Return the auth request set up for this backend instance, start()
+        uses it for uses_redirect() and auth_url() or auth_html() so discovery
+        and association happen once"""
+        if self._prepared_request is None:
+            self._prepared_request = self.setup_request(self.auth_extra_arguments())
+        return self._prepared_request
+
     def setup_request(self, params=None):
         """Setup request"""
         request = self.openid_request(params)
@@ -268,13 +283,40 @@ class OpenIdAuth(BaseAuth):
         return self._consumer
 
     def create_consumer(self, store=None):
-        return Consumer(self.strategy.openid_session_dict(SESSION_NAME), store)
+        consumer = Consumer(self.strategy.openid_session_dict(SESSION_NAME), store)
+        # python-openid hook for the discovery function
+        cast("Any", consumer)._discover = self.discover  # noqa: SLF001
+        return consumer
+
+    def discovery_cache(self):
+        """Return the cache used for discovery results"""
+        return load_shared_cache(
+            cast("str | None", self.setting("OPENID_DISCOVERY_CACHE")), DISCOVERY_CACHE
+        )
+
+    def discover(self, url: str):
+        """Run Yadis/XRDS discovery for the claimed or OP identifier URL,
+        reusing results for OPENID_DISCOVERY_CACHE_TTL seconds"""
+        ttl = cast(
+            "int", self.setting("OPENID_DISCOVERY_CACHE_TTL", DISCOVERY_CACHE_TTL)
+        )
+        if not ttl:
+            return discover(url)
+        cache = self.discovery_cache()
+        key = "openid-discovery:" + hashlib.sha256(url.encode()).hexdigest()
+        result = cache.get(key)
+        if result is None:
+            result = discover(url)
+            # Failed discoveries are retried on the next request
+            if result[1]:
+                cache.set(key, result, ttl)
+        return result
 
     def uses_redirect(self):
         """Return true if openid request will be handled with redirect or
         HTML content will be returned.
         """
-        return self.openid_request().shouldSendRedirect()
+        return self.prepared_request().shouldSendRedirect()
 
     def openid_request(self, params: dict[str, str] | None = None):
         """Return openid request"""
@@ -3,7 +3,6 @@ from __future__ import annotations
 import base64
 import datetime
 from calendar import timegm
-from json import loads
 from typing import TYPE_CHECKING, Any, Literal, cast
 
 import jwt
@@ -18,12 +17,13 @@ from jwt import (
 from jwt.utils import base64url_decode
 
 from social_core.backends.oauth import BaseOAuth2PKCE
+from social_core.backends.resource_server import ResourceServerMixin
 from social_core.exceptions import (
     AuthInvalidParameter,
     AuthMissingParameter,
     AuthTokenError,
 )
-from social_core.utils import cache
+from social_core.utils import cache, load_jwk
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
@@ -45,7 +45,7 @@ class OpenIdConnectAssociation:
         self.assoc_type = assoc_type  # as state
 
 
-class OpenIdConnectAuth(BaseOAuth2PKCE):
+class OpenIdConnectAuth(ResourceServerMixin, BaseOAuth2PKCE):
     """
     Base class for Open ID Connect backends.
     Currently only the code response type is supported.
@@ -125,6 +125,14 @@ class OpenIdConnectAuth(BaseOAuth2PKCE):
             "ACCESS_TOKEN_URL", "token_endpoint", self.ACCESS_TOKEN_URL
         )
 
+    def token_urls(self) -> set[str]:
+        # Only the configured URLs, the discovered ones would need a request
+        urls = {
+            self.setting("ACCESS_TOKEN_URL", self.ACCESS_TOKEN_URL),
+            self.REFRESH_TOKEN_URL,
+        }
+        return {url for url in urls if url}
+
     def revoke_token_url(self, token, uid) -> str:
         return self.get_setting_config(
             "REVOKE_TOKEN_URL", "revocation_endpoint", self.REVOKE_TOKEN_URL
@@ -155,9 +163,15 @@ class OpenIdConnectAuth(BaseOAuth2PKCE):
     def oidc_endpoint(self) -> str:
         return cast("str", self.setting("OIDC_ENDPOINT", self.OIDC_ENDPOINT))
 
+    def warm_up(self) -> None:
+        self.oidc_config()
+        self.get_jwks_keys()
+
     @cache(ttl=86400)
     def oidc_config(self) -> dict[Any, Any]:
-        return self.get_json(f"{self.oidc_endpoint()}/.well-known/openid-configuration")
+        return self.get_revalidated_json(
+            f"{self.oidc_endpoint()}/.well-known/openid-configuration"
+        )
 
     @cache(ttl=86400)
     def get_jwks_keys(self):
@@ -168,8 +182,7 @@ class OpenIdConnectAuth(BaseOAuth2PKCE):
         # keys.append({'key': client_secret, 'kty': 'oct'})
 
     def get_remote_jwks_keys(self):
-        response = self.request(self.jwks_uri())
-        return loads(response.text)["keys"]
+        return self.get_revalidated_json(self.jwks_uri())["keys"]
 
     def auth_params(self, state=None):  # noqa: C901, PLR0912
         """Return extra arguments needed on auth process."""
@@ -304,10 +317,14 @@ class OpenIdConnectAuth(BaseOAuth2PKCE):
         for key in keys:
             if kid is None or kid == key.get("kid"):
                 if "alg" not in key:
-                    key["alg"] = cast(
-                        "list[str]", self.setting("JWT_ALGORITHMS", self.JWT_ALGORITHMS)
-                    )[0]
-                rsakey = jwt.PyJWK(key)
+                    key = {
+                        **key,
+                        "alg": cast(
+                            "list[str]",
+                            self.setting("JWT_ALGORITHMS", self.JWT_ALGORITHMS),
+                        )[0],
+                    }
+                rsakey = load_jwk(key)
                 message, encoded_sig = id_token.rsplit(".", 1)
                 decoded_sig = base64url_decode(encoded_sig.encode("utf-8"))
                 if rsakey.Algorithm.verify(
@@ -370,6 +387,30 @@ class OpenIdConnectAuth(BaseOAuth2PKCE):
 
         return claims
 
+    def access_token_key(self, token: str, claims: dict[str, Any]) -> Any:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None:
+            # Fetch an unknown key here, find_valid_key() would download the
+            # key set for every token
+            self.find_access_token_jwk(
+                kid,
+                self.jwks_uri(),
+                self.get_jwks_keys,
+                self.get_jwks_keys.invalidate,  # pyright: ignore[reportAttributeAccessIssue]
+            )
+        key = self.find_valid_key(token)
+        if not key:
+            raise AuthTokenError(self, "Signature verification failed")
+        return load_jwk(key).key
+
+    def access_token_issuer(self, claims: dict[str, Any]) -> str | None:
+        return super().access_token_issuer(claims) or self.id_token_issuer()
+
+    def introspection_url(self) -> str | None:
+        return super().introspection_url() or self.oidc_config().get(
+            "introspection_endpoint"
+        )
+
     def validate_and_return_refresh_id_token(self, id_token, access_token):
         """Validate an ID token returned by a refresh request."""
         claims = self.decode_and_validate_id_token(id_token, access_token)
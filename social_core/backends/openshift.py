@@ -34,7 +34,7 @@ class OpenshiftOAuth2(BaseOAuth2):
         """Loads user data from service"""
         headers = {"Authorization": f"Bearer {access_token}"}
 
-        return self.request(
+        return self.get_json(
             urljoin(append_slash(cast("str", self.setting("URL"))), "oapi/v1/users/~"),
             headers=headers,
-        ).json()
+        )
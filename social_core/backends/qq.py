@@ -93,5 +93,6 @@ class QQOAuth2(BaseOAuth2):
                 json=json,
                 auth=auth,
                 params=params,
+                idempotent=False,
             )
         return parse_qs(response.content)
@@ -0,0 +1,215 @@
+"""
+Resource server support, validation of the access tokens presented to an API
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, cast
+
+import jwt
+
+from social_core.exceptions import AuthInsufficientScope, AuthTokenError
+from social_core.utils import TTLCache, load_shared_cache
+
+from .oauth import BaseOAuth2
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+# Shared by all workers of the process, a cache shared across processes can
+# be configured with ACCESS_TOKEN_CACHE
+ACCESS_TOKEN_CACHE = TTLCache(maxsize=10000)
+
+# Key sets downloaded again for an unknown key ID, by JWKS URI, to limit
+# these downloads to one per JWKS_REFRESH_INTERVAL
+JWKS_REFRESHES = TTLCache(maxsize=1000)
+_JWKS_REFRESHES_LOCK = threading.Lock()
+
+
+class ResourceServerMixin(BaseOAuth2):
+    """Validate bearer tokens issued by the provider to the clients of an API
+
+    JWT access tokens are verified locally against the provider signing keys
+    (signature, issuer, audience and expiry), other tokens are checked with
+    RFC 7662 token introspection, which must report them active, unexpired
+    and issued for this audience and issuer. Valid tokens are cached by their
+    hash until they expire; ACCESS_TOKEN_CACHE_TTL caps that time, 0 disables
+    caching.
+
+        claims = backend.validate_access_token(token, scopes=["read"])
+    """
+
+    JWT_ALGORITHMS = ["RS256"]
+    JWKS_REFRESH_INTERVAL = 300
+
+    def access_token_cache(self):
+        """Return the cache used for validated tokens"""
+        return load_shared_cache(
+            cast("str | None", self.setting("ACCESS_TOKEN_CACHE")), ACCESS_TOKEN_CACHE
+        )
+
+    def validate_access_token(
+        self, token: str, scopes: Iterable[str] = ()
+    ) -> dict[str, Any]:
+        """Return the claims of a valid access token granting the given scopes
+
+        Raises AuthTokenError for invalid, expired or inactive tokens and
+        AuthInsufficientScope when a scope is missing.
+        """
+        max_ttl = cast("float | None", self.setting("ACCESS_TOKEN_CACHE_TTL"))
+        cache = self.access_token_cache()
+        key = f"access-token:{self.name}:{hashlib.sha256(token.encode()).hexdigest()}"
+        claims = cache.get(key) if max_ttl != 0 else None
+        if claims is None:
+            if self.is_jwt(token):
+                claims = self.decode_access_token(token)
+            else:
+                claims = self.introspect_access_token(token)
+            ttl = claims["exp"] - time.time() if "exp" in claims else 0
+            if max_ttl is not None:
+                ttl = min(ttl, max_ttl)
+            if ttl > 0:
+                cache.set(key, claims, ttl)
+
+        missing = set(scopes) - self.access_token_scopes(claims)
+        if missing:
+            raise AuthInsufficientScope(
+                self, f"Missing scope {' '.join(sorted(missing))}"
+            )
+        return dict(claims)
+
+    @staticmethod
+    def is_jwt(token: str) -> bool:
+        if token.count(".") != 2:
+            return False
+        try:
+            jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            return False
+        return True
+
+    def access_token_key(self, token: str, claims: dict[str, Any]) -> Any:
+        """Return the key verifying the token signature, override in
+        subclasses"""
+        raise AuthTokenError(self, "Local access token validation not supported")
+
+    def find_access_token_jwk(
+        self,
+        kid: str,
+        jwks_uri: str,
+        get_keys: Callable[[], list[dict[str, Any]]],
+        invalidate_keys: Callable[[], None],
+    ) -> dict[str, Any]:
+        """Return the signing key with the given key ID from the cached key
+        set. Anyone can send tokens, an unknown key ID downloads the key set
+        again at most once per JWKS_REFRESH_INTERVAL seconds for each
+        jwks_uri"""
+        for key in get_keys():
+            if key.get("kid") == kid:
+                return key
+        if self.claim_jwks_refresh(jwks_uri):
+            invalidate_keys()
+            for key in get_keys():
+                if key.get("kid") == kid:
+                    return key
+        raise AuthTokenError(self, "Signature key not found")
+
+    def claim_jwks_refresh(self, jwks_uri: str) -> bool:
+        """Return True if the key set can be downloaded again now"""
+        interval = cast(
+            "float", self.setting("JWKS_REFRESH_INTERVAL", self.JWKS_REFRESH_INTERVAL)
+        )
+        with _JWKS_REFRESHES_LOCK:
+            if JWKS_REFRESHES.get(jwks_uri) is not None:
+                return False
+            JWKS_REFRESHES.set(jwks_uri, True, interval)
+        return True
+
+    def access_token_algorithms(self) -> list[str]:
+        return cast("list[str]", self.setting("JWT_ALGORITHMS", self.JWT_ALGORITHMS))
+
+    def access_token_audience(self) -> str | list[str] | None:
+        """Expected audience, ACCESS_TOKEN_AUDIENCE or the client ID"""
+        return cast(
+            "str | list[str] | None",
+            self.setting("ACCESS_TOKEN_AUDIENCE") or self.setting("KEY"),
+        )
+
+    def access_token_issuer(self, claims: dict[str, Any]) -> str | None:
+        """Expected issuer, not checked when None"""
+        return cast("str | None", self.setting("ACCESS_TOKEN_ISSUER"))
+
+    def decode_access_token(self, token: str) -> dict[str, Any]:
+        """Validate a JWT access token locally and return its claims"""
+        try:
+            claims = jwt.decode(
+                token,
+                options={
+                    "verify_signature": False,
+                    "verify_aud": False,
+                    "verify_exp": False,
+                    "verify_iat": False,
+                    "verify_iss": False,
+                    "verify_nbf": False,
+                },
+            )
+            return jwt.decode(
+                token,
+                key=self.access_token_key(token, claims),
+                algorithms=self.access_token_algorithms(),
+                audience=self.access_token_audience(),
+                issuer=self.access_token_issuer(claims),
+                leeway=cast("int", self.setting("JWT_LEEWAY", 0)),
+                options={"require": ["exp"]},
+            )
+        except jwt.PyJWTError as error:
+            raise AuthTokenError(self, error) from error
+
+    def introspection_url(self) -> str | None:
+        return cast("str | None", self.setting("INTROSPECTION_URL"))
+
+    def introspect_access_token(self, token: str) -> dict[str, Any]:
+        """Check an opaque access token with the RFC 7662 introspection
+        endpoint and return the token information"""
+        url = self.introspection_url()
+        if not url:
+            raise AuthTokenError(self, "Opaque access token cannot be introspected")
+        response = self.get_json(
+            url,
+            method="POST",
+            data={"token": token, "token_type_hint": "access_token"},
+            auth=self.get_key_and_secret(),
+        )
+        if not response.get("active"):
+            raise AuthTokenError(self, "Inactive access token")
+        if "exp" in response and response["exp"] <= time.time():
+            raise AuthTokenError(self, "Expired access token")
+        self.validate_introspected_claims(response)
+        return response
+
+    def validate_introspected_claims(self, response: dict[str, Any]) -> None:
+        """Check the audience and issuer of an introspected token when the
+        introspection response includes them. The client_id is matched
+        against the expected audience when the response has no aud."""
+        audience = self.access_token_audience()
+        token_audience = response.get("aud", response.get("client_id"))
+        if audience and token_audience is not None:
+            expected = {audience} if isinstance(audience, str) else set(audience)
+            if isinstance(token_audience, str):
+                token_audience = [token_audience]
+            if expected.isdisjoint(token_audience):
+                raise AuthTokenError(self, "Invalid access token audience")
+        if "iss" in response:
+            issuer = self.access_token_issuer(response)
+            if issuer is not None and response["iss"] != issuer:
+                raise AuthTokenError(self, "Invalid access token issuer")
+
+    def access_token_scopes(self, claims: dict[str, Any]) -> set[str]:
+        """Scopes granted by the token, from the scope or scp claims"""
+        scopes = claims.get("scope", claims.get("scp", ""))
+        if isinstance(scopes, str):
+            return set(scopes.split())
+        return set(scopes)
@@ -69,5 +69,6 @@ class StackoverflowOAuth2(BaseOAuth2):
                 json=json,
                 auth=auth,
                 params=params,
+                idempotent=False,
             )
         return parse_qs(response.content)
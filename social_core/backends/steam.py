@@ -5,16 +5,23 @@ Steam OpenId backend, docs at:
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, cast
 
 from social_core.exceptions import AuthFailed
+from social_core.utils import TTLCache
 
 from .open_id import OpenIdAuth
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from social_core.store import OpenIdStore
 
 USER_INFO = "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?"
+# GetPlayerSummaries accepts up to 100 comma separated steamids
+PLAYER_SUMMARIES_BATCH_SIZE = 100
+PLAYER_SUMMARIES_CACHE_TTL = 60
+PLAYER_SUMMARIES_CACHE = TTLCache(maxsize=10000)
 
 
 class SteamOpenId(OpenIdAuth):
@@ -26,15 +33,9 @@ class SteamOpenId(OpenIdAuth):
         return self._user_id(response)
 
     def get_user_details(self, response):
-        player = self.get_json(
-            USER_INFO,
-            params={
-                "key": self.setting("API_KEY"),
-                "steamids": self._user_id(response),
-            },
-        )
-        if len(player["response"]["players"]) > 0:
-            player = player["response"]["players"][0]
+        user_id = self._user_id(response)
+        player = self.get_player_summaries([user_id]).get(user_id)
+        if player:
             details = {
                 "username": player.get("personaname"),
                 "email": "",
@@ -47,6 +48,38 @@ class SteamOpenId(OpenIdAuth):
             details = {}
         return details
 
+    def get_player_summaries(self, steamids: Iterable[str]) -> dict[str, Any]:
+        """Return player summaries keyed by steamid.
+
+        Summaries are cached for PLAYER_SUMMARIES_CACHE_TTL seconds, the rest
+        are fetched in requests of up to 100 steamids. Unknown steamids are
+        missing from the result."""
+        ttl = cast(
+            "int",
+            self.setting("PLAYER_SUMMARIES_CACHE_TTL", PLAYER_SUMMARIES_CACHE_TTL),
+        )
+        summaries: dict[str, Any] = {}
+        missing: list[str] = []
+        for steamid in dict.fromkeys(str(steamid) for steamid in steamids):
+            player = PLAYER_SUMMARIES_CACHE.get(steamid) if ttl else None
+            if player is None:
+                missing.append(steamid)
+            else:
+                summaries[steamid] = player
+
+        for start in range(0, len(missing), PLAYER_SUMMARIES_BATCH_SIZE):
+            batch = missing[start : start + PLAYER_SUMMARIES_BATCH_SIZE]
+            data = self.get_json(
+                USER_INFO,
+                params={"key": self.setting("API_KEY"), "steamids": ",".join(batch)},
+            )
+            for player in data["response"]["players"]:
+                steamid = str(player.get("steamid"))
+                summaries[steamid] = player
+                if ttl:
+                    PLAYER_SUMMARIES_CACHE.set(steamid, player, ttl)
+        return summaries
+
     def get_consumer_store(self) -> OpenIdStore | None:
         # Steam seems to support stateless mode only, ignore store
         return None
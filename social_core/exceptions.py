@@ -109,6 +109,10 @@ class AuthTokenError(AuthException):
         return f"Token error: {msg}"
 
 
+class AuthInsufficientScope(AuthTokenError):
+    """The access token doesn't grant the required scopes."""
+
+
 class AuthMissingParameter(AuthException):
     """Missing parameter needed to start or complete the process."""
 
@@ -176,6 +180,20 @@ class AuthUnreachableProvider(AuthException):
         return "The authentication provider could not be reached"
 
 
+class AuthFlowDeadlineExceeded(AuthUnreachableProvider):
+    """The time budget for the authentication flow was spent"""
+
+    def __str__(self) -> str:
+        return "The authentication provider did not respond in time"
+
+
+class AuthResponseTooLarge(AuthException):
+    """The provider response exceeds REQUESTS_MAX_RESPONSE_SIZE"""
+
+    def __str__(self) -> str:
+        return "The authentication provider response is too large"
+
+
 class InvalidEmail(AuthException):
     def __str__(self) -> str:
         return "Email couldn't be validated"
@@ -199,3 +217,14 @@ class InvalidExpiryValue(SocialAuthBaseException):
 
     def __str__(self) -> str:
         return f"Invalid expiry value for field '{self.field_name}': {self.value}"
+
+
+class TokenRefreshLockTimeout(SocialAuthBaseException):
+    """The token refresh lock of a social association could not be acquired."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        super().__init__()
+
+    def __str__(self) -> str:
+        return f"Could not acquire token refresh lock for {self.key}"
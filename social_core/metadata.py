@@ -0,0 +1,225 @@
+"""Provider metadata warm-up and on-disk snapshots"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from .backends.base import BaseAuth
+from .backends.utils import load_backends
+from .utils import cache, module_member, social_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .strategy import BaseStrategy
+
+SNAPSHOT_VERSION = 1
+DEFAULT_WARM_UP_MAX_WORKERS = 8
+DEFAULT_METADATA_REFRESH_INTERVAL = 3600
+
+
+@dataclass
+class WarmUpResult:
+    backend: str
+    error: Exception | None = None
+
+
+def warm_up_backends(
+    strategy: BaseStrategy,
+    names: Iterable[str] | None = None,
+    max_workers: int | None = None,
+    refresh: bool = False,
+) -> list[WarmUpResult]:
+    """Prefetch provider metadata for the configured backends concurrently.
+
+    Every backend in AUTHENTICATION_BACKENDS (or only the given backend names)
+    runs its BaseAuth.warm_up() hook on a pool of WARM_UP_MAX_WORKERS threads
+    (8). With refresh the cached metadata is refetched even when still fresh.
+
+    Returns one WarmUpResult per backend; errors are collected there instead
+    of being raised.
+    """
+    max_workers = cast(
+        "int",
+        max_workers
+        or strategy.setting("WARM_UP_MAX_WORKERS", DEFAULT_WARM_UP_MAX_WORKERS),
+    )
+    backends = load_backends(strategy.get_backends())
+    if names is not None:
+        backends = {name: backends[name] for name in names if name in backends}
+
+    def warm_up(backend_class: type[BaseAuth]) -> None:
+        backend = backend_class(strategy)
+        if refresh:
+            with cache.refreshing():
+                backend.warm_up()
+        else:
+            backend.warm_up()
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (name, executor.submit(warm_up, backend_class))
+            for name, backend_class in backends.items()
+        ]
+        for name, future in futures:
+            result = WarmUpResult(name)
+            try:
+                future.result()
+            # pylint: disable-next=broad-exception-caught
+            except Exception as error:  # noqa: BLE001
+                social_logger.warning("Metadata warm-up failed for %s: %s", name, error)
+                result.error = error
+            results.append(result)
+    return results
+
+
+def _dotted_path(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def save_metadata_snapshot(path: str) -> int:
+    """Write the cached provider metadata to path as JSON.
+
+    The file is replaced atomically, entries that can't be serialized are
+    skipped. Returns the number of entries written.
+    """
+    entries = []
+    for name, instance in list(cache.instances.items()):
+        for (cls, args, kwargs), (updated, value) in list(instance.cache.items()):
+            if not issubclass(cls, BaseAuth):
+                continue
+            entry = {
+                "function": name,
+                "class": _dotted_path(cls),
+                "args": list(args),
+                "kwargs": dict(kwargs),
+                "updated": updated,
+                "value": value,
+            }
+            try:
+                json.dumps(entry)
+            except (TypeError, ValueError):
+                continue
+            entries.append(entry)
+
+    fd, tmp_name = tempfile.mkstemp(dir=Path(path).resolve().parent, suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "w") as snapshot:
+            json.dump({"version": SNAPSHOT_VERSION, "entries": entries}, snapshot)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink()
+        raise
+    return len(entries)
+
+
+def load_metadata_snapshot(path: str) -> int:
+    """Restore provider metadata saved by save_metadata_snapshot().
+
+    Restored entries keep their original fetch time, so expired ones are
+    refetched on use and only serve as a fallback when that fails. Entries
+    older than the ones already cached, or for backends that can't be
+    imported, are ignored. Returns the number of entries loaded.
+    """
+    try:
+        with Path(path).open() as snapshot:
+            data = json.load(snapshot)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        social_logger.warning("Ignoring invalid metadata snapshot %s", path)
+        return 0
+    if data.get("version") != SNAPSHOT_VERSION:
+        return 0
+
+    loaded = 0
+    for entry in data.get("entries", []):
+        instance = cache.instances.get(entry.get("function"))
+        if instance is None:
+            continue
+        try:
+            cls = module_member(entry["class"])
+        except (ImportError, AttributeError, ValueError):
+            continue
+        if not isinstance(cls, type) or not issubclass(cls, BaseAuth):
+            continue
+        key = (cls, tuple(entry["args"]), tuple(sorted(entry["kwargs"].items())))
+        current = instance.cache.get(key)
+        if current is not None and current[0] >= entry["updated"]:
+            continue
+        instance.cache[key] = (entry["updated"], entry["value"])
+        loaded += 1
+    return loaded
+
+
+class MetadataRefresher(threading.Thread):
+    """Background thread keeping provider metadata warm.
+
+    It refreshes the metadata of the configured backends right away and then
+    every METADATA_REFRESH_INTERVAL seconds (3600), saving a snapshot to
+    METADATA_SNAPSHOT_PATH after each run when set.
+    """
+
+    def __init__(
+        self,
+        strategy: BaseStrategy,
+        snapshot_path: str | None = None,
+        interval: float | None = None,
+    ) -> None:
+        super().__init__(name="social-auth-metadata-refresher", daemon=True)
+        self.strategy = strategy
+        self.snapshot_path = snapshot_path or strategy.setting("METADATA_SNAPSHOT_PATH")
+        self.interval = cast(
+            "float",
+            interval
+            or strategy.setting(
+                "METADATA_REFRESH_INTERVAL", DEFAULT_METADATA_REFRESH_INTERVAL
+            ),
+        )
+        self.stopped = threading.Event()
+
+    def refresh(self) -> list[WarmUpResult]:
+        results = warm_up_backends(self.strategy, refresh=True)
+        if self.snapshot_path:
+            try:
+                save_metadata_snapshot(self.snapshot_path)
+            except OSError as error:
+                social_logger.warning(
+                    "Could not save metadata snapshot %s: %s",
+                    self.snapshot_path,
+                    error,
+                )
+        return results
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            self.refresh()
+            self.stopped.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def start_metadata_refresher(
+    strategy: BaseStrategy,
+    snapshot_path: str | None = None,
+    interval: float | None = None,
+) -> MetadataRefresher:
+    """Load the metadata snapshot, if any, and start refreshing it in the
+    background. Call it once per worker at boot."""
+    refresher = MetadataRefresher(strategy, snapshot_path, interval)
+    if refresher.snapshot_path:
+        load_metadata_snapshot(refresher.snapshot_path)
+    refresher.start()
+    return refresher
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from social_core.exceptions import NotAllowedToDisconnect
+from social_core.tokens import revoke_access_tokens
 
 if TYPE_CHECKING:
     from social_core.storage import UserProtocol
@@ -36,13 +37,18 @@ def get_entries(
     }
 
 
-def revoke_tokens(strategy, entries, *args, **kwargs) -> None:
+def revoke_tokens(strategy, entries, *args, **kwargs) -> dict[str, Any] | None:
     revoke_tokens_on_disconnect = strategy.setting("REVOKE_TOKENS_ON_DISCONNECT", False)
     if revoke_tokens_on_disconnect:
+        if strategy.setting("REVOKE_TOKENS_PARALLEL", False):
+            # Revocation failures are reported in the results instead of
+            # aborting the disconnection
+            return {"revocations": revoke_access_tokens(strategy, entries)}
         for entry in entries:
             if "access_token" in entry.extra_data:
                 backend = entry.get_backend_instance(strategy)
                 backend.revoke_token(entry.extra_data["access_token"], entry.uid)
+    return None
 
 
 def disconnect(strategy: BaseStrategy, entries, user_storage, *args, **kwargs) -> None:
@@ -12,9 +12,10 @@ from typing import TYPE_CHECKING, Any, Protocol, cast
 from openid.association import Association as OpenIdAssociation
 
 from .exceptions import InvalidExpiryValue, MissingBackend
+from .tokens import refresh_token_once
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable
 
     from social_core.backends.base import BaseAuth
     from social_core.strategy import BaseStrategy
@@ -187,10 +188,19 @@ class UserMixin:
             and expiration.total_seconds() <= self.ACCESS_TOKEN_EXPIRED_THRESHOLD
         )
 
+    def access_token_expires_within(self, seconds: float) -> bool:
+        """Return true if the access token expires in the given seconds"""
+        expiration = self.expiration_timedelta()
+        return expiration is not None and expiration.total_seconds() <= seconds
+
     def get_access_token(self, strategy: BaseStrategy) -> str | None:
-        """Returns a valid access token."""
+        """Returns a valid access token.
+
+        Expired tokens are refreshed once per association, concurrent callers
+        reuse the result of the refresh in flight.
+        """
         if self.access_token_expired():
-            self.refresh_token(strategy)
+            refresh_token_once(self, strategy)
         return self.access_token
 
     def set_extra_data(self, extra_data: dict[str, Any] | None = None) -> bool:
@@ -285,6 +295,20 @@ class UserMixin:
         """Create a UserSocialAuth instance for given user"""
         raise NotImplementedError("Implement in subclass")
 
+    @classmethod
+    def get_social_auth_expiring_before(
+        cls, before: datetime, provider: str | None = None
+    ) -> Iterable[UserMixin]:
+        """Return UserSocialAuth instances whose access token expires before
+        the given (timezone aware) datetime.
+
+        Used by social_core.tokens.TokenRefreshManager to refresh tokens ahead
+        of their expiry. Implementations may return a superset (for example
+        when the expiry is only available in extra_data), the candidates are
+        checked again with expiration_timedelta() before being refreshed.
+        """
+        raise NotImplementedError("Implement in subclass")
+
 
 class NonceMixin:
     """One use numbers"""
@@ -1,8 +1,20 @@
 import pickle
 import time
 
+from openid.consumer.discover import OpenIDServiceEndpoint
 from openid.store.interface import OpenIDStore as BaseOpenIDStore
 from openid.store.nonce import SKEW
+from openid.yadis.manager import YadisServiceManager
+
+ENDPOINT_ATTRS = (
+    "claimed_id",
+    "server_url",
+    "type_uris",
+    "local_id",
+    "canonicalID",
+    "used_yadis",
+    "display_identifier",
+)
 
 
 class OpenIdStore(BaseOpenIDStore):
@@ -57,7 +69,72 @@ class OpenIdStore(BaseOpenIDStore):
         return self.nonce.use(server_url, timestamp, salt)
 
 
+def _json_safe(value) -> bool:
+    if isinstance(value, list):
+        return all(isinstance(item, str) for item in value)
+    return value is None or isinstance(value, (str, bool))
+
+
+def encode_endpoint(endpoint):
+    if type(endpoint) is not OpenIDServiceEndpoint:
+        raise TypeError("Unsupported OpenID endpoint")
+    data = {name: getattr(endpoint, name) for name in ENDPOINT_ATTRS}
+    if not all(_json_safe(value) for value in data.values()):
+        raise TypeError("Unsupported OpenID endpoint")
+    return data
+
+
+def decode_endpoint(data):
+    endpoint = OpenIDServiceEndpoint()
+    for name in ENDPOINT_ATTRS:
+        setattr(endpoint, name, data.get(name))
+    endpoint.type_uris = list(endpoint.type_uris or [])
+    return endpoint
+
+
+def encode_openid_value(value):
+    """Return a JSON serializable dict for python-openid session values,
+    raise TypeError if the value can't be represented"""
+    if type(value) is YadisServiceManager:
+        current = value._current  # noqa: SLF001
+        manager = {
+            "starting_url": value.starting_url,
+            "yadis_url": value.yadis_url,
+            "session_key": value.session_key,
+            "services": [encode_endpoint(service) for service in value.services],
+            "current": encode_endpoint(current) if current is not None else None,
+        }
+        if not all(
+            _json_safe(manager[name])
+            for name in ("starting_url", "yadis_url", "session_key")
+        ):
+            raise TypeError("Unsupported OpenID service manager")
+        return {"yadis": manager}
+    return {"endpoint": encode_endpoint(value)}
+
+
+def decode_openid_value(data):
+    if "endpoint" in data:
+        return decode_endpoint(data["endpoint"])
+    manager_data = data["yadis"]
+    manager = YadisServiceManager(
+        manager_data["starting_url"],
+        manager_data["yadis_url"],
+        [decode_endpoint(service) for service in manager_data["services"]],
+        manager_data["session_key"],
+    )
+    if manager_data["current"] is not None:
+        manager._current = decode_endpoint(manager_data["current"])  # noqa: SLF001
+    return manager
+
+
 class OpenIdSessionWrapper(dict):
+    """Session values for python-openid.
+
+    The consumer stores class instances in the session, these are kept as
+    compact JSON serializable dicts, values that can't be represented that way
+    and values written by previous versions use pickle."""
+
     pickle_instances = (
         "_yadis_services__openid_consumer_",
         "_openid_consumer_last_token",
@@ -66,12 +143,18 @@ class OpenIdSessionWrapper(dict):
     def __getitem__(self, name):
         value = super().__getitem__(name)
         if name in self.pickle_instances:
-            value = pickle.loads(value)
+            if isinstance(value, dict):
+                value = decode_openid_value(value)
+            else:
+                value = pickle.loads(value)
         return value
 
     def __setitem__(self, name, value) -> None:
         if name in self.pickle_instances:
-            value = pickle.dumps(value, 0)
+            try:
+                value = encode_openid_value(value)
+            except TypeError:
+                value = pickle.dumps(value, 0)
         super().__setitem__(name, value)
 
     def get(self, name, default=None):
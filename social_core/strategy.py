@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import secrets
 from typing import TYPE_CHECKING, Any, Protocol, cast
 
@@ -55,6 +56,10 @@ class BaseTemplateStrategy:
         raise NotImplementedError("Implement in subclass")
 
 
+# Marks session keys popped while session writes are buffered
+SESSION_REMOVED = object()
+
+
 class BaseStrategy:
     ALLOWED_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
     DEFAULT_TEMPLATE_STRATEGY = BaseTemplateStrategy
@@ -68,6 +73,93 @@ class BaseStrategy:
         self._storage = storage
         self.tpl = (tpl or self.DEFAULT_TEMPLATE_STRATEGY)(self)
 
+    def request_data(self, merge: bool = True):
+        """Return current request data (POST or GET).
+
+        Strategies are built per request, the payload read by
+        _read_request_data() is memoized for the strategy lifetime, see
+        clean_request_data_cache().
+        """
+        cache = self.__dict__.setdefault("_request_data_cache", {})
+        if merge not in cache:
+            cache[merge] = self._read_request_data(merge)
+        return cache[merge]
+
+    def clean_request_data_cache(self) -> None:
+        """Forget memoized request_data() values, call it when the request
+        data changes or the strategy instance is reused for another request"""
+        self.__dict__.pop("_request_data_cache", None)
+
+    @contextlib.contextmanager
+    def buffered_session(self):
+        """Buffer session_set() and session_pop() calls and write them once
+        when the block exits, nested blocks share the outer buffer"""
+        if self.__dict__.get("_session_buffer") is not None:
+            yield
+            return
+        self.__dict__["_session_buffer"] = {}
+        try:
+            yield
+        finally:
+            try:
+                self.flush_session_writes()
+            finally:
+                self.__dict__.pop("_session_buffer", None)
+
+    def flush_session_writes(self) -> None:
+        """Write the buffered session changes now, buffering continues"""
+        buffer = self.__dict__.get("_session_buffer")
+        if not buffer:
+            return
+        # Write through while flushing
+        self.__dict__["_session_buffer"] = None
+        try:
+            self.session_update(
+                {
+                    name: value
+                    for name, value in buffer.items()
+                    if value is not SESSION_REMOVED
+                },
+                [name for name, value in buffer.items() if value is SESSION_REMOVED],
+            )
+        finally:
+            self.__dict__["_session_buffer"] = {}
+
+    def session_update(self, values: dict[str, Any], removed: list[str]) -> None:
+        """Apply buffered session changes, override it to persist them with a
+        single write in framework integrations"""
+        for name, value in values.items():
+            self._session_set(name, value)
+        for name in removed:
+            self._session_pop(name)
+
+    def session_get(self, name: str, default=None) -> Any:
+        """Return session value for given key, including buffered changes"""
+        buffer = self.__dict__.get("_session_buffer")
+        if buffer and name in buffer:
+            value = buffer[name]
+            return default if value is SESSION_REMOVED else value
+        return self._session_get(name, default)
+
+    def session_set(self, name: str, value) -> None:
+        """Set session value for given key, buffered within
+        buffered_session()"""
+        buffer = self.__dict__.get("_session_buffer")
+        if buffer is None:
+            self._session_set(name, value)
+        else:
+            buffer[name] = value
+
+    def session_pop(self, name: str) -> Any:
+        """Pop session value for given key, buffered within
+        buffered_session()"""
+        buffer = self.__dict__.get("_session_buffer")
+        if buffer is None:
+            return self._session_pop(name)
+        value = self.session_get(name)
+        buffer[name] = SESSION_REMOVED
+        return value
+
     @property
     def storage(self) -> type[BaseStorage]:
         if self._storage is None:
@@ -109,6 +201,26 @@ class BaseStrategy:
         """
         raise StrategyMissingFeatureError(self.__class__.__name__, "session restore")
 
+    def cookie_get(self, name: str) -> str | None:
+        """Return the value of the given cookie sent with the request"""
+        raise StrategyMissingFeatureError(self.__class__.__name__, "cookies")
+
+    def cookie_set(
+        self, name: str, value: str, max_age: int, same_site: str = "Lax"
+    ) -> None:
+        """Set a cookie on the response to the current request.
+
+        The cookie must be HttpOnly, Secure on HTTPS requests and use the
+        given SameSite attribute. "Lax" cookies are sent back when the
+        provider redirects to the site, "None" is used when the provider
+        posts back to it instead and must always be Secure.
+        """
+        raise StrategyMissingFeatureError(self.__class__.__name__, "cookies")
+
+    def cookie_delete(self, name: str) -> None:
+        """Expire the given cookie with the response to the current request"""
+        raise StrategyMissingFeatureError(self.__class__.__name__, "cookies")
+
     def openid_session_dict(self, name: str) -> OpenIdSessionWrapper:
         # Many frameworks are switching the session serialization from Pickle
         # to JSON to avoid code execution risks. Flask did this from Flask
@@ -266,23 +378,24 @@ class BaseStrategy:
         """Return HTTP response with given content"""
         raise NotImplementedError("Implement in subclass")
 
-    def request_data(self, merge: bool = True):
-        """Return current request data (POST or GET)"""
+    def _read_request_data(self, merge: bool = True):
+        """Return current request data (POST or GET), memoized by
+        request_data()"""
         raise NotImplementedError("Implement in subclass")
 
     def request_host(self) -> str:
         """Return current host value"""
         raise NotImplementedError("Implement in subclass")
 
-    def session_get(self, name: str, default=None):
+    def _session_get(self, name: str, default=None):
         """Return session value for given key"""
         raise NotImplementedError("Implement in subclass")
 
-    def session_set(self, name: str, value):
+    def _session_set(self, name: str, value):
         """Set session value for given key"""
         raise NotImplementedError("Implement in subclass")
 
-    def session_pop(self, name: str):
+    def _session_pop(self, name: str):
         """Pop session value for given key"""
         raise NotImplementedError("Implement in subclass")
 
@@ -191,3 +191,9 @@ class LoginActionTest(BaseActionTest):
         )
         redirect = self.do_login(after_complete_checks=False)
         self.assertEqual(redirect.url, "/error")
+
+
+class BufferedSessionLoginActionTest(LoginActionTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.strategy.set_settings({"SOCIAL_AUTH_BUFFER_SESSION_WRITES": True})
@@ -5,6 +5,7 @@ import responses
 from openid import fetchers
 from openid.fetchers import HTTPResponse
 
+from social_core.backends.open_id import DISCOVERY_CACHE
 from social_core.backends.utils import load_backends
 from social_core.tests.models import (
     TestAssociation,
@@ -76,6 +77,7 @@ class OpenIdTest(BaseBackendTest):
 
     def setUp(self) -> None:
         responses.start()
+        DISCOVERY_CACHE.clear()
         self.openid_fetcher = OpenIdTestFetcher()
         self._default_openid_fetcher = fetchers.getDefaultFetcher()
         fetchers.setDefaultFetcher(self.openid_fetcher)
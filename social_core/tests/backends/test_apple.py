@@ -89,6 +89,18 @@ class AppleIdTest(OAuth2Test, BaseAuthUrlTestMixin):
         assert decode_mock.called
         assert decode_mock.call_args[0] == (self.id_token,)
 
+    def test_signed_state_form_post(self) -> None:
+        self.strategy.set_settings({f"SOCIAL_AUTH_{self.name}_SIGNED_STATE": True})
+        with patch(
+            f"{self.backend_path}.decode_id_token",
+            return_value=token_data,
+        ):
+            self.do_login()
+        # Apple posts the callback cross-site, a Lax cookie wouldn't be sent
+        cookie = f"{self.backend.name}_state"
+        self.assertEqual(self.strategy._cookies_same_site[cookie], "None")  # noqa: SLF001
+        self.assertIsNone(self.strategy.cookie_get(cookie))
+
     def test_partial_pipeline(self) -> None:
         with patch(
             f"{self.backend_path}.decode_id_token",
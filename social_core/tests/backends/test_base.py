@@ -1,14 +1,49 @@
 from __future__ import annotations
 
-from social_core.backends.base import BaseAuth
+import json
+import threading
+import time
+from concurrent.futures import wait
+from typing import cast
+from unittest.mock import patch
+
+import pytest
+import requests
+import responses
+
+from social_core.backends.base import (
+    REVALIDATION_CACHE,
+    BaseAuth,
+    compile_extra_data,
+)
+from social_core.backends.oauth import BaseOAuth2
+from social_core.backends.open_id_connect import OpenIdConnectAuth
+from social_core.exceptions import (
+    AuthConnectionError,
+    AuthFlowDeadlineExceeded,
+    AuthResponseTooLarge,
+    AuthUnknownError,
+    AuthUnreachableProvider,
+)
 from social_core.tests.models import TestStorage
 from social_core.tests.strategy import TestStrategy
+from social_core.utils import (
+    REQUEST_LATENCIES,
+    circuit_breaker_states,
+    reset_circuit_breakers,
+)
 
 
 class ExampleAuth(BaseAuth):
     name = "example"
 
 
+class ExampleOAuth2(BaseOAuth2):
+    name = "example"
+    ACCESS_TOKEN_URL = "https://idp.example.com/token"
+    ACCESS_TOKEN_METHOD = "GET"
+
+
 def get_backend(settings, request_data=None):
     strategy = TestStrategy(TestStorage)
     backend = ExampleAuth(strategy)
@@ -78,3 +113,448 @@ def test_auth_extra_arguments_request_only_keys_are_not_added() -> None:
     )
 
     assert backend.auth_extra_arguments() == {"prompt": "select_account"}
+
+
+def test_extra_data_plan_combines_class_and_setting() -> None:
+    backend = get_backend(
+        {"SOCIAL_AUTH_EXAMPLE_EXTRA_DATA": [["name"], ["email", "mail"]]}
+    )
+    backend.EXTRA_DATA = ["id", ("token", "access", True)]
+
+    assert backend.extra_data_plan() == (
+        ("id", "id", False),
+        ("token", "access", True),
+        ("name", "name", False),
+        ("email", "mail", False),
+    )
+    assert backend.extra_data_plan() is backend.extra_data_plan()
+    extra_data = backend.extra_data(
+        None, "1", {"id": 1, "name": "Foo", "token": ""}, {"email": "foo@bar.com"}, {}
+    )
+    extra_data.pop("auth_time")
+    assert extra_data == {"id": 1, "name": "Foo", "mail": "foo@bar.com"}
+
+
+def test_extra_data_plan_compiled_once() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_EXTRA_DATA": ["name"]})
+
+    with patch(
+        "social_core.backends.base.compile_extra_data", wraps=compile_extra_data
+    ) as compile_plan:
+        plan = backend.extra_data_plan()
+        assert backend.extra_data_plan() is plan
+        assert compile_plan.call_count == 1
+
+        cast("TestStrategy", backend.strategy).set_settings(
+            {"SOCIAL_AUTH_EXAMPLE_EXTRA_DATA": ["email"]}
+        )
+        assert backend.extra_data_plan() == (("email", "email", False),)
+        assert compile_plan.call_count == 2
+
+
+def test_email_allowlist_compiled_once() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_WHITELISTED_DOMAINS": ["bar.com"]})
+
+    allowlist = backend.email_allowlist()
+    assert backend.email_allowlist() is allowlist
+    assert backend.auth_allowed({}, {"email": "foo@bar.com"})
+
+    cast("TestStrategy", backend.strategy).set_settings(
+        {"SOCIAL_AUTH_EXAMPLE_WHITELISTED_EMAILS": ["foo@example.com"]}
+    )
+    assert backend.email_allowlist() is not allowlist
+    assert backend.auth_allowed({}, {"email": "foo@example.com"})
+
+
+def test_extra_data_plan_invalid_entry() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_EXTRA_DATA": [("a", "b", True, 1)]})
+
+    with pytest.raises(AuthUnknownError, match="Invalid EXTRA_DATA item"):
+        backend.extra_data_plan()
+
+
+BREAKER_SETTINGS = {
+    "SOCIAL_AUTH_EXAMPLE_CIRCUIT_BREAKER": True,
+    "SOCIAL_AUTH_EXAMPLE_CIRCUIT_BREAKER_MIN_REQUESTS": 2,
+    "SOCIAL_AUTH_EXAMPLE_CIRCUIT_BREAKER_RESET_TIMEOUT": 30,
+}
+
+
+@responses.activate
+def test_circuit_breaker_opens_and_recovers() -> None:
+    reset_circuit_breakers()
+    backend = get_backend(BREAKER_SETTINGS)
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, status=503)
+    responses.add(
+        responses.GET, url, body=requests.ConnectionError("Connection refused")
+    )
+    responses.add(responses.GET, url, json={"id": 1})
+
+    with patch("time.monotonic", return_value=100):
+        with pytest.raises(requests.HTTPError):
+            backend.request(url)
+        with pytest.raises(AuthConnectionError):
+            backend.request(url)
+        assert circuit_breaker_states()["example:idp.example.com"] == {
+            "state": "open",
+            "requests": 2,
+            "failures": 2,
+            "opened_at": 100,
+        }
+        with pytest.raises(AuthUnreachableProvider):
+            backend.request(url)
+        # Other hosts are not affected
+        responses.add(responses.GET, "https://api.example.com/", json={})
+        assert backend.get_json("https://api.example.com/") == {}
+    assert len(responses.calls) == 3
+
+    with patch("time.monotonic", return_value=131):
+        assert backend.get_json(url) == {"id": 1}
+    assert circuit_breaker_states()["example:idp.example.com"]["state"] == "closed"
+    reset_circuit_breakers()
+
+
+@responses.activate
+def test_circuit_breaker_failed_probe_reopens() -> None:
+    reset_circuit_breakers()
+    backend = get_backend(BREAKER_SETTINGS)
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, status=500)
+
+    with patch("time.monotonic", return_value=100):
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                backend.request(url)
+    with patch("time.monotonic", return_value=131):
+        with pytest.raises(requests.HTTPError):
+            backend.request(url)
+        with pytest.raises(AuthUnreachableProvider):
+            backend.request(url)
+    assert circuit_breaker_states()["example:idp.example.com"]["state"] == "open"
+    reset_circuit_breakers()
+
+
+@responses.activate
+def test_circuit_breaker_ignores_client_errors() -> None:
+    reset_circuit_breakers()
+    backend = get_backend(BREAKER_SETTINGS)
+    url = "https://idp.example.com/token"
+    responses.add(responses.POST, url, status=400)
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            backend.request(url, method="POST")
+    assert circuit_breaker_states()["example:idp.example.com"]["state"] == "closed"
+    reset_circuit_breakers()
+
+
+@responses.activate
+def test_circuit_breaker_disabled_by_default() -> None:
+    reset_circuit_breakers()
+    backend = get_backend({})
+    assert backend.circuit_breaker("https://idp.example.com/") is None
+
+
+@responses.activate
+def test_flow_deadline_shrinks_timeouts() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_FLOW_DEADLINE": 8})
+    url = "https://idp.example.com/jwks"
+    responses.add(responses.GET, url, json={})
+
+    now = [100.0]
+    with (
+        patch("time.monotonic", side_effect=lambda: now[0]),
+        patch("requests.request", wraps=requests.request) as request,
+        backend.flow_deadline_scope(),
+    ):
+        now[0] = 105
+        backend.request(url)
+        assert request.call_args.kwargs["timeout"] == 3
+        now[0] = 101
+        backend.request(url, timeout=2)
+        assert request.call_args.kwargs["timeout"] == 2
+        now[0] = 108
+        with pytest.raises(AuthFlowDeadlineExceeded):
+            backend.request(url)
+    assert backend.remaining_flow_time() is None
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_flow_deadline_timeout() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_FLOW_DEADLINE": 1})
+    url = "https://idp.example.com/token"
+    responses.add(responses.POST, url, body=requests.ReadTimeout("Read timed out"))
+    responses.add(responses.POST, url, body=requests.ConnectTimeout("Timed out"))
+
+    with backend.flow_deadline_scope(), pytest.raises(AuthFlowDeadlineExceeded):
+        backend.request(url, method="POST")
+    backend = get_backend({})
+    with pytest.raises(AuthConnectionError):
+        backend.request(url, method="POST")
+
+
+@responses.activate
+def test_flow_deadline_only_bounds_flows() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_FLOW_DEADLINE": 8})
+    url = "https://idp.example.com/jwks"
+    responses.add(responses.GET, url, json={})
+
+    # A reused backend instance isn't bound by a budget outside of a flow
+    with patch("time.monotonic", return_value=100):
+        backend.request(url)
+    with patch("time.monotonic", return_value=200):
+        backend.request(url)
+    assert backend.remaining_flow_time() is None
+
+    with patch("time.monotonic", return_value=300):
+        with backend.flow_deadline_scope():
+            assert backend.remaining_flow_time() == 8
+            with backend.flow_deadline_scope():
+                assert backend.remaining_flow_time() == 8
+            assert backend.remaining_flow_time() == 8
+        assert backend.remaining_flow_time() is None
+
+
+def test_flow_deadline_disabled_by_default() -> None:
+    backend = get_backend({})
+    with backend.flow_deadline_scope():
+        assert backend.remaining_flow_time() is None
+
+
+RETRY_SETTINGS = {"SOCIAL_AUTH_EXAMPLE_REQUEST_RETRIES": 2}
+
+
+@responses.activate
+@patch("time.sleep")
+def test_retries_idempotent_requests(sleep) -> None:
+    backend = get_backend(RETRY_SETTINGS)
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, status=503)
+    responses.add(responses.GET, url, body=requests.ConnectionError("Connection reset"))
+    responses.add(responses.GET, url, json={"id": 1})
+
+    assert backend.get_json(url) == {"id": 1}
+    assert len(responses.calls) == 3
+    assert sleep.call_count == 2
+    assert 0 <= sleep.call_args_list[1].args[0] <= 0.2
+
+
+@responses.activate
+@patch("time.sleep")
+def test_retries_exhausted(sleep) -> None:
+    backend = get_backend(RETRY_SETTINGS)
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, status=502)
+
+    with pytest.raises(requests.HTTPError):
+        backend.request(url)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+@patch("time.sleep")
+def test_retries_skip_unsafe_requests(sleep) -> None:
+    strategy = TestStrategy(TestStorage)
+    strategy.set_settings(RETRY_SETTINGS)
+    backend = ExampleOAuth2(strategy)
+    responses.add(responses.POST, "https://idp.example.com/userinfo", status=503)
+    responses.add(responses.GET, "https://idp.example.com/token", status=503)
+
+    with pytest.raises(requests.HTTPError):
+        backend.request("https://idp.example.com/userinfo", method="POST")
+    with pytest.raises(requests.HTTPError):
+        backend.request_access_token(
+            backend.access_token_url(), params={"code": "foobar"}
+        )
+    assert len(responses.calls) == 2
+    sleep.assert_not_called()
+
+
+@responses.activate
+@patch("time.sleep")
+def test_retries_do_not_resolve_discovered_token_url(sleep) -> None:
+    class ExampleOpenIdConnect(OpenIdConnectAuth):
+        name = "example"
+        OIDC_ENDPOINT = "https://idp.example.com"
+
+    strategy = TestStrategy(TestStorage)
+    strategy.set_settings(RETRY_SETTINGS)
+    backend = ExampleOpenIdConnect(strategy)
+    config_url = "https://idp.example.com/.well-known/openid-configuration"
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, config_url, status=503)
+    responses.add(responses.GET, url, status=503)
+
+    with pytest.raises(requests.HTTPError):
+        backend.request(url)
+    assert [call.request.url for call in responses.calls] == [url] * 3
+
+
+@responses.activate
+@patch("time.sleep")
+def test_retries_skip_discovered_token_url(sleep) -> None:
+    class ExampleOpenIdConnect(OpenIdConnectAuth):
+        name = "example"
+        OIDC_ENDPOINT = "https://idp.example.com"
+        ACCESS_TOKEN_METHOD = "GET"
+
+    strategy = TestStrategy(TestStorage)
+    strategy.set_settings(RETRY_SETTINGS)
+    backend = ExampleOpenIdConnect(strategy)
+    token_url = "https://idp.example.com/token"
+    responses.add(
+        responses.GET,
+        "https://idp.example.com/.well-known/openid-configuration",
+        json={"token_endpoint": token_url},
+    )
+    responses.add(responses.GET, token_url, status=503)
+
+    with pytest.raises(requests.HTTPError):
+        backend.request_access_token(
+            backend.access_token_url(), method="GET", params={"code": "foobar"}
+        )
+    token_calls = [
+        call for call in responses.calls if call.request.path_url.startswith("/token")
+    ]
+    assert len(token_calls) == 1
+    sleep.assert_not_called()
+
+
+@responses.activate
+def test_hedged_request() -> None:
+    REQUEST_LATENCIES.clear()
+    for _ in range(20):
+        REQUEST_LATENCIES.record("example:idp.example.com", 0.01)
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_REQUEST_HEDGE_PERCENTILE": 95})
+    url = "https://idp.example.com/jwks"
+    calls = []
+    release = threading.Event()
+
+    def callback(request):
+        calls.append(request)
+        if len(calls) == 1:
+            release.wait(1)
+            return (200, {}, '{"request": "slow"}')
+        return (200, {}, '{"request": "hedged"}')
+
+    responses.add_callback(responses.GET, url, callback=callback)
+
+    start = time.monotonic()
+    assert backend.get_json(url) == {"request": "hedged"}
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+    release.set()
+    REQUEST_LATENCIES.clear()
+
+
+@responses.activate
+def test_hedged_request_prefers_success() -> None:
+    REQUEST_LATENCIES.clear()
+    for _ in range(20):
+        REQUEST_LATENCIES.record("example:idp.example.com", 0.01)
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_REQUEST_HEDGE_PERCENTILE": 95})
+    url = "https://idp.example.com/jwks"
+    calls = []
+
+    def callback(request):
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            raise requests.ConnectionError
+        return (200, {}, '{"request": "hedged"}')
+
+    def wait_all(futures, timeout=None, return_when=None):
+        if timeout is not None:
+            return wait(futures, timeout=timeout)
+        # Both attempts complete together, the failed one listed first
+        done, pending = wait(futures)
+        return sorted(done, key=lambda future: future.exception() is None), pending
+
+    responses.add_callback(responses.GET, url, callback=callback)
+
+    with patch("social_core.backends.base.wait", wait_all):
+        assert backend.get_json(url) == {"request": "hedged"}
+    assert len(calls) == 2
+    REQUEST_LATENCIES.clear()
+
+
+@responses.activate
+def test_max_response_size() -> None:
+    backend = get_backend({"SOCIAL_AUTH_EXAMPLE_REQUESTS_MAX_RESPONSE_SIZE": 1024})
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, json={"name": "x" * 2048})
+    responses.add(
+        responses.GET,
+        url,
+        body=b"x" * 2048,
+        auto_calculate_content_length=False,
+    )
+    responses.add(responses.GET, url, json={"name": "foobar"})
+
+    with pytest.raises(AuthResponseTooLarge):
+        backend.get_json(url)
+    with pytest.raises(AuthResponseTooLarge):
+        backend.request(url)
+    assert backend.get_json(url) == {"name": "foobar"}
+
+
+@responses.activate
+def test_json_loads_setting() -> None:
+    backend = get_backend(
+        {"SOCIAL_AUTH_EXAMPLE_JSON_LOADS": "social_core.tests.backends.test_base.loads"}
+    )
+    url = "https://idp.example.com/userinfo"
+    responses.add(responses.GET, url, json={"name": "foobar"})
+
+    assert backend.get_json(url) == {"name": "foobar", "loads": "bytes"}
+
+
+@responses.activate
+def test_json_loads_setting_refresh_token() -> None:
+    strategy = TestStrategy(TestStorage)
+    strategy.set_settings(
+        {"SOCIAL_AUTH_EXAMPLE_JSON_LOADS": "social_core.tests.backends.test_base.loads"}
+    )
+    backend = ExampleOAuth2(strategy)
+    responses.add(
+        responses.POST, "https://idp.example.com/token", json={"access_token": "a"}
+    )
+
+    assert backend.refresh_token("foobar") == {"access_token": "a", "loads": "bytes"}
+
+
+def loads(content):
+    data = json.loads(content)
+    data["loads"] = type(content).__name__
+    return data
+
+
+@responses.activate
+def test_get_revalidated_json() -> None:
+    REVALIDATION_CACHE.clear()
+    backend = get_backend({})
+    url = "https://idp.example.com/jwks"
+    responses.add(
+        responses.GET,
+        url,
+        json={"keys": [{"kid": "one"}]},
+        headers={"ETag": '"v1"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"},
+    )
+    responses.add(responses.GET, url, status=304, headers={"ETag": '"v1"'})
+    responses.add(responses.GET, url, json={"keys": [{"kid": "two"}]})
+
+    keys = backend.get_revalidated_json(url)
+    assert keys == {"keys": [{"kid": "one"}]}
+    assert "If-None-Match" not in responses.calls[0].request.headers
+
+    assert backend.get_revalidated_json(url) is keys
+    assert responses.calls[1].request.headers["If-None-Match"] == '"v1"'
+    assert (
+        responses.calls[1].request.headers["If-Modified-Since"]
+        == "Mon, 19 Oct 2026 10:00:00 GMT"
+    )
+
+    assert backend.get_revalidated_json(url) == {"keys": [{"kid": "two"}]}
+    REVALIDATION_CACHE.clear()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import datetime
 import json
+import time
 from typing import Any, cast
 
 import responses
@@ -9,7 +10,8 @@ import responses
 from social_core.actions import do_disconnect
 from social_core.backends.oauth import BaseOAuth2
 from social_core.exceptions import AuthForbidden
-from social_core.tests.models import User
+from social_core.tests.models import TestUserSocialAuth, User
+from social_core.tokens import revoke_access_tokens
 
 from .oauth import BaseAuthUrlTestMixin, OAuth2Test
 
@@ -81,6 +83,80 @@ class DummyOAuth2Test(OAuth2Test, BaseAuthUrlTestMixin):
         )
         do_disconnect(self.backend, user)
 
+    def test_revoke_token_parallel(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_REVOKE_TOKENS_ON_DISCONNECT": True,
+                "SOCIAL_AUTH_REVOKE_TOKENS_PARALLEL": True,
+            }
+        )
+        self.do_login()
+        user = cast("User", User.get(self.expected_username))
+        user.password = "password"
+        responses.add(
+            self._method(self.backend.REVOKE_TOKEN_METHOD),
+            self.backend.REVOKE_TOKEN_URL,
+            status=500,
+        )
+        do_disconnect(self.backend, user)
+        # Failed revocations do not prevent the disconnection
+        self.assertEqual(user.social, [])
+        self.assertTrue(
+            cast("str", responses.calls[-1].request.url).startswith(
+                self.backend.REVOKE_TOKEN_URL
+            )
+        )
+
+    def test_revoke_tokens_reuse_backend(self) -> None:
+        self.strategy.set_settings({"SOCIAL_AUTH_DUMMY_FLOW_DEADLINE": 0.2})
+        user = self.do_login()
+        first = user.social[0]
+        second = TestUserSocialAuth(
+            user, first.provider, "other", extra_data={"access_token": "other"}
+        )
+
+        def slow_revoke(request):
+            time.sleep(0.15)
+            return (200, {}, "")
+
+        responses.add_callback(
+            self._method(self.backend.REVOKE_TOKEN_METHOD),
+            self.backend.REVOKE_TOKEN_URL,
+            callback=slow_revoke,
+        )
+        # Both revocations share one backend instance, the flow budget
+        # doesn't apply outside of a login flow
+        results = revoke_access_tokens(self.strategy, [first, second], max_workers=1)
+
+        self.assertEqual([result.error for result in results], [None, None])
+
+
+class UserDataEndpointsTest(DummyOAuth2Test):
+    def test_endpoints_run_concurrently(self) -> None:
+        def slow(value: str):
+            def call() -> str:
+                time.sleep(0.1)
+                return value
+
+            return call
+
+        start = time.monotonic()
+        results = self.backend.fetch_user_data_endpoints(
+            {"first": slow("a"), "second": slow("b"), "third": slow("c")}
+        )
+
+        self.assertLess(time.monotonic() - start, 0.25)
+        self.assertEqual(
+            list(results.items()), [("first", "a"), ("second", "b"), ("third", "c")]
+        )
+
+    def test_endpoint_errors_are_raised(self) -> None:
+        def fail() -> None:
+            raise ValueError("Failed")
+
+        with self.assertRaises(ValueError):
+            self.backend.fetch_user_data_endpoints({"ok": lambda: 1, "failed": fail})
+
 
 class WhitelistEmailsTest(DummyOAuth2Test):
     def test_valid_login(self) -> None:
@@ -111,6 +187,11 @@ class WhitelistDomainsTest(DummyOAuth2Test):
         with self.assertRaises(AuthForbidden):
             self.do_login()
 
+    def test_wildcard_does_not_match_domain(self) -> None:
+        self.strategy.set_settings({"SOCIAL_AUTH_WHITELISTED_DOMAINS": ["*.bar.com"]})
+        with self.assertRaises(AuthForbidden):
+            self.do_login()
+
 
 DELTA = datetime.timedelta(days=1)
 
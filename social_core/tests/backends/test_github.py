@@ -1,10 +1,14 @@
 import json
-from typing import Any
+from typing import Any, cast
 from unittest import TestCase
+from unittest.mock import patch
 
 import responses
 
+from social_core.backends.github import MEMBERSHIP_CACHE
+from social_core.backends.oauth import TOKEN_USER_CACHE
 from social_core.exceptions import AuthFailed
+from social_core.tests.models import TestUserSocialAuth
 
 from .oauth import BaseAuthUrlTestMixin, OAuth2Test
 
@@ -182,6 +186,12 @@ class GithubOAuth2NoEmailTest(GithubOAuth2Test):
         self.add_emails_response([], status=403)
         self.do_login()
 
+    def test_login_email_denied_leaves_emails_unset(self) -> None:
+        self.add_emails_response([], status=403)
+        self.capture_emails_in_pipeline()
+        self.do_login()
+        self.assertIsNone(self.strategy.session_get("github_emails"))
+
     def test_login_with_empty_email_list(self) -> None:
         self.add_emails_response([])
         user = self.do_login()
@@ -215,7 +225,58 @@ class GithubOAuth2NoEmailTest(GithubOAuth2Test):
         self.do_refresh_token()
 
 
-class GithubOrganizationOAuth2Test(GithubOAuth2Test):
+class GithubOAuth2EmailScopeTest(GithubOAuth2NoEmailTest):
+    def extra_settings(self):
+        settings = super().extra_settings()
+        settings["SOCIAL_AUTH_GITHUB_SCOPE"] = ["user:email"]
+        return settings
+
+    def test_emails_fetched_with_user(self) -> None:
+        self.add_emails_response([{"email": "foo@bar.com"}])
+        with patch.object(
+            self.backend,
+            "fetch_user_data_endpoints",
+            wraps=self.backend.fetch_user_data_endpoints,
+        ) as fetch:
+            user = self.do_login()
+        self.assertEqual(list(fetch.call_args.args[0]), ["user", "emails"])
+        self.assertEqual(user.email, "foo@bar.com")
+
+
+class GithubMembershipCacheMixin:
+    member_url = "https://api.github.com/orgs/foobar/members/foobar"
+
+    def assert_membership_requests(self, status: int, count: int) -> None:
+        case = cast("GithubOAuth2Test", self)
+        MEMBERSHIP_CACHE.clear()
+        case.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_GITHUB_ORG_NAME": "foobar",
+                "SOCIAL_AUTH_GITHUB_ORG_MEMBERSHIP_CACHE_TTL": 3600,
+            }
+        )
+        responses.add(responses.GET, case.user_data_url, body=case.user_data_body)
+        responses.add(responses.GET, self.member_url, status=status)
+
+        for _ in range(2):
+            try:
+                case.backend.user_data("foobar")
+            except AuthFailed:
+                case.assertEqual(status, 404)
+
+        case.assertEqual(
+            len(
+                [
+                    call
+                    for call in responses.calls
+                    if call.request.url == self.member_url
+                ]
+            ),
+            count,
+        )
+
+
+class GithubOrganizationOAuth2Test(GithubMembershipCacheMixin, GithubOAuth2Test):
     backend_path = "social_core.backends.github.GithubOrganizationOAuth2"
 
     def auth_handlers(self, start_url):
@@ -235,8 +296,11 @@ class GithubOrganizationOAuth2Test(GithubOAuth2Test):
         self.strategy.set_settings({"SOCIAL_AUTH_GITHUB_ORG_NAME": "foobar"})
         self.do_refresh_token()
 
+    def test_membership_is_cached(self) -> None:
+        self.assert_membership_requests(204, 1)
 
-class GithubOrganizationOAuth2FailTest(GithubOAuth2Test):
+
+class GithubOrganizationOAuth2FailTest(GithubMembershipCacheMixin, GithubOAuth2Test):
     backend_path = "social_core.backends.github.GithubOrganizationOAuth2"
 
     def auth_handlers(self, start_url):
@@ -265,6 +329,9 @@ class GithubOrganizationOAuth2FailTest(GithubOAuth2Test):
         with self.assertRaises(AuthFailed):
             self.do_refresh_token()
 
+    def test_non_membership_is_cached(self) -> None:
+        self.assert_membership_requests(404, 1)
+
 
 class GithubTeamOAuth2Test(GithubOAuth2Test):
     backend_path = "social_core.backends.github.GithubTeamOAuth2"
@@ -315,3 +382,52 @@ class GithubTeamOAuth2FailTest(GithubOAuth2Test):
         self.strategy.set_settings({"SOCIAL_AUTH_GITHUB_TEAM_ID": "123"})
         with self.assertRaises(AuthFailed):
             self.do_refresh_token()
+
+
+class GithubOAuth2TokenUserCacheTest(GithubOAuth2Test):
+    def setUp(self) -> None:
+        super().setUp()
+        TOKEN_USER_CACHE.clear()
+        self.strategy.set_settings({"SOCIAL_AUTH_TOKEN_USER_CACHE_TTL": 60})
+        responses.add(responses.GET, self.user_data_url, body=self.user_data_body)
+
+    def tearDown(self) -> None:
+        TOKEN_USER_CACHE.clear()
+        super().tearDown()
+
+    def user_data_calls(self) -> int:
+        return len(
+            [call for call in responses.calls if call.request.url == self.user_data_url]
+        )
+
+    def test_api_token_login_is_cached(self) -> None:
+        user = self.backend.do_auth("api-token")
+        self.assertTrue(user.is_new)
+
+        cached = self.backend.do_auth("api-token")
+        self.assertEqual(cached.id, user.id)
+        self.assertFalse(cached.is_new)
+        self.assertEqual(cached.social_user.uid, "1")
+        self.assertEqual(self.user_data_calls(), 1)
+
+        self.backend.do_auth("other-token")
+        self.assertEqual(self.user_data_calls(), 2)
+
+    def test_cache_disabled(self) -> None:
+        self.strategy.set_settings({"SOCIAL_AUTH_TOKEN_USER_CACHE_TTL": None})
+        self.backend.do_auth("api-token")
+        self.backend.do_auth("api-token")
+        self.assertEqual(self.user_data_calls(), 2)
+        self.assertEqual(len(TOKEN_USER_CACHE), 0)
+
+    def test_removed_association(self) -> None:
+        self.backend.do_auth("api-token")
+        TestUserSocialAuth.reset_cache()
+
+        user = self.backend.do_auth("api-token")
+        self.assertEqual(user.social_user.uid, "1")
+        self.assertEqual(self.user_data_calls(), 2)
+
+    def test_authorization_flow_not_cached(self) -> None:
+        self.do_login()
+        self.assertEqual(len(TOKEN_USER_CACHE), 0)
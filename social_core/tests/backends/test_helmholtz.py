@@ -171,3 +171,54 @@ class HelmholtzOpenIdConnectTest(OpenIdConnectTest, BaseAuthUrlTestMixin):
             ),
             False,
         )
+
+    def test_entitlements_subtree(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_HELMHOLTZ_ALLOWED_ENTITLEMENTS": [
+                    "urn:geant:helmholtz.de:group:HIFIS:*"
+                ]
+            }
+        )
+        self.assertTrue(
+            self.backend.entitlement_allowed(
+                ["urn:geant:helmholtz.de:group:HIFIS:Team#login.helmholtz.de"]
+            )
+        )
+        self.assertFalse(
+            self.backend.entitlement_allowed(
+                ["urn:geant:helmholtz.de:group:Helmholtz-member#login.helmholtz.de"]
+            )
+        )
+
+    def test_entitlements_ignore_authority(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_HELMHOLTZ_ALLOWED_ENTITLEMENTS": [
+                    "urn:geant:helmholtz.de:group:HIFIS#login.helmholtz.de"
+                ],
+                "SOCIAL_AUTH_HELMHOLTZ_ENTITLEMENT_IGNORE_AUTHORITY": True,
+            }
+        )
+        self.assertTrue(
+            self.backend.entitlement_allowed(
+                ["urn:geant:helmholtz.de:group:HIFIS#proxy.example.org"]
+            )
+        )
+
+    def test_entitlement_matcher_compiled_once(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_HELMHOLTZ_ALLOWED_ENTITLEMENTS": [
+                    "urn:geant:helmholtz.de:group:HIFIS#login.helmholtz.de"
+                ]
+            }
+        )
+        matcher = self.backend.entitlement_matcher()
+        self.assertIs(self.backend.entitlement_matcher(), matcher)
+
+        self.strategy.set_settings(
+            {"SOCIAL_AUTH_HELMHOLTZ_ALLOWED_ENTITLEMENTS": ["urn:other:group"]}
+        )
+        self.assertIsNot(self.backend.entitlement_matcher(), matcher)
+        self.assertTrue(self.backend.entitlement_allowed(["urn:other:group"]))
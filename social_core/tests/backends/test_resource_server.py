@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import json
+import time
+import unittest
+from typing import TYPE_CHECKING, Any, cast
+from unittest.mock import patch
+
+import jwt
+import responses
+from jwt.algorithms import RSAAlgorithm
+
+from social_core.backends.azuread import AzureADOAuth2
+from social_core.backends.keycloak import KeycloakOAuth2
+from social_core.backends.open_id_connect import OpenIdConnectAuth
+from social_core.backends.resource_server import (
+    ACCESS_TOKEN_CACHE,
+    JWKS_REFRESHES,
+    ResourceServerMixin,
+)
+from social_core.exceptions import AuthInsufficientScope, AuthTokenError
+from social_core.tests.models import TestStorage
+from social_core.tests.strategy import TestStrategy
+from social_core.utils import cache
+
+from .test_azuread_b2c import RSA_PRIVATE_JWT_KEY, RSA_PUBLIC_JWT_KEY
+from .test_keycloak import _PRIVATE_KEY, _PUBLIC_KEY_HEADERLESS
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+
+OIDC_ENDPOINT = "https://api.example.com"
+INTROSPECTION_URL = f"{OIDC_ENDPOINT}/introspect"
+JWKS_URL = f"{OIDC_ENDPOINT}/jwks"
+PRIVATE_KEY = cast(
+    "RSAPrivateKey", RSAAlgorithm.from_jwk(json.dumps(RSA_PRIVATE_JWT_KEY))
+)
+
+
+class ResourceServerOpenIdConnect(OpenIdConnectAuth):
+    name = "resource-oidc"
+    OIDC_ENDPOINT = OIDC_ENDPOINT
+
+
+class BaseResourceServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clear_caches()
+        self.strategy = TestStrategy(TestStorage)
+        responses.start()
+
+    def tearDown(self) -> None:
+        responses.stop()
+        responses.reset()
+        self.clear_caches()
+
+    def clear_caches(self) -> None:
+        ACCESS_TOKEN_CACHE.entries.clear()
+        JWKS_REFRESHES.clear()
+        for instance in cache.instances.values():
+            instance.cache.clear()
+
+    def claims(self, **overrides) -> dict[str, Any]:
+        now = int(time.time())
+        return {
+            "iss": OIDC_ENDPOINT,
+            "aud": "api",
+            "sub": "foobar",
+            "scope": "read write",
+            "iat": now,
+            "exp": now + 3600,
+            **overrides,
+        }
+
+    def encode(self, kid: str = RSA_PRIVATE_JWT_KEY["kid"], **overrides) -> str:
+        return jwt.encode(
+            self.claims(**overrides),
+            PRIVATE_KEY,
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+
+    def assert_unknown_kids_fetch_jwks_once(
+        self, backend: ResourceServerMixin, **overrides
+    ) -> None:
+        for index in range(5):
+            token = self.encode(kid=f"unknown-{index}", **overrides)
+            with self.assertRaises(AuthTokenError):
+                backend.validate_access_token(token)
+        jwks_requests = [
+            call for call in responses.calls if call.request.url == JWKS_URL
+        ]
+        # The cached key set and a single download for the unknown keys
+        self.assertEqual(len(jwks_requests), 2)
+
+
+class OpenIdConnectResourceServerTest(BaseResourceServerTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_RESOURCE_OIDC_KEY": "api",
+                "SOCIAL_AUTH_RESOURCE_OIDC_SECRET": "secret",
+            }
+        )
+        self.backend = ResourceServerOpenIdConnect(self.strategy)
+        responses.add(
+            responses.GET,
+            f"{OIDC_ENDPOINT}/.well-known/openid-configuration",
+            json={
+                "issuer": OIDC_ENDPOINT,
+                "jwks_uri": JWKS_URL,
+                "introspection_endpoint": INTROSPECTION_URL,
+            },
+        )
+        responses.add(responses.GET, JWKS_URL, json={"keys": [RSA_PUBLIC_JWT_KEY]})
+
+    def test_jwt(self) -> None:
+        token = self.encode()
+
+        claims = self.backend.validate_access_token(token, scopes=["read"])
+
+        self.assertEqual(claims["sub"], "foobar")
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_jwt_cached(self) -> None:
+        token = self.encode()
+        self.backend.validate_access_token(token)
+        calls = len(responses.calls)
+
+        with patch.object(self.backend, "decode_access_token") as decode_access_token:
+            self.assertEqual(self.backend.validate_access_token(token)["sub"], "foobar")
+        decode_access_token.assert_not_called()
+        self.assertEqual(len(responses.calls), calls)
+
+    def test_cache_disabled(self) -> None:
+        self.strategy.set_settings({"SOCIAL_AUTH_ACCESS_TOKEN_CACHE_TTL": 0})
+        token = self.encode()
+        self.backend.validate_access_token(token)
+        self.assertEqual(ACCESS_TOKEN_CACHE.entries, {})
+
+    def test_missing_scope(self) -> None:
+        token = self.encode()
+        with self.assertRaises(AuthInsufficientScope):
+            self.backend.validate_access_token(token, scopes=["read", "admin"])
+        # The token is valid, only the scope check is repeated
+        with self.assertRaises(AuthInsufficientScope):
+            self.backend.validate_access_token(token, scopes=["admin"])
+
+    def test_expired(self) -> None:
+        token = self.encode(exp=int(time.time()) - 60)
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token(token)
+
+    def test_wrong_audience(self) -> None:
+        token = self.encode(aud="other")
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token(token)
+
+    def test_configured_audience(self) -> None:
+        self.strategy.set_settings({"SOCIAL_AUTH_ACCESS_TOKEN_AUDIENCE": "other"})
+        token = self.encode(aud="other")
+        self.assertEqual(self.backend.validate_access_token(token)["aud"], "other")
+
+    def test_wrong_issuer(self) -> None:
+        token = self.encode(iss="https://evil.example.com")
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token(token)
+
+    def test_unknown_kid(self) -> None:
+        self.assert_unknown_kids_fetch_jwks_once(self.backend)
+
+    def test_wrong_signature(self) -> None:
+        token = jwt.encode(
+            self.claims(), "a-secret-long-enough-for-hs256-tokens", algorithm="HS256"
+        )
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token(token)
+
+    def test_introspection(self) -> None:
+        responses.add(
+            responses.POST,
+            INTROSPECTION_URL,
+            json={"active": True, **self.claims(scope="read")},
+        )
+
+        claims = self.backend.validate_access_token("opaque", scopes=["read"])
+        self.assertEqual(claims["sub"], "foobar")
+        self.backend.validate_access_token("opaque")
+
+        introspections = [
+            call for call in responses.calls if call.request.url == INTROSPECTION_URL
+        ]
+        self.assertEqual(len(introspections), 1)
+        self.assertEqual(
+            introspections[0].request.body, "token=opaque&token_type_hint=access_token"
+        )
+        self.assertIn("Authorization", introspections[0].request.headers)
+
+    def test_introspection_inactive(self) -> None:
+        responses.add(responses.POST, INTROSPECTION_URL, json={"active": False})
+        for _ in range(2):
+            with self.assertRaises(AuthTokenError):
+                self.backend.validate_access_token("opaque")
+        introspections = [
+            call for call in responses.calls if call.request.url == INTROSPECTION_URL
+        ]
+        self.assertEqual(len(introspections), 2)
+
+    def test_introspection_wrong_audience(self) -> None:
+        responses.add(
+            responses.POST,
+            INTROSPECTION_URL,
+            json={"active": True, **self.claims(aud="other")},
+        )
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token("opaque")
+
+    def test_introspection_wrong_client_id(self) -> None:
+        claims = self.claims(client_id="other")
+        del claims["aud"]
+        responses.add(
+            responses.POST, INTROSPECTION_URL, json={"active": True, **claims}
+        )
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token("opaque")
+
+    def test_introspection_wrong_issuer(self) -> None:
+        responses.add(
+            responses.POST,
+            INTROSPECTION_URL,
+            json={"active": True, **self.claims(iss="https://evil.example.com")},
+        )
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token("opaque")
+
+
+class AzureADResourceServerTest(BaseResourceServerTest):
+    TENANT_ID = "727406ac-7068-48fa-92b9-c2d67211bc50"
+    ISSUER = f"https://sts.windows.net/{TENANT_ID}/"
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_AZUREAD_OAUTH2_KEY": "client",
+                "SOCIAL_AUTH_AZUREAD_OAUTH2_RESOURCE": "api",
+            }
+        )
+        self.backend = AzureADOAuth2(self.strategy)
+        responses.add(
+            responses.GET,
+            self.backend.openid_configuration_url(),
+            json={
+                "issuer": "https://sts.windows.net/{tenantid}/",
+                "jwks_uri": JWKS_URL,
+            },
+        )
+        responses.add(responses.GET, JWKS_URL, json={"keys": [RSA_PUBLIC_JWT_KEY]})
+
+    def test_jwt(self) -> None:
+        token = self.encode(iss=self.ISSUER, tid=self.TENANT_ID, scp="read")
+        claims = self.backend.validate_access_token(token, scopes=["read"])
+        self.assertEqual(claims["sub"], "foobar")
+
+    def test_unknown_kid(self) -> None:
+        self.assert_unknown_kids_fetch_jwks_once(
+            self.backend, iss=self.ISSUER, tid=self.TENANT_ID
+        )
+
+    def test_wrong_tenant(self) -> None:
+        token = self.encode(iss=self.ISSUER, tid="other")
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token(token)
+
+    def test_opaque_without_introspection(self) -> None:
+        with self.assertRaises(AuthTokenError):
+            self.backend.validate_access_token("opaque")
+
+
+class KeycloakResourceServerTest(BaseResourceServerTest):
+    ACCESS_TOKEN_URL = (
+        "https://sso.example.com/auth/realms/example/protocol/openid-connect/token"
+    )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_KEYCLOAK_KEY": "api",
+                "SOCIAL_AUTH_KEYCLOAK_SECRET": "secret",
+                "SOCIAL_AUTH_KEYCLOAK_PUBLIC_KEY": _PUBLIC_KEY_HEADERLESS,
+                "SOCIAL_AUTH_KEYCLOAK_ACCESS_TOKEN_URL": self.ACCESS_TOKEN_URL,
+            }
+        )
+        self.backend = KeycloakOAuth2(self.strategy)
+
+    def test_jwt(self) -> None:
+        token = jwt.encode(self.claims(), _PRIVATE_KEY, algorithm="RS256")
+        claims = self.backend.validate_access_token(token, scopes=["write"])
+        self.assertEqual(claims["sub"], "foobar")
+        self.assertEqual(len(responses.calls), 0)
+
+    def test_introspection(self) -> None:
+        responses.add(
+            responses.POST,
+            f"{self.ACCESS_TOKEN_URL}/introspect",
+            json={"active": True, "sub": "foobar", "exp": int(time.time()) + 60},
+        )
+        claims = self.backend.validate_access_token("opaque")
+        self.assertEqual(claims["sub"], "foobar")
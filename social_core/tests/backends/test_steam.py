@@ -1,9 +1,11 @@
 import datetime
 import json
-from urllib.parse import parse_qsl, urlencode, urlsplit
+from unittest.mock import patch
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit
 
 import responses
 
+from social_core.backends.steam import PLAYER_SUMMARIES_CACHE
 from social_core.exceptions import AuthFailed
 
 from .open_id import OpenIdTest
@@ -88,6 +90,10 @@ class SteamOpenIdTest(OpenIdTest):
         }
     )
 
+    def setUp(self) -> None:
+        super().setUp()
+        PLAYER_SUMMARIES_CACHE.clear()
+
     def _login_setup(self, user_url=None) -> None:
         self.strategy.set_settings({"SOCIAL_AUTH_STEAM_API_KEY": "123abc"})
         user_url = user_url or "https://steamcommunity.com/openid/id/123"
@@ -123,6 +129,54 @@ class SteamOpenIdTest(OpenIdTest):
         self._login_setup()
         self.do_partial_pipeline()
 
+    def test_player_summaries_batches(self) -> None:
+        steamids = [str(index) for index in range(150)]
+
+        def players(request):
+            ids = parse_qs(urlsplit(request.url).query)["steamids"][0].split(",")
+            body = {"response": {"players": [{"steamid": i} for i in ids[:-1]]}}
+            return 200, {}, json.dumps(body)
+
+        responses.add_callback(responses.GET, INFO_URL, callback=players)
+
+        summaries = self.backend.get_player_summaries([*steamids, "0"])
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(summaries), 148)
+        self.assertNotIn("99", summaries)
+        self.assertEqual(
+            self.backend.get_player_summaries(["0", "1"]),
+            {
+                "0": {"steamid": "0"},
+                "1": {"steamid": "1"},
+            },
+        )
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_discovery_is_cached(self) -> None:
+        url = self.openid_url()
+        self.add_openid_response(
+            "GET", url, body=self.discovery_body, content_type="application/xrds+xml"
+        )
+        result = self.backend.discover(url)
+        self.openid_fetcher._responses.clear()  # noqa: SLF001
+
+        other = type(self.backend)(self.strategy, redirect_uri=self.complete_url)
+        self.assertIs(other.discover(url), result)
+
+    def test_start_sets_up_request_once(self) -> None:
+        self.add_openid_response(
+            "GET",
+            self.openid_url(),
+            body=self.discovery_body,
+            content_type="application/xrds+xml",
+        )
+        with patch.object(
+            self.backend, "setup_request", wraps=self.backend.setup_request
+        ) as setup_request:
+            self.backend.start()
+        setup_request.assert_called_once()
+
 
 class SteamOpenIdMissingSteamIdTest(SteamOpenIdTest):
     server_response = urlencode(
@@ -1,6 +1,11 @@
 import json
+import time
 from urllib.parse import urlencode
 
+import responses
+
+from social_core.exceptions import AuthTokenError
+
 from .oauth import OAuth1AuthUrlTestMixin, OAuth1Test
 
 
@@ -124,6 +129,47 @@ class TwitterOAuth1Test(OAuth1Test, OAuth1AuthUrlTestMixin):
     def test_partial_pipeline(self) -> None:
         self.do_partial_pipeline()
 
+    def test_unauthorized_tokens_limit(self) -> None:
+        self.strategy.set_settings(
+            {f"SOCIAL_AUTH_{self.name}_UNAUTHORIZED_TOKENS_LIMIT": 2}
+        )
+        for index in range(3):
+            responses.add(
+                responses.POST,
+                self.backend.REQUEST_TOKEN_URL,
+                body=urlencode({"oauth_token": f"token{index}"}),
+            )
+            self.backend.set_unauthorized_token()
+
+        tokens = self.strategy.session_get(self.unauthorized_token_name)
+        assert tokens is not None
+        self.assertEqual(list(tokens), ["token1", "token2"])
+
+    def test_legacy_unauthorized_tokens(self) -> None:
+        self.strategy.session_set(
+            self.unauthorized_token_name, [self.request_token_body]
+        )
+        self.strategy.set_request_data({"oauth_token": "foobar"}, self.backend)
+
+        token = self.backend.get_unauthorized_token()
+
+        self.assertEqual(token["oauth_token_secret"], "foobar-secret")
+        self.assertEqual(self.strategy.session_get(self.unauthorized_token_name), {})
+
+    def test_expired_unauthorized_token(self) -> None:
+        self.strategy.session_set(
+            self.unauthorized_token_name,
+            {"foobar": [int(time.time()) - 7200, self.request_token_body]},
+        )
+        self.strategy.set_request_data({"oauth_token": "foobar"}, self.backend)
+
+        with self.assertRaises(AuthTokenError):
+            self.backend.get_unauthorized_token()
+
+    @property
+    def unauthorized_token_name(self) -> str:
+        return self.backend.name + self.backend.UNATHORIZED_TOKEN_SUFIX
+
 
 class TwitterOAuth1IncludeEmailTest(OAuth1Test, OAuth1AuthUrlTestMixin):
     backend_path = "social_core.backends.twitter.TwitterOAuth"
@@ -1,7 +1,11 @@
 import json
 from abc import ABC
+from typing import cast
 
-from social_core.exceptions import AuthException
+from social_core.backends.oauth import SIGNED_STATE_CACHE
+from social_core.backends.twitter_oauth2 import TwitterOAuth2
+from social_core.exceptions import AuthException, AuthStateForbidden, AuthStateMissing
+from social_core.utils import get_querystring
 
 from .oauth import (
     BaseAuthUrlTestMixin,
@@ -181,3 +185,80 @@ class TwitterOAuth2TestInvalidCodeChallengeMethod(
 
         with self.assertRaises(AuthException):
             self.do_login()
+
+
+class TwitterOAuth2TestSignedState(TwitterOAuth2Mixin, OAuth2PkceS256Test):
+    def setUp(self) -> None:
+        super().setUp()
+        SIGNED_STATE_CACHE.clear()
+        self.strategy.set_settings({f"SOCIAL_AUTH_{self.name}_SIGNED_STATE": True})
+
+    def do_login(self):
+        user = super().do_login()
+        self.assertIsNone(self.strategy.session_get(f"{self.backend.name}_state"))
+        self.assertIsNone(
+            self.strategy.session_get(f"{self.backend.name}_code_verifier")
+        )
+        # The state cookie is used up
+        self.assertIsNone(self.strategy.cookie_get(f"{self.backend.name}_state"))
+        self.assertEqual(
+            self.strategy._cookies_same_site[f"{self.backend.name}_state"],  # noqa: SLF001
+            "Lax",
+        )
+        return user
+
+    def start(self) -> str:
+        """Start a login in the test browser, return the state parameter"""
+        url = self.backend.start().url
+        return get_querystring(url)["state"]
+
+    def complete_with(self, state: str) -> TwitterOAuth2:
+        """Validate the state with a new backend instance, as a callback
+        request would"""
+        backend = TwitterOAuth2(self.strategy, redirect_uri=self.complete_url)
+        self.strategy.set_request_data({"code": "foobar", "state": state}, backend)
+        backend.validate_state()
+        return backend
+
+    def test_code_verifier_not_in_urls(self) -> None:
+        url = self.backend.start().url
+        code_verifier = cast("dict", self.backend.state_data)["code_verifier"]
+
+        self.assertNotIn(code_verifier, url)
+        cookie = cast("str", self.strategy.cookie_get(f"{self.backend.name}_state"))
+        self.assertNotIn(code_verifier, cookie)
+        backend = self.complete_with(get_querystring(url)["state"])
+        self.assertEqual(backend.get_code_verifier(), code_verifier)
+
+    def test_complete_rejects_tampered_state(self) -> None:
+        state = self.start()
+
+        with self.assertRaises(AuthStateForbidden):
+            self.complete_with(state[:-4] + "AAAA")
+
+    def test_complete_requires_state_cookie(self) -> None:
+        # The callback URL is opened in another browser
+        state = self.start()
+        self.strategy._cookies.clear()  # noqa: SLF001
+
+        with self.assertRaises(AuthStateMissing):
+            self.complete_with(state)
+
+    def test_complete_rejects_state_of_other_browser(self) -> None:
+        attacker_state = self.start()
+        # The victim holds the cookie of their own login
+        self.backend = TwitterOAuth2(self.strategy, redirect_uri=self.complete_url)
+        self.start()
+
+        with self.assertRaises(AuthStateForbidden):
+            self.complete_with(attacker_state)
+
+    def test_state_is_single_use(self) -> None:
+        state = self.start()
+        cookies = dict(self.strategy._cookies)  # noqa: SLF001
+        self.complete_with(state)
+
+        # Replaying the callback, even with the cookie, is refused
+        self.strategy._cookies.update(cookies)  # noqa: SLF001
+        with self.assertRaises(AuthStateForbidden):
+            self.complete_with(state)
@@ -0,0 +1,462 @@
+"""End-to-end login throughput benchmark
+
+Complete logins (do_auth, the provider authorization page and do_complete
+with the default pipeline) run against the local FakeIdentityProvider at the
+given concurrency, using the TestStrategy and TestStorage doubles:
+
+    python -m social_core.tests.benchmark --logins 500 --concurrency 8
+
+Reported per backend: logins per second, latency percentiles, provider calls
+per login (server to server requests, the pages visited by the browser are
+not counted) and the peak and retained memory allocated per login, measured
+with tracemalloc on separate sequential logins. The provider runs in the same
+interpreter unless --idp-url points to one started with
+``python -m social_core.tests.fake_idp``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import math
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, cast
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from cryptography.hazmat.primitives import serialization
+
+from social_core.actions import do_auth, do_complete
+from social_core.backends.oauth import BaseOAuth1
+from social_core.tests.fake_idp import (
+    SAML_MODULE_ENABLED,
+    FakeIdentityProvider,
+    generate_key_pair,
+)
+from social_core.tests.models import (
+    TestAssociation,
+    TestNonce,
+    TestStorage,
+    TestUserSocialAuth,
+    User,
+)
+from social_core.tests.strategy import TEST_URI, TestStrategy
+from social_core.utils import cache, module_member
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+CLIENT_ID = "benchmark-client"
+CLIENT_SECRET = "benchmark-secret"
+REQUEST_TIMEOUT = 30
+BROWSER_PATHS = frozenset(("/oauth2/authorize", "/oauth1/authorize", "/saml/sso"))
+FORM_INPUT_RE = re.compile(r'<input type="hidden" name="([^"]+)" value="([^"]*)"')
+CERTIFICATE_RE = re.compile(r"<ds:X509Certificate>([^<]+)</ds:X509Certificate>")
+
+
+class FakeOAuth1(BaseOAuth1):
+    """OAuth 1.0a backend for the fake identity provider"""
+
+    name = "fake-oauth1"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.REQUEST_TOKEN_URL = cast("str", self.setting("REQUEST_TOKEN_URL"))
+
+    def get_user_details(self, response):
+        return {
+            "username": response["username"],
+            "email": response["email"],
+            "fullname": response["name"],
+        }
+
+    def user_data(self, access_token: dict, *args, **kwargs) -> dict[str, Any] | None:
+        return self.get_json(
+            cast("str", self.setting("USER_DATA_URL")),
+            auth=self.oauth_auth(access_token),
+        )
+
+
+class BenchmarkStrategy(TestStrategy):
+    """TestStrategy serving requests on the completion path, the SAML
+    response destination is checked against it"""
+
+    def __init__(self, storage, path: str) -> None:
+        super().__init__(storage)
+        self.path = path
+
+    def request_path(self) -> str:
+        return self.path
+
+
+def oauth2_settings(prefix: str, idp_url: str) -> dict[str, Any]:
+    return {
+        f"SOCIAL_AUTH_{prefix}_KEY": CLIENT_ID,
+        f"SOCIAL_AUTH_{prefix}_SECRET": CLIENT_SECRET,
+        f"SOCIAL_AUTH_{prefix}_AUTHORIZATION_URL": f"{idp_url}/oauth2/authorize",
+        f"SOCIAL_AUTH_{prefix}_ACCESS_TOKEN_URL": f"{idp_url}/oauth2/token",
+    }
+
+
+def github_settings(idp_url: str) -> dict[str, Any]:
+    return {
+        **oauth2_settings("GITHUB", idp_url),
+        "SOCIAL_AUTH_GITHUB_API_URL": f"{idp_url}/github/",
+    }
+
+
+def google_settings(idp_url: str) -> dict[str, Any]:
+    return {
+        **oauth2_settings("GOOGLE_OAUTH2", idp_url),
+        "SOCIAL_AUTH_GOOGLE_OAUTH2_USER_DATA_URL": f"{idp_url}/oauth2/userinfo",
+    }
+
+
+def oidc_settings(idp_url: str) -> dict[str, Any]:
+    return {
+        "SOCIAL_AUTH_OIDC_KEY": CLIENT_ID,
+        "SOCIAL_AUTH_OIDC_SECRET": CLIENT_SECRET,
+        "SOCIAL_AUTH_OIDC_OIDC_ENDPOINT": idp_url,
+    }
+
+
+def azuread_settings(idp_url: str) -> dict[str, Any]:
+    return {
+        **oauth2_settings("AZUREAD_OAUTH2", idp_url),
+        "SOCIAL_AUTH_AZUREAD_OAUTH2_OPENID_CONFIGURATION_URL": (
+            f"{idp_url}/.well-known/openid-configuration"
+        ),
+    }
+
+
+def oauth1_settings(idp_url: str) -> dict[str, Any]:
+    return {
+        "SOCIAL_AUTH_FAKE_OAUTH1_KEY": CLIENT_ID,
+        "SOCIAL_AUTH_FAKE_OAUTH1_SECRET": CLIENT_SECRET,
+        "SOCIAL_AUTH_FAKE_OAUTH1_REQUEST_TOKEN_URL": f"{idp_url}/oauth1/request_token",
+        "SOCIAL_AUTH_FAKE_OAUTH1_AUTHORIZATION_URL": f"{idp_url}/oauth1/authorize",
+        "SOCIAL_AUTH_FAKE_OAUTH1_ACCESS_TOKEN_URL": f"{idp_url}/oauth1/access_token",
+        "SOCIAL_AUTH_FAKE_OAUTH1_USER_DATA_URL": f"{idp_url}/oauth1/user",
+    }
+
+
+def saml_settings(idp_url: str) -> dict[str, Any]:
+    metadata = requests.get(f"{idp_url}/saml/metadata", timeout=REQUEST_TIMEOUT)
+    metadata.raise_for_status()
+    match = CERTIFICATE_RE.search(metadata.text)
+    if match is None:
+        raise ValueError("Identity provider metadata without certificate")
+    key, certificate = generate_key_pair()
+    return {
+        "SOCIAL_AUTH_SAML_SP_ENTITY_ID": f"{TEST_URI}/saml/metadata",
+        "SOCIAL_AUTH_SAML_SP_PUBLIC_CERT": "".join(
+            certificate.public_bytes(serialization.Encoding.PEM)
+            .decode()
+            .splitlines()[1:-1]
+        ),
+        "SOCIAL_AUTH_SAML_SP_PRIVATE_KEY": "".join(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+            .decode()
+            .splitlines()[1:-1]
+        ),
+        "SOCIAL_AUTH_SAML_ORG_INFO": {
+            "en-US": {"name": "benchmark", "displayname": "Benchmark", "url": TEST_URI}
+        },
+        "SOCIAL_AUTH_SAML_TECHNICAL_CONTACT": {
+            "givenName": "Technical",
+            "emailAddress": "technical@example.com",
+        },
+        "SOCIAL_AUTH_SAML_SUPPORT_CONTACT": {
+            "givenName": "Support",
+            "emailAddress": "support@example.com",
+        },
+        "SOCIAL_AUTH_SAML_ENABLED_IDPS": {
+            "fake": {
+                "entity_id": f"{idp_url}/saml/metadata",
+                "url": f"{idp_url}/saml/sso",
+                "x509cert": match.group(1),
+            }
+        },
+    }
+
+
+@dataclass
+class Scenario:
+    backend: str
+    settings: Callable[[str], dict[str, Any]]
+    start_data: dict[str, str] = field(default_factory=dict)
+
+
+SCENARIOS = {
+    "github": Scenario("social_core.backends.github.GithubOAuth2", github_settings),
+    "google-oauth2": Scenario(
+        "social_core.backends.google.GoogleOAuth2", google_settings
+    ),
+    "oidc": Scenario(
+        "social_core.backends.open_id_connect.OpenIdConnectAuth", oidc_settings
+    ),
+    "azuread-oauth2": Scenario(
+        "social_core.backends.azuread.AzureADOAuth2", azuread_settings
+    ),
+    "saml": Scenario(
+        "social_core.backends.saml.SAMLAuth", saml_settings, {"idp": "fake"}
+    ),
+    "fake-oauth1": Scenario("social_core.tests.benchmark.FakeOAuth1", oauth1_settings),
+}
+
+
+@dataclass
+class BenchmarkResult:
+    backend: str
+    concurrency: int
+    elapsed: float
+    latencies: list[float]
+    errors: list[str]
+    provider_calls: dict[str, int]
+    peak_allocated: float | None = None
+    retained_allocated: float | None = None
+
+    @property
+    def logins(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def logins_per_second(self) -> float:
+        return self.logins / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def calls_per_login(self) -> float:
+        calls = sum(
+            count
+            for path, count in self.provider_calls.items()
+            if path not in BROWSER_PATHS
+        )
+        return calls / self.logins if self.logins else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Latency percentile (nearest rank) in seconds"""
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        rank = math.ceil(percent / 100 * len(latencies))
+        return latencies[max(rank, 1) - 1]
+
+
+def authorize(url: str) -> dict[str, str]:
+    """Visit the provider authorization page like the browser would and
+    return the data it sends to the completion URL"""
+    response = requests.get(url, allow_redirects=False, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    if response.is_redirect:
+        return dict(parse_qsl(urlparse(response.headers["Location"]).query))
+    return {
+        html.unescape(name): html.unescape(value)
+        for name, value in FORM_INPUT_RE.findall(response.text)
+    }
+
+
+def _login(backend, user, social_user) -> None:
+    pass
+
+
+def login(scenario: Scenario, settings: dict[str, Any]) -> None:
+    """Run one complete login"""
+    backend_class = module_member(scenario.backend)
+    redirect_uri = f"{TEST_URI}/complete/{backend_class.name}/"
+    strategy = BenchmarkStrategy(TestStorage, urlparse(redirect_uri).path)
+    strategy.set_settings(settings)
+    backend = backend_class(strategy, redirect_uri=redirect_uri)
+    strategy.set_request_data(dict(scenario.start_data), backend)
+
+    response = authorize(do_auth(backend).url)
+    strategy.set_request_data(response, backend)
+    do_complete(backend, login=_login)
+    if not strategy.session_get("username"):
+        raise RuntimeError("Login completed without authenticating a user")
+
+
+def reset_state() -> None:
+    """Start every run with empty storage and cold metadata caches"""
+    User.reset_cache()
+    TestUserSocialAuth.reset_cache()
+    TestNonce.reset_cache()
+    TestAssociation.reset_cache()
+    for instance in cache.instances.values():
+        instance.cache.clear()
+
+
+def measure_allocations(
+    scenario: Scenario, settings: dict[str, Any], samples: int
+) -> tuple[float, float]:
+    """Average peak and retained bytes allocated per login"""
+    peak = retained = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            before, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            login(scenario, settings)
+            after, top = tracemalloc.get_traced_memory()
+            peak += top - before
+            retained += after - before
+    finally:
+        tracemalloc.stop()
+    return peak / samples, retained / samples
+
+
+def run_benchmark(
+    backend: str,
+    idp_url: str,
+    logins: int = 200,
+    concurrency: int = 8,
+    warmup: int = 10,
+    allocation_samples: int = 20,
+) -> BenchmarkResult:
+    """Run logins for the given backend name against the identity provider
+    at idp_url. The warm-up logins fill the metadata caches and aren't
+    measured."""
+    scenario = SCENARIOS[backend]
+    settings = {
+        "SOCIAL_AUTH_AUTHENTICATION_BACKENDS": (scenario.backend,),
+        "SOCIAL_AUTH_LOGIN_REDIRECT_URL": "/success",
+        **scenario.settings(idp_url),
+    }
+    reset_state()
+    for _ in range(warmup):
+        login(scenario, settings)
+    requests.delete(f"{idp_url}/_stats", timeout=REQUEST_TIMEOUT)
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def timed_login(_index: int) -> None:
+        started = time.perf_counter()
+        try:
+            login(scenario, settings)
+        # pylint: disable-next=broad-exception-caught
+        except Exception as error:  # noqa: BLE001
+            with lock:
+                errors.append(repr(error))
+        else:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed_login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stats = requests.get(f"{idp_url}/_stats", timeout=REQUEST_TIMEOUT)
+    result = BenchmarkResult(
+        backend, concurrency, elapsed, latencies, errors, stats.json()
+    )
+    if allocation_samples:
+        result.peak_allocated, result.retained_allocated = measure_allocations(
+            scenario, settings, allocation_samples
+        )
+    return result
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    rows = [
+        (
+            "backend",
+            "logins/s",
+            "p50 ms",
+            "p90 ms",
+            "p99 ms",
+            "calls/login",
+            "peak KiB",
+            "retained KiB",
+            "errors",
+        )
+    ]
+    rows.extend(
+        (
+            result.backend,
+            f"{result.logins_per_second:.1f}",
+            f"{result.percentile(50) * 1000:.1f}",
+            f"{result.percentile(90) * 1000:.1f}",
+            f"{result.percentile(99) * 1000:.1f}",
+            f"{result.calls_per_login:.2f}",
+            "-"
+            if result.peak_allocated is None
+            else f"{result.peak_allocated / 1024:.1f}",
+            "-"
+            if result.retained_allocated is None
+            else f"{result.retained_allocated / 1024:.1f}",
+            str(len(result.errors)),
+        )
+        for result in results
+    )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(value.rjust(width) for value, width in zip(row, widths, strict=True))
+        for row in rows
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="backend to benchmark, can be repeated (all by default)",
+    )
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--allocation-samples", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument(
+        "--idp-latency",
+        type=float,
+        default=0.0,
+        help="delay added to every identity provider request",
+    )
+    parser.add_argument("--idp-url", help="use an already running identity provider")
+    args = parser.parse_args(argv)
+
+    backends = args.backend or [
+        name for name in SCENARIOS if name != "saml" or SAML_MODULE_ENABLED
+    ]
+    idp = None
+    if args.idp_url:
+        idp_url = args.idp_url.rstrip("/")
+    else:
+        idp = FakeIdentityProvider(users=args.users, latency=args.idp_latency).start()
+        idp_url = idp.base_url
+    try:
+        results = []
+        for backend in backends:
+            result = run_benchmark(
+                backend,
+                idp_url,
+                logins=args.logins,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                allocation_samples=args.allocation_samples,
+            )
+            results.append(result)
+            if result.errors:
+                sys.stderr.write(f"{backend}: {result.errors[0]}\n")
+    finally:
+        if idp is not None:
+            idp.stop()
+    sys.stdout.write(format_results(results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,619 @@
+"""Local stand-in identity provider for end-to-end tests and benchmarks
+
+FakeIdentityProvider serves OAuth 1.0a, OAuth2, OpenID Connect (discovery,
+JWKS and RS256 signed ID tokens) and SAML 2.0 (HTTP-Redirect requests
+answered with HTTP-POST responses) on localhost. Authorization codes and
+tokens are self-contained, so the server keeps no per-login state. Every
+request is counted by path, the counters are exposed at /_stats.
+
+It can also run standalone, so it doesn't share the interpreter with the
+benchmark:
+
+    python -m social_core.tests.fake_idp --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import html
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, ClassVar, cast
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from jwt.algorithms import RSAAlgorithm
+from typing_extensions import Self
+
+try:
+    from onelogin.saml2.constants import OneLogin_Saml2_Constants
+    from onelogin.saml2.utils import OneLogin_Saml2_Utils
+    from onelogin.saml2.xml_utils import OneLogin_Saml2_XML
+
+    SAML_MODULE_ENABLED = True
+except ImportError:
+    SAML_MODULE_ENABLED = False
+
+KEY_ID = "fake-idp"
+TOKEN_LIFETIME = 3600
+OAUTH1_HEADER_RE = re.compile(r'(\w+)="([^"]*)"')
+
+SAML_RESPONSE = """\
+<samlp:Response xmlns:samlp="urn:oasis:names:tc:SAML:2.0:protocol" \
+xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion" ID="_{response_id}" \
+Version="2.0" IssueInstant="{now}" Destination="{acs_url}" \
+InResponseTo="{request_id}">\
+<saml:Issuer>{entity_id}</saml:Issuer>\
+<samlp:Status>\
+<samlp:StatusCode Value="urn:oasis:names:tc:SAML:2.0:status:Success"/>\
+</samlp:Status>\
+<saml:Assertion ID="_{assertion_id}" Version="2.0" IssueInstant="{now}">\
+<saml:Issuer>{entity_id}</saml:Issuer>\
+<saml:Subject>\
+<saml:NameID Format="urn:oasis:names:tc:SAML:2.0:nameid-format:persistent">\
+{name_id}</saml:NameID>\
+<saml:SubjectConfirmation Method="urn:oasis:names:tc:SAML:2.0:cm:bearer">\
+<saml:SubjectConfirmationData NotOnOrAfter="{not_after}" \
+Recipient="{acs_url}" InResponseTo="{request_id}"/>\
+</saml:SubjectConfirmation>\
+</saml:Subject>\
+<saml:Conditions NotBefore="{not_before}" NotOnOrAfter="{not_after}">\
+<saml:AudienceRestriction><saml:Audience>{audience}</saml:Audience>\
+</saml:AudienceRestriction>\
+</saml:Conditions>\
+<saml:AuthnStatement AuthnInstant="{now}" SessionIndex="_{session_index}">\
+<saml:AuthnContext><saml:AuthnContextClassRef>\
+urn:oasis:names:tc:SAML:2.0:ac:classes:PasswordProtectedTransport\
+</saml:AuthnContextClassRef></saml:AuthnContext>\
+</saml:AuthnStatement>\
+<saml:AttributeStatement>{attributes}</saml:AttributeStatement>\
+</saml:Assertion>\
+</samlp:Response>"""
+
+SAML_ATTRIBUTE = """\
+<saml:Attribute Name="{name}" \
+NameFormat="urn:oasis:names:tc:SAML:2.0:attrname-format:uri">\
+<saml:AttributeValue>{value}</saml:AttributeValue>\
+</saml:Attribute>"""
+
+SAML_METADATA = """\
+<md:EntityDescriptor xmlns:md="urn:oasis:names:tc:SAML:2.0:metadata" \
+xmlns:ds="http://www.w3.org/2000/09/xmldsig#" entityID="{entity_id}">\
+<md:IDPSSODescriptor \
+protocolSupportEnumeration="urn:oasis:names:tc:SAML:2.0:protocol">\
+<md:KeyDescriptor use="signing"><ds:KeyInfo><ds:X509Data>\
+<ds:X509Certificate>{certificate}</ds:X509Certificate>\
+</ds:X509Data></ds:KeyInfo></md:KeyDescriptor>\
+<md:SingleSignOnService \
+Binding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect" \
+Location="{sso_url}"/>\
+</md:IDPSSODescriptor>\
+</md:EntityDescriptor>"""
+
+SAML_POST_FORM = """\
+<html><body onload="document.forms[0].submit()">\
+<form method="post" action="{acs_url}">\
+<input type="hidden" name="SAMLResponse" value="{saml_response}"/>\
+<input type="hidden" name="RelayState" value="{relay_state}"/>\
+</form></body></html>"""
+
+
+def encode_token(payload: dict[str, Any]) -> str:
+    """Self-contained opaque token, every token is unique"""
+    payload = {**payload, "jti": uuid.uuid4().hex}
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_token(token: str) -> dict[str, Any]:
+    """Decode a token issued by encode_token, raises ValueError when invalid"""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(data)
+    except (TypeError, ValueError, UnicodeDecodeError) as error:
+        raise ValueError("Invalid token") from error
+    if not isinstance(payload, dict) or "sub" not in payload:
+        raise ValueError("Invalid token")
+    return payload
+
+
+def user_claims(sub: str) -> dict[str, Any]:
+    """Profile of the given fake user"""
+    number = sub.removeprefix("user")
+    email = f"{sub}@example.com"
+    return {
+        "sub": sub,
+        "email": email,
+        "email_verified": True,
+        "name": f"User {number}",
+        "given_name": "User",
+        "family_name": number,
+        "preferred_username": sub,
+        "upn": email,
+    }
+
+
+def generate_key_pair() -> tuple[rsa.RSAPrivateKey, x509.Certificate]:
+    """RSA key and self-signed certificate used to sign tokens and
+    assertions"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-idp")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=365))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate
+
+
+class FakeIdentityProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple[str, int], idp: FakeIdentityProvider) -> None:
+        super().__init__(address, FakeIdentityProviderHandler)
+        self.idp = idp
+
+
+class FakeIdentityProviderHandler(BaseHTTPRequestHandler):
+    """Request handler, one method per endpoint"""
+
+    protocol_version = "HTTP/1.1"
+
+    ROUTES: ClassVar[dict[tuple[str, str], str]] = {
+        ("GET", "/.well-known/openid-configuration"): "discovery",
+        ("GET", "/jwks"): "jwks",
+        ("GET", "/oauth2/authorize"): "oauth2_authorize",
+        ("POST", "/oauth2/token"): "oauth2_token",
+        ("GET", "/oauth2/userinfo"): "oauth2_userinfo",
+        ("GET", "/github/user"): "github_user",
+        ("GET", "/github/user/emails"): "github_emails",
+        ("GET", "/oauth1/request_token"): "oauth1_request_token",
+        ("POST", "/oauth1/request_token"): "oauth1_request_token",
+        ("GET", "/oauth1/authorize"): "oauth1_authorize",
+        ("GET", "/oauth1/access_token"): "oauth1_access_token",
+        ("POST", "/oauth1/access_token"): "oauth1_access_token",
+        ("GET", "/oauth1/user"): "oauth1_user",
+        ("GET", "/saml/metadata"): "saml_metadata",
+        ("GET", "/saml/sso"): "saml_sso",
+    }
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self.dispatch("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Keep the benchmark output clean"""
+
+    @property
+    def idp(self) -> FakeIdentityProvider:
+        return cast("FakeIdentityProviderServer", self.server).idp
+
+    def dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        self.params = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.params.update(parse_qsl(self.rfile.read(length).decode()))
+
+        if url.path == "/_stats":
+            if method == "DELETE":
+                self.idp.reset_calls()
+            self.send_json(self.idp.call_counts())
+            return
+
+        endpoint = self.ROUTES.get((method, url.path))
+        if endpoint is None:
+            self.send_body(HTTPStatus.NOT_FOUND, b"Not found", "text/plain")
+            return
+        self.idp.record_call(url.path)
+        if self.idp.latency:
+            time.sleep(self.idp.latency)
+        try:
+            getattr(self, endpoint)()
+        except (KeyError, ValueError) as error:
+            self.send_json({"error": "invalid_request", "detail": str(error)}, 400)
+
+    def send_body(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data: Any, status: int = 200) -> None:
+        self.send_body(status, json.dumps(data).encode(), "application/json")
+
+    def send_form(self, data: dict[str, str]) -> None:
+        self.send_body(
+            200, urlencode(data).encode(), "application/x-www-form-urlencoded"
+        )
+
+    def send_redirect(self, url: str, params: dict[str, str]) -> None:
+        separator = "&" if "?" in url else "?"
+        location = f"{url}{separator}{urlencode(params)}"
+        self.send_body(HTTPStatus.FOUND, b"", "text/plain", {"Location": location})
+
+    def bearer_token(self) -> dict[str, Any]:
+        _scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        return decode_token(token)
+
+    def oauth1_parameters(self) -> dict[str, str]:
+        header = self.headers.get("Authorization", "")
+        parameters = {
+            name: unquote(value) for name, value in OAUTH1_HEADER_RE.findall(header)
+        }
+        return {**self.params, **parameters}
+
+    def client_id(self) -> str:
+        scheme, _, credentials = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "basic":
+            return unquote(base64.b64decode(credentials).decode().partition(":")[0])
+        return self.params["client_id"]
+
+    # OpenID Connect
+    def discovery(self) -> None:
+        self.send_json(self.idp.openid_configuration())
+
+    def jwks(self) -> None:
+        self.send_json({"keys": [self.idp.jwk()]})
+
+    # OAuth2
+    def oauth2_authorize(self) -> None:
+        user = self.idp.next_user()
+        code = encode_token(
+            {
+                "sub": user,
+                "client_id": self.params["client_id"],
+                "nonce": self.params.get("nonce"),
+                "scope": self.params.get("scope", ""),
+            }
+        )
+        params = {"code": code}
+        if "state" in self.params:
+            params["state"] = self.params["state"]
+        self.send_redirect(self.params["redirect_uri"], params)
+
+    def oauth2_token(self) -> None:
+        grant_type = self.params.get("grant_type", "authorization_code")
+        token = self.params[
+            "code" if grant_type == "authorization_code" else grant_type
+        ]
+        grant = decode_token(token)
+        client_id = self.client_id()
+        if grant.get("client_id") != client_id:
+            self.send_json({"error": "invalid_grant"}, 400)
+            return
+        response = {
+            "access_token": encode_token({"sub": grant["sub"]}),
+            "refresh_token": encode_token(
+                {"sub": grant["sub"], "client_id": client_id, "scope": grant["scope"]}
+            ),
+            "token_type": "Bearer",
+            "expires_in": TOKEN_LIFETIME,
+            "scope": grant["scope"],
+        }
+        if "openid" in grant["scope"].split():
+            response["id_token"] = self.idp.id_token(
+                grant["sub"], client_id, grant.get("nonce")
+            )
+        self.send_json(response)
+
+    def oauth2_userinfo(self) -> None:
+        claims = user_claims(self.bearer_token()["sub"])
+        del claims["upn"]
+        self.send_json(claims)
+
+    # GitHub flavoured user API
+    def github_user(self) -> None:
+        claims = user_claims(self.bearer_token()["sub"])
+        self.send_json(
+            {
+                "id": int(claims["family_name"]),
+                "login": claims["sub"],
+                "name": claims["name"],
+                "email": claims["email"],
+            }
+        )
+
+    def github_emails(self) -> None:
+        claims = user_claims(self.bearer_token()["sub"])
+        self.send_json([{"email": claims["email"], "primary": True, "verified": True}])
+
+    # OAuth 1.0a
+    def oauth1_request_token(self) -> None:
+        self.send_form(
+            {
+                "oauth_token": encode_token({"sub": ""}),
+                "oauth_token_secret": uuid.uuid4().hex,
+                "oauth_callback_confirmed": "true",
+            }
+        )
+
+    def oauth1_authorize(self) -> None:
+        self.send_redirect(
+            self.params["redirect_uri"],
+            {
+                "oauth_token": self.params["oauth_token"],
+                "oauth_verifier": encode_token({"sub": self.idp.next_user()}),
+            },
+        )
+
+    def oauth1_access_token(self) -> None:
+        verifier = decode_token(self.oauth1_parameters()["oauth_verifier"])
+        self.send_form(
+            {
+                "oauth_token": encode_token({"sub": verifier["sub"]}),
+                "oauth_token_secret": uuid.uuid4().hex,
+            }
+        )
+
+    def oauth1_user(self) -> None:
+        token = decode_token(self.oauth1_parameters()["oauth_token"])
+        claims = user_claims(token["sub"])
+        self.send_json(
+            {
+                "id": claims["sub"],
+                "username": claims["sub"],
+                "email": claims["email"],
+                "name": claims["name"],
+            }
+        )
+
+    # SAML 2.0
+    def saml_metadata(self) -> None:
+        self.send_body(200, self.idp.saml_metadata().encode(), "application/xml")
+
+    def saml_sso(self) -> None:
+        if not SAML_MODULE_ENABLED:
+            self.send_body(
+                HTTPStatus.NOT_IMPLEMENTED, b"python3-saml is missing", "text/plain"
+            )
+            return
+        request = OneLogin_Saml2_XML.to_etree(
+            OneLogin_Saml2_Utils.decode_base64_and_inflate(self.params["SAMLRequest"])
+        )
+        (audience,) = OneLogin_Saml2_XML.query(
+            request, "/samlp:AuthnRequest/saml:Issuer"
+        )
+        acs_url = request.get("AssertionConsumerServiceURL")
+        saml_response = self.idp.saml_response(
+            request.get("ID"), acs_url, audience.text, self.idp.next_user()
+        )
+        self.send_body(
+            200,
+            SAML_POST_FORM.format(
+                acs_url=html.escape(acs_url),
+                saml_response=saml_response,
+                relay_state=html.escape(self.params.get("RelayState", "")),
+            ).encode(),
+            "text/html",
+        )
+
+
+class FakeIdentityProvider:
+    """Threaded identity provider server listening on localhost
+
+    Logins are spread over the given number of users (user0, user1, ...),
+    latency adds a delay to every request to emulate a remote provider.
+
+        with FakeIdentityProvider() as idp:
+            settings = {"SOCIAL_AUTH_OIDC_OIDC_ENDPOINT": idp.base_url}
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        users: int = 100,
+        latency: float = 0.0,
+    ) -> None:
+        self.users = users
+        self.latency = latency
+        self.key, self.certificate = generate_key_pair()
+        self.key_pem = self.key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        self.certificate_pem = self.certificate.public_bytes(
+            serialization.Encoding.PEM
+        ).decode()
+        self.calls: Counter[str] = Counter()
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.httpd = FakeIdentityProviderServer((host, port), self)
+        self.thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        # AF_INET servers report the host as a str
+        host = cast("str", host)
+        return f"http://{host}:{port}"
+
+    @property
+    def saml_entity_id(self) -> str:
+        return f"{self.base_url}/saml/metadata"
+
+    @property
+    def saml_certificate(self) -> str:
+        """Base64 DER certificate, as used in x509cert settings"""
+        der = self.certificate.public_bytes(serialization.Encoding.DER)
+        return base64.b64encode(der).decode()
+
+    def start(self) -> Self:
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name="fake-idp", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def record_call(self, path: str) -> None:
+        with self.lock:
+            self.calls[path] += 1
+
+    def call_counts(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.calls)
+
+    def reset_calls(self) -> None:
+        with self.lock:
+            self.calls.clear()
+
+    def next_user(self) -> str:
+        with self.lock:
+            return f"user{next(self.counter) % self.users}"
+
+    def openid_configuration(self) -> dict[str, Any]:
+        return {
+            "issuer": self.base_url,
+            "authorization_endpoint": f"{self.base_url}/oauth2/authorize",
+            "token_endpoint": f"{self.base_url}/oauth2/token",
+            "userinfo_endpoint": f"{self.base_url}/oauth2/userinfo",
+            "jwks_uri": f"{self.base_url}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": ["RS256"],
+            "token_endpoint_auth_methods_supported": [
+                "client_secret_basic",
+                "client_secret_post",
+            ],
+        }
+
+    def jwk(self) -> dict[str, Any]:
+        key = RSAAlgorithm.to_jwk(self.key.public_key(), as_dict=True)
+        return {**key, "kid": KEY_ID, "alg": "RS256", "use": "sig"}
+
+    def id_token(self, sub: str, client_id: str, nonce: str | None = None) -> str:
+        now = int(time.time())
+        claims = {
+            **user_claims(sub),
+            "iss": self.base_url,
+            "aud": client_id,
+            "iat": now,
+            "nbf": now,
+            "exp": now + TOKEN_LIFETIME,
+        }
+        if nonce:
+            claims["nonce"] = nonce
+        return jwt.encode(claims, self.key, algorithm="RS256", headers={"kid": KEY_ID})
+
+    def saml_metadata(self) -> str:
+        return SAML_METADATA.format(
+            entity_id=self.saml_entity_id,
+            certificate=self.saml_certificate,
+            sso_url=f"{self.base_url}/saml/sso",
+        )
+
+    def saml_response(
+        self, request_id: str, acs_url: str, audience: str, sub: str
+    ) -> str:
+        """Signed and base64 encoded SAMLResponse for the given AuthnRequest"""
+        now = time.time()
+        claims = user_claims(sub)
+        attributes = {
+            "urn:oid:0.9.2342.19200300.100.1.1": sub,
+            "urn:oid:0.9.2342.19200300.100.1.3": claims["email"],
+            "urn:oid:2.5.4.42": claims["given_name"],
+            "urn:oid:2.5.4.4": claims["family_name"],
+            "urn:oid:2.5.4.3": claims["name"],
+        }
+        xml = SAML_RESPONSE.format(
+            response_id=uuid.uuid4().hex,
+            assertion_id=uuid.uuid4().hex,
+            session_index=uuid.uuid4().hex,
+            now=OneLogin_Saml2_Utils.parse_time_to_SAML(now),
+            not_before=OneLogin_Saml2_Utils.parse_time_to_SAML(now - 60),
+            not_after=OneLogin_Saml2_Utils.parse_time_to_SAML(now + 300),
+            acs_url=html.escape(acs_url),
+            request_id=html.escape(request_id),
+            entity_id=self.saml_entity_id,
+            audience=html.escape(audience),
+            name_id=sub,
+            attributes="".join(
+                SAML_ATTRIBUTE.format(name=name, value=html.escape(value))
+                for name, value in attributes.items()
+            ),
+        )
+        signed = OneLogin_Saml2_Utils.add_sign(
+            xml,
+            self.key_pem,
+            self.certificate_pem,
+            sign_algorithm=OneLogin_Saml2_Constants.RSA_SHA256,
+            digest_algorithm=OneLogin_Saml2_Constants.SHA256,
+        )
+        if isinstance(signed, str):
+            signed = signed.encode()
+        return base64.b64encode(signed).decode()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="delay added to every request"
+    )
+    args = parser.parse_args(argv)
+
+    idp = FakeIdentityProvider(args.host, args.port, args.users, args.latency)
+    sys.stdout.write(f"Fake identity provider listening on {idp.base_url}\n")
+    sys.stdout.flush()
+    try:
+        idp.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        idp.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import base64
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Any, TypeVar, cast
 
 from typing_extensions import Self
@@ -180,6 +181,16 @@ class TestUserSocialAuth(UserMixin, BaseModel):
     def get_users_by_email(cls, email: str):
         return [user for user in User.cache.values() if user.email == email]
 
+    @classmethod
+    def get_social_auth_expiring_before(cls, before, provider=None):
+        seconds = (before - datetime.now(timezone.utc)).total_seconds()
+        return [
+            social
+            for social in cls.cache_by_uid.values()
+            if provider in (None, social.provider)
+            and social.access_token_expires_within(seconds)
+        ]
+
     @classmethod
     def get(cls, key) -> Self | None:
         return cast("Self | None", cls.cache.get(key))
@@ -36,6 +36,9 @@ class TestStrategy(BaseStrategy):
         self._request_data: dict[str, Any] = {}
         self._settings: dict[str, Any] = {}
         self._session: dict[str, Any] = {}
+        # Cookies held by the test browser
+        self._cookies: dict[str, str] = {}
+        self._cookies_same_site: dict[str, str] = {}
         super().__init__(storage, tpl)
 
     def redirect(self, url):
@@ -58,7 +61,7 @@ class TestStrategy(BaseStrategy):
         """Render given template or raw html with given context"""
         return tpl or html or ""
 
-    def request_data(self, merge=True):
+    def _read_request_data(self, merge=True):
         """Return current request data (POST or GET)"""
         return self._request_data
 
@@ -86,18 +89,31 @@ class TestStrategy(BaseStrategy):
         """Request POST data"""
         return self._request_data.copy()
 
-    def session_get(self, name, default=None):
+    def _session_get(self, name, default=None):
         """Return session value for given key"""
         return self._session.get(name, default)
 
-    def session_set(self, name, value) -> None:
+    def _session_set(self, name, value) -> None:
         """Set session value for given key"""
         self._session[name] = value
 
-    def session_pop(self, name):
+    def _session_pop(self, name):
         """Pop session value for given key"""
         return self._session.pop(name, None)
 
+    def cookie_get(self, name):
+        """Return the value of the given request cookie"""
+        return self._cookies.get(name)
+
+    def cookie_set(self, name, value, max_age, same_site="Lax") -> None:
+        """Set a cookie on the response"""
+        self._cookies[name] = value
+        self._cookies_same_site[name] = same_site
+
+    def cookie_delete(self, name) -> None:
+        """Expire the given cookie"""
+        self._cookies.pop(name, None)
+
     def build_absolute_uri(self, path=None):
         """Build absolute URI with given (optional) path"""
         path = path or ""
@@ -110,10 +126,12 @@ class TestStrategy(BaseStrategy):
 
     def set_request_data(self, values, backend) -> None:
         self._request_data.update(values)
+        self.clean_request_data_cache()
         backend.data = self._request_data
 
     def remove_from_request_data(self, name) -> None:
         self._request_data.pop(name, None)
+        self.clean_request_data_cache()
 
     def authenticate(self, *args, **kwargs):
         user = super().authenticate(*args, **kwargs)
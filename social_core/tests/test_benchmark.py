@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import sys
+import unittest
+
+import requests
+
+from social_core.tests.benchmark import (
+    SCENARIOS,
+    BenchmarkResult,
+    format_results,
+    run_benchmark,
+)
+from social_core.tests.fake_idp import (
+    SAML_MODULE_ENABLED,
+    FakeIdentityProvider,
+    decode_token,
+    encode_token,
+)
+
+
+class FakeIdentityProviderTest(unittest.TestCase):
+    idp: FakeIdentityProvider
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.idp = FakeIdentityProvider(users=2).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.idp.stop()
+
+    def setUp(self) -> None:
+        self.idp.reset_calls()
+
+    def test_tokens(self) -> None:
+        token = encode_token({"sub": "user1"})
+        self.assertEqual(decode_token(token)["sub"], "user1")
+        self.assertNotEqual(encode_token({"sub": "user1"}), token)
+        with self.assertRaises(ValueError):
+            decode_token("invalid")
+
+    def test_discovery(self) -> None:
+        response = requests.get(
+            f"{self.idp.base_url}/.well-known/openid-configuration", timeout=5
+        )
+        self.assertEqual(response.json()["issuer"], self.idp.base_url)
+        self.assertEqual(
+            self.idp.call_counts(), {"/.well-known/openid-configuration": 1}
+        )
+
+    def test_users(self) -> None:
+        self.assertEqual(
+            [self.idp.next_user() for _ in range(3)], ["user0", "user1", "user0"]
+        )
+
+    def test_invalid_code(self) -> None:
+        response = requests.post(
+            f"{self.idp.base_url}/oauth2/token",
+            data={"code": "invalid", "client_id": "client"},
+            timeout=5,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_stats(self) -> None:
+        requests.get(f"{self.idp.base_url}/jwks", timeout=5)
+        response = requests.get(f"{self.idp.base_url}/_stats", timeout=5)
+        self.assertEqual(response.json(), {"/jwks": 1})
+        requests.delete(f"{self.idp.base_url}/_stats", timeout=5)
+        self.assertEqual(self.idp.call_counts(), {})
+
+
+class BenchmarkTest(unittest.TestCase):
+    idp: FakeIdentityProvider
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.idp = FakeIdentityProvider(users=3).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.idp.stop()
+
+    def run_backend(self, backend: str, calls_per_login: float) -> None:
+        result = run_benchmark(
+            backend,
+            self.idp.base_url,
+            logins=4,
+            concurrency=2,
+            warmup=1,
+            allocation_samples=1,
+        )
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.logins, 4)
+        self.assertEqual(result.calls_per_login, calls_per_login)
+        self.assertIsNotNone(result.peak_allocated)
+
+    def test_github(self) -> None:
+        self.run_backend("github", 2)
+
+    def test_google(self) -> None:
+        self.run_backend("google-oauth2", 2)
+
+    def test_oidc(self) -> None:
+        # Discovery and JWKS are fetched once, by the warm-up login
+        self.run_backend("oidc", 2)
+
+    def test_azuread(self) -> None:
+        self.run_backend("azuread-oauth2", 1)
+
+    @unittest.skipIf(
+        "__pypy__" in sys.builtin_module_names, "dm.xmlsec not compatible with pypy"
+    )
+    @unittest.skipUnless(SAML_MODULE_ENABLED, "Only run if onelogin.saml2 is installed")
+    def test_saml(self) -> None:
+        self.run_backend("saml", 0)
+
+    def test_oauth1(self) -> None:
+        self.run_backend("fake-oauth1", 3)
+
+    def test_scenarios(self) -> None:
+        self.assertEqual(
+            set(SCENARIOS),
+            {
+                "github",
+                "google-oauth2",
+                "oidc",
+                "azuread-oauth2",
+                "saml",
+                "fake-oauth1",
+            },
+        )
+
+
+class BenchmarkResultTest(unittest.TestCase):
+    def test_statistics(self) -> None:
+        result = BenchmarkResult(
+            "github",
+            concurrency=1,
+            elapsed=2.0,
+            latencies=[0.01 * index for index in range(1, 11)],
+            errors=[],
+            provider_calls={"/oauth2/authorize": 10, "/oauth2/token": 10},
+        )
+        self.assertEqual(result.logins_per_second, 5)
+        self.assertEqual(result.percentile(50), 0.05)
+        self.assertEqual(result.percentile(99), 0.1)
+        self.assertEqual(result.calls_per_login, 1)
+        self.assertIn("github", format_results([result]))
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import responses
+
+from social_core.backends.open_id_connect import OpenIdConnectAuth
+from social_core.backends.utils import load_backends
+from social_core.metadata import (
+    MetadataRefresher,
+    load_metadata_snapshot,
+    save_metadata_snapshot,
+    warm_up_backends,
+)
+from social_core.tests.models import TestStorage
+from social_core.tests.strategy import TestStrategy
+from social_core.utils import cache
+
+BACKENDS = (
+    "social_core.tests.test_metadata.WarmOpenIdConnect",
+    "social_core.tests.test_metadata.BrokenOpenIdConnect",
+    "social_core.backends.github.GithubOAuth2",
+)
+CONFIG_URL = "https://warm.example.com/.well-known/openid-configuration"
+JWKS_URL = "https://warm.example.com/jwks"
+
+
+class WarmOpenIdConnect(OpenIdConnectAuth):
+    name = "warm-oidc"
+    OIDC_ENDPOINT = "https://warm.example.com"
+
+
+class BrokenOpenIdConnect(OpenIdConnectAuth):
+    name = "broken-oidc"
+    OIDC_ENDPOINT = "https://broken.example.com"
+
+
+def oidc_cache() -> dict:
+    return cache.instances[
+        "social_core.backends.open_id_connect.OpenIdConnectAuth.oidc_config"
+    ].cache
+
+
+class BaseMetadataTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Snapshots hold every cached entry, including other tests' ones
+        for instance in cache.instances.values():
+            instance.cache.clear()
+        self.strategy = TestStrategy(TestStorage)
+        self.strategy.set_settings({"SOCIAL_AUTH_AUTHENTICATION_BACKENDS": BACKENDS})
+        load_backends(BACKENDS, force_load=True)
+        responses.start()
+        responses.add(responses.GET, CONFIG_URL, json={"jwks_uri": JWKS_URL})
+        responses.add(responses.GET, JWKS_URL, json={"keys": [{"kid": "one"}]})
+        responses.add(
+            responses.GET,
+            "https://broken.example.com/.well-known/openid-configuration",
+            status=500,
+        )
+
+    def tearDown(self) -> None:
+        responses.stop()
+        responses.reset()
+        load_backends((), force_load=True)
+
+
+class WarmUpBackendsTest(BaseMetadataTest):
+    def test_warm_up(self) -> None:
+        results = warm_up_backends(self.strategy)
+
+        self.assertEqual(
+            [result.backend for result in results],
+            ["warm-oidc", "broken-oidc", "github"],
+        )
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+        self.assertIsNone(results[2].error)
+        self.assertEqual(len(responses.calls), 3)
+
+        backend = WarmOpenIdConnect(self.strategy)
+        self.assertEqual(backend.get_jwks_keys(), [{"kid": "one"}])
+        self.assertEqual(len(responses.calls), 3)
+
+    def test_warm_up_names(self) -> None:
+        results = warm_up_backends(self.strategy, names=["warm-oidc", "unknown"])
+        self.assertEqual([result.backend for result in results], ["warm-oidc"])
+
+    def test_refresh(self) -> None:
+        warm_up_backends(self.strategy, names=["warm-oidc"])
+        warm_up_backends(self.strategy, names=["warm-oidc"])
+        self.assertEqual(len(responses.calls), 2)
+
+        warm_up_backends(self.strategy, names=["warm-oidc"], refresh=True)
+        self.assertEqual(len(responses.calls), 4)
+
+
+class MetadataSnapshotTest(BaseMetadataTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "metadata.json")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_save_and_load(self) -> None:
+        warm_up_backends(self.strategy, names=["warm-oidc"])
+        self.assertEqual(save_metadata_snapshot(self.path), 2)
+        updated = oidc_cache()[(WarmOpenIdConnect, (), ())][0]
+        oidc_cache().clear()
+
+        self.assertEqual(load_metadata_snapshot(self.path), 1)
+        self.assertEqual(
+            oidc_cache()[(WarmOpenIdConnect, (), ())],
+            (updated, {"jwks_uri": JWKS_URL}),
+        )
+        # Entries are only restored over older ones
+        self.assertEqual(load_metadata_snapshot(self.path), 0)
+
+        backend = WarmOpenIdConnect(self.strategy)
+        self.assertEqual(backend.oidc_config(), {"jwks_uri": JWKS_URL})
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_load_ignores_unknown_entries(self) -> None:
+        entry = {
+            "function": (
+                "social_core.backends.open_id_connect.OpenIdConnectAuth.oidc_config"
+            ),
+            "args": [],
+            "kwargs": {},
+            "updated": 1,
+            "value": {},
+        }
+        Path(self.path).write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    "entries": [
+                        {**entry, "class": "social_core.tests.missing.Backend"},
+                        {**entry, "class": "social_core.utils.TTLCache"},
+                    ],
+                }
+            )
+        )
+        self.assertEqual(load_metadata_snapshot(self.path), 0)
+
+    def test_load_missing_or_invalid(self) -> None:
+        self.assertEqual(load_metadata_snapshot(self.path), 0)
+        Path(self.path).write_text("not json")
+        self.assertEqual(load_metadata_snapshot(self.path), 0)
+
+
+class MetadataRefresherTest(BaseMetadataTest):
+    def test_refresh_saves_snapshot(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "metadata.json")
+            self.strategy.set_settings({"SOCIAL_AUTH_METADATA_SNAPSHOT_PATH": path})
+            refresher = MetadataRefresher(self.strategy)
+
+            results = refresher.refresh()
+
+            self.assertEqual(len(results), 3)
+            self.assertTrue(Path(path).exists())
+
+    def test_stop(self) -> None:
+        refresher = MetadataRefresher(self.strategy, interval=60)
+        refreshed = threading.Event()
+
+        def refresh():
+            refreshed.set()
+            return []
+
+        with patch.object(refresher, "refresh", refresh):
+            refresher.start()
+            self.assertTrue(refreshed.wait(1))
+            refresher.stop()
+            refresher.join(1)
+        self.assertFalse(refresher.is_alive())
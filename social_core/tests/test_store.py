@@ -0,0 +1,72 @@
+import json
+import pickle
+import unittest
+
+from openid.consumer.discover import OpenIDServiceEndpoint
+from openid.yadis.manager import YadisServiceManager
+
+from social_core.store import OpenIdSessionWrapper
+
+LAST_TOKEN = "_openid_consumer_last_token"
+SERVICES = "_yadis_services__openid_consumer_"
+
+
+def endpoint(claimed_id: str) -> OpenIDServiceEndpoint:
+    service = OpenIDServiceEndpoint()
+    service.claimed_id = claimed_id
+    service.server_url = "https://example.com/openid/login"
+    service.type_uris = ["http://specs.openid.net/auth/2.0/server"]
+    service.used_yadis = True
+    return service
+
+
+class OpenIdSessionWrapperTest(unittest.TestCase):
+    def test_endpoint_is_json_serializable(self) -> None:
+        session = OpenIdSessionWrapper()
+        session[LAST_TOKEN] = endpoint("https://example.com/id/1")
+
+        restored = OpenIdSessionWrapper(json.loads(json.dumps(session)))[LAST_TOKEN]
+
+        self.assertIsInstance(restored, OpenIDServiceEndpoint)
+        self.assertEqual(vars(restored), vars(endpoint("https://example.com/id/1")))
+
+    def test_service_manager_is_json_serializable(self) -> None:
+        manager = YadisServiceManager(
+            "https://example.com",
+            "https://example.com/openid",
+            [
+                endpoint("https://example.com/id/1"),
+                endpoint("https://example.com/id/2"),
+            ],
+            "_openid_consumer_",
+        )
+        next(manager)
+        session = OpenIdSessionWrapper()
+        session[SERVICES] = manager
+
+        restored = OpenIdSessionWrapper(json.loads(json.dumps(session)))[SERVICES]
+
+        assert isinstance(restored, YadisServiceManager)
+        self.assertEqual(restored.current().claimed_id, "https://example.com/id/1")
+        self.assertEqual(restored.yadis_url, "https://example.com/openid")
+        self.assertEqual(restored.session_key, "_openid_consumer_")
+        self.assertEqual(
+            [service.claimed_id for service in restored.services],
+            ["https://example.com/id/2"],
+        )
+        self.assertEqual(next(restored).claimed_id, "https://example.com/id/2")
+
+    def test_pickled_values_are_read(self) -> None:
+        session = OpenIdSessionWrapper(
+            {LAST_TOKEN: pickle.dumps(endpoint("https://example.com/id/1"), 0)}
+        )
+        restored = session.get(LAST_TOKEN)
+        assert isinstance(restored, OpenIDServiceEndpoint)
+        self.assertEqual(restored.claimed_id, "https://example.com/id/1")
+
+    def test_unsupported_values_are_pickled(self) -> None:
+        session = OpenIdSessionWrapper()
+        service = endpoint("https://example.com/id/1")
+        service.canonicalID = object()  # type: ignore[assignment]
+        session[LAST_TOKEN] = service
+        self.assertIsInstance(dict.__getitem__(session, LAST_TOKEN), bytes)
@@ -0,0 +1,104 @@
+import unittest
+
+from .strategy import TestStrategy
+
+
+class CountingStrategy(TestStrategy):
+    __test__ = False
+
+    def __init__(self, storage, tpl=None) -> None:
+        self.calls: list[bool] = []
+        super().__init__(storage, tpl)
+
+    def _read_request_data(self, merge=True):
+        self.calls.append(merge)
+        return dict(self._request_data)
+
+
+class RequestDataCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.strategy = CountingStrategy(None)
+        self.strategy._request_data = {"foo": "1"}  # noqa: SLF001
+
+    def test_materialized_once(self) -> None:
+        data = self.strategy.request_data()
+        self.assertIs(self.strategy.request_data(), data)
+        self.assertIs(self.strategy.request_data(merge=True), data)
+        self.assertEqual(self.strategy.calls, [True])
+
+    def test_cached_per_merge_flag(self) -> None:
+        self.strategy.request_data()
+        self.strategy.request_data(merge=False)
+        self.strategy.request_data(False)
+        self.assertEqual(self.strategy.calls, [True, False])
+
+    def test_clean_request_data_cache(self) -> None:
+        self.assertEqual(self.strategy.request_data(), {"foo": "1"})
+        self.strategy._request_data = {"foo": "2"}  # noqa: SLF001
+        self.strategy.clean_request_data_cache()
+        self.assertEqual(self.strategy.request_data(), {"foo": "2"})
+        self.assertEqual(self.strategy.calls, [True, True])
+
+    def test_cache_is_per_instance(self) -> None:
+        self.strategy.request_data()
+        other = CountingStrategy(None)
+        self.assertEqual(other.request_data(), {})
+        self.assertEqual(other.calls, [True])
+
+
+class CountingSessionStrategy(TestStrategy):
+    __test__ = False
+
+    def __init__(self, storage, tpl=None) -> None:
+        self.updates: list[tuple[dict, list]] = []
+        super().__init__(storage, tpl)
+
+    def session_update(self, values, removed) -> None:
+        self.updates.append((values, removed))
+        super().session_update(values, removed)
+
+
+class BufferedSessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.strategy = CountingSessionStrategy(None)
+        self.strategy._session = {"old": "1", "keep": "2"}  # noqa: SLF001
+
+    def test_writes_are_flushed_once(self) -> None:
+        with self.strategy.buffered_session():
+            self.strategy.session_set("foo", "bar")
+            self.strategy.session_set("foo", "baz")
+            self.assertEqual(self.strategy.session_pop("old"), "1")
+            self.assertIsNone(self.strategy.session_get("old"))
+            self.assertEqual(self.strategy.session_get("foo"), "baz")
+            self.assertEqual(self.strategy.session_get("keep"), "2")
+            self.assertEqual(self.strategy._session, {"old": "1", "keep": "2"})  # noqa: SLF001
+
+        self.assertEqual(self.strategy._session, {"foo": "baz", "keep": "2"})  # noqa: SLF001
+        self.assertEqual(self.strategy.updates, [({"foo": "baz"}, ["old"])])
+
+    def test_nested_blocks_share_buffer(self) -> None:
+        with self.strategy.buffered_session():
+            with self.strategy.buffered_session():
+                self.strategy.session_set("foo", "bar")
+            self.assertNotIn("foo", self.strategy._session)  # noqa: SLF001
+        self.assertEqual(len(self.strategy.updates), 1)
+
+    def test_explicit_flush(self) -> None:
+        with self.strategy.buffered_session():
+            self.strategy.session_set("foo", "bar")
+            self.strategy.flush_session_writes()
+            self.assertEqual(self.strategy._session["foo"], "bar")  # noqa: SLF001
+            self.strategy.session_set("foo", "baz")
+        self.assertEqual(self.strategy._session["foo"], "baz")  # noqa: SLF001
+        self.assertEqual(len(self.strategy.updates), 2)
+
+    def test_flushed_on_error(self) -> None:
+        with self.assertRaises(ValueError), self.strategy.buffered_session():
+            self.strategy.session_set("foo", "bar")
+            raise ValueError("Failed")
+        self.assertEqual(self.strategy._session["foo"], "bar")  # noqa: SLF001
+
+    def test_unbuffered_writes(self) -> None:
+        self.strategy.session_set("foo", "bar")
+        self.assertEqual(self.strategy._session["foo"], "bar")  # noqa: SLF001
+        self.assertEqual(self.strategy.updates, [])
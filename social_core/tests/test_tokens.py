@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import copy
+import threading
+import time
+import unittest
+from typing import Any
+
+from social_core.backends.oauth import BaseOAuth2
+from social_core.backends.utils import load_backends
+from social_core.exceptions import TokenRefreshLockTimeout
+from social_core.tests.models import TestStorage, TestUserSocialAuth, User
+from social_core.tests.strategy import TestStrategy
+from social_core.tokens import (
+    LocalRefreshLock,
+    TokenRefreshManager,
+    revoke_access_tokens,
+)
+
+BACKENDS = (
+    "social_core.tests.test_tokens.RefreshAuth",
+    "social_core.tests.test_tokens.OtherRefreshAuth",
+)
+
+
+class RefreshAuth(BaseOAuth2):
+    name = "refresh"
+    EXTRA_DATA = ["refresh_token", "expires_in"]
+    delay = 0.0
+    active = 0
+    max_active = 0
+    calls = 0
+    started: list[tuple[str, float]] = []
+    lock = threading.Lock()
+
+    def refresh_token(self, token: str, *args, **kwargs) -> dict:
+        cls = type(self)
+        with cls.lock:
+            cls.calls += 1
+            cls.started.append((self.name, time.monotonic()))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(cls.delay)
+            if token == "broken":
+                raise ValueError("Refresh rejected")
+            return {"access_token": f"new-{token}", "expires_in": 3600}
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def revoke_token(self, token, uid):
+        time.sleep(type(self).delay)
+        if uid == "broken":
+            raise ValueError("Revocation rejected")
+        return token != "unknown"
+
+
+class OtherRefreshAuth(RefreshAuth):
+    name = "other-refresh"
+
+
+class RecordingRefreshLock(LocalRefreshLock):
+    acquired: list[str] = []
+
+    def acquire(self, key: str, timeout: float) -> bool:
+        RecordingRefreshLock.acquired.append(key)
+        return super().acquire(key, timeout)
+
+
+class BusyRefreshLock(LocalRefreshLock):
+    def acquire(self, key: str, timeout: float) -> bool:
+        return False
+
+
+class BaseTokensTest(unittest.TestCase):
+    def setUp(self) -> None:
+        User.reset_cache()
+        TestUserSocialAuth.reset_cache()
+        RefreshAuth.delay = 0.0
+        RefreshAuth.active = 0
+        RefreshAuth.max_active = 0
+        RefreshAuth.calls = 0
+        RefreshAuth.started = []
+        self.strategy = TestStrategy(TestStorage)
+        self.strategy.set_settings({"SOCIAL_AUTH_AUTHENTICATION_BACKENDS": BACKENDS})
+        load_backends(BACKENDS, force_load=True)
+        self.user = User(username="foobar")
+
+    def tearDown(self) -> None:
+        User.reset_cache()
+        TestUserSocialAuth.reset_cache()
+
+    def social(
+        self, uid: str, expires_in: int, provider: str = "refresh"
+    ) -> TestUserSocialAuth:
+        extra_data: dict[str, Any] = {
+            "access_token": f"access-{uid}",
+            "refresh_token": uid,
+            "auth_time": int(time.time()),
+            "expires_in": expires_in,
+        }
+        return TestUserSocialAuth(self.user, provider, uid, extra_data=extra_data)
+
+
+class TokenRefreshManagerTest(BaseTokensTest):
+    def test_refreshes_expiring_tokens(self) -> None:
+        expiring = self.social("expiring", 60)
+        fresh = self.social("fresh", 7200)
+
+        report = TokenRefreshManager(self.strategy).run()
+
+        self.assertEqual(report.refreshed, [expiring])
+        self.assertEqual(report.failed, [])
+        self.assertEqual(expiring.access_token, "new-expiring")
+        self.assertEqual(fresh.access_token, "access-fresh")
+
+    def test_lead_time_setting(self) -> None:
+        social = self.social("soon", 600)
+        self.strategy.set_settings({"SOCIAL_AUTH_TOKEN_REFRESH_LEAD_TIME": 900})
+
+        report = TokenRefreshManager(self.strategy).run()
+
+        self.assertEqual(report.refreshed, [social])
+
+    def test_filter_provider(self) -> None:
+        self.social("first", 60)
+        other = self.social("second", 60, provider="other-refresh")
+
+        report = TokenRefreshManager(self.strategy).run(provider="other-refresh")
+
+        self.assertEqual(report.refreshed, [other])
+
+    def test_failures_are_reported(self) -> None:
+        good = self.social("good", 60)
+        broken = self.social("broken", 60)
+
+        report = TokenRefreshManager(self.strategy, batch_size=1).run()
+
+        self.assertEqual(report.refreshed, [good])
+        self.assertEqual(len(report.failed), 1)
+        self.assertIs(report.failed[0].social, broken)
+        self.assertIsInstance(report.failed[0].error, ValueError)
+
+    def test_provider_concurrency_limit(self) -> None:
+        RefreshAuth.delay = 0.02
+        for index in range(6):
+            self.social(f"user{index}", 60)
+
+        report = TokenRefreshManager(
+            self.strategy, max_workers=6, provider_concurrency={"refresh": 2}
+        ).run()
+
+        self.assertEqual(len(report.refreshed), 6)
+        self.assertLessEqual(RefreshAuth.max_active, 2)
+
+    def test_throttled_provider_does_not_hold_workers(self) -> None:
+        RefreshAuth.delay = 0.1
+        for index in range(4):
+            self.social(f"user{index}", 60)
+        other = self.social("other", 60, provider="other-refresh")
+
+        start = time.monotonic()
+        report = TokenRefreshManager(
+            self.strategy, max_workers=2, provider_concurrency={"refresh": 1}
+        ).run()
+
+        self.assertEqual(len(report.refreshed), 5)
+        self.assertIn(other, report.refreshed)
+        started = dict(RefreshAuth.started)
+        self.assertLess(started["other-refresh"] - start, 0.05)
+
+
+class SingleFlightRefreshTest(BaseTokensTest):
+    def test_concurrent_callers_refresh_once(self) -> None:
+        RefreshAuth.delay = 0.05
+        social = self.social("shared", 1)
+        copies = [social] + [copy.deepcopy(social) for _ in range(4)]
+        tokens: list[str | None] = []
+
+        def get_token(instance: TestUserSocialAuth) -> None:
+            tokens.append(instance.get_access_token(self.strategy))
+
+        threads = [
+            threading.Thread(target=get_token, args=(instance,)) for instance in copies
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(RefreshAuth.calls, 1)
+        self.assertEqual(tokens, ["new-shared"] * len(copies))
+
+    def test_failure_is_shared(self) -> None:
+        RefreshAuth.delay = 0.05
+        social = self.social("broken", 1)
+        copies = [social] + [copy.deepcopy(social) for _ in range(4)]
+        errors: list[Exception] = []
+
+        def get_token(instance: TestUserSocialAuth) -> None:
+            try:
+                instance.get_access_token(self.strategy)
+            except ValueError as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=get_token, args=(instance,)) for instance in copies
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(RefreshAuth.calls, 1)
+        self.assertEqual(len(errors), len(copies))
+        self.assertTrue(all(error is errors[0] for error in errors))
+        self.assertEqual(social.access_token, "access-broken")
+
+    def test_reuses_token_stored_by_other_process(self) -> None:
+        stale = self.social("stale", 1)
+        stored = copy.deepcopy(stale)
+        stored.extra_data.update(
+            {"access_token": "stored-token", "auth_time": int(time.time())}
+        )
+        stored.extra_data["expires_in"] = 3600
+        TestUserSocialAuth.cache_by_uid[stale.uid] = stored
+
+        self.assertEqual(stale.get_access_token(self.strategy), "stored-token")
+        self.assertEqual(RefreshAuth.calls, 0)
+
+    def test_busy_lock_does_not_refresh(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_TOKEN_REFRESH_LOCK": (
+                    "social_core.tests.test_tokens.BusyRefreshLock"
+                )
+            }
+        )
+        social = self.social("busy", 1)
+
+        with self.assertRaises(TokenRefreshLockTimeout):
+            social.get_access_token(self.strategy)
+        self.assertEqual(RefreshAuth.calls, 0)
+
+    def test_busy_lock_reuses_stored_token(self) -> None:
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_TOKEN_REFRESH_LOCK": (
+                    "social_core.tests.test_tokens.BusyRefreshLock"
+                )
+            }
+        )
+        stale = self.social("busy-stored", 1)
+        stored = copy.deepcopy(stale)
+        stored.extra_data.update(
+            {"access_token": "stored-token", "auth_time": int(time.time())}
+        )
+        stored.extra_data["expires_in"] = 3600
+        TestUserSocialAuth.cache_by_uid[stale.uid] = stored
+
+        self.assertEqual(stale.get_access_token(self.strategy), "stored-token")
+        self.assertEqual(RefreshAuth.calls, 0)
+
+    def test_configured_lock(self) -> None:
+        RecordingRefreshLock.acquired = []
+        self.strategy.set_settings(
+            {
+                "SOCIAL_AUTH_TOKEN_REFRESH_LOCK": (
+                    "social_core.tests.test_tokens.RecordingRefreshLock"
+                )
+            }
+        )
+        social = self.social("locked", 1)
+
+        self.assertEqual(social.get_access_token(self.strategy), "new-locked")
+        self.assertEqual(RecordingRefreshLock.acquired, ["refresh:locked"])
+
+
+class RevokeAccessTokensTest(BaseTokensTest):
+    def test_results(self) -> None:
+        revoked = self.social("revoked", 60)
+        unknown = self.social("unknown", 60)
+        unknown.extra_data["access_token"] = "unknown"
+        broken = self.social("broken", 60)
+        no_token = self.social("no-token", 60)
+        del no_token.extra_data["access_token"]
+
+        results = revoke_access_tokens(
+            self.strategy, [revoked, unknown, broken, no_token]
+        )
+
+        self.assertEqual(
+            [result.social for result in results], [revoked, unknown, broken, no_token]
+        )
+        self.assertEqual(
+            [result.revoked for result in results], [True, False, None, None]
+        )
+        self.assertIsInstance(results[2].error, ValueError)
+        self.assertIsNone(results[3].error)
+
+    def test_runs_concurrently(self) -> None:
+        RefreshAuth.delay = 0.1
+        entries = [self.social(f"user{index}", 60) for index in range(5)]
+
+        start = time.monotonic()
+        results = revoke_access_tokens(self.strategy, entries, max_workers=5)
+
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertTrue(all(result.revoked for result in results))
+
+    def test_timeout(self) -> None:
+        RefreshAuth.delay = 0.5
+        social = self.social("slow", 60)
+
+        (result,) = revoke_access_tokens(self.strategy, [social], timeout=0.05)
+
+        self.assertIsNone(result.revoked)
+        self.assertIsInstance(result.error, TimeoutError)
+
+
+class LocalRefreshLockTest(unittest.TestCase):
+    def test_acquire_timeout(self) -> None:
+        lock = LocalRefreshLock()
+        self.assertTrue(lock.acquire("key", 1))
+        self.assertFalse(lock.acquire("key", 0.01))
+        lock.release("key")
+        self.assertTrue(lock.acquire("key", 0.01))
+        lock.release("key")
+        self.assertEqual(lock._locks, {})  # noqa: SLF001
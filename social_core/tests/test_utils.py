@@ -14,12 +14,20 @@ from social_core.utils import (
     PARTIAL_TOKEN_PENDING_REQUEST_SESSION_NAME,
     PARTIAL_TOKEN_PENDING_SESSION_NAME,
     PARTIAL_TOKEN_SESSION_NAME,
+    CompiledSettings,
+    EmailAllowlist,
+    EntitlementMatcher,
+    TTLCache,
     build_absolute_uri,
     handle_http_errors,
     is_url,
+    load_jwk,
+    load_shared_cache,
+    open_token,
     partial_pipeline_data,
     partial_pipeline_result,
     sanitize_redirect,
+    seal_token,
     slugify,
     user_is_active,
     user_is_authenticated,
@@ -259,6 +267,143 @@ class SlugifyTest(unittest.TestCase):
         self.assertEqual(slugify("Foo (Bar)"), "foo-bar")
 
 
+class EmailAllowlistTest(unittest.TestCase):
+    def test_emails_and_domains(self) -> None:
+        allowlist = EmailAllowlist(["Foo@Bar.com"], ["Example.org"])
+        self.assertTrue(allowlist.email_allowed("foo@bar.COM"))
+        self.assertTrue(allowlist.email_allowed("anyone@example.org"))
+        self.assertFalse(allowlist.email_allowed("other@bar.com"))
+        self.assertFalse(allowlist.email_allowed("anyone@sub.example.org"))
+        self.assertFalse(allowlist.email_allowed("example.org"))
+
+    def test_wildcard_domains(self) -> None:
+        allowlist = EmailAllowlist(domains=["*.example.org", "*.Uni.EDU"])
+        self.assertTrue(allowlist.email_allowed("a@sub.example.org"))
+        self.assertTrue(allowlist.email_allowed("a@deep.sub.example.org"))
+        self.assertTrue(allowlist.email_allowed("a@cs.uni.edu"))
+        self.assertFalse(allowlist.email_allowed("a@example.org"))
+        self.assertFalse(allowlist.email_allowed("a@badexample.org"))
+        self.assertFalse(allowlist.email_allowed("a@edu"))
+
+    def test_empty(self) -> None:
+        self.assertFalse(EmailAllowlist())
+        self.assertTrue(EmailAllowlist(domains=["*.example.org"]))
+
+
+class CompiledSettingsTest(unittest.TestCase):
+    def test_compiled_until_replaced(self) -> None:
+        cache = CompiledSettings()
+        emails = ["foo@bar.com"]
+        compiled = cache.get("key", (emails,), lambda: EmailAllowlist(emails))
+
+        self.assertIs(cache.get("key", (emails,), self.fail), compiled)
+        # Equal values are recompiled, only the identity is compared
+        replaced = cache.get("key", (list(emails),), lambda: EmailAllowlist(emails))
+        self.assertIsNot(replaced, compiled)
+        self.assertIs(cache.get("other", (emails,), lambda: compiled), compiled)
+
+
+class EntitlementMatcherTest(unittest.TestCase):
+    GROUP = "urn:geant:example.org:group:vo"
+
+    def test_exact(self) -> None:
+        matcher = EntitlementMatcher([f"{self.GROUP}#aai.example.org"])
+        self.assertTrue(matcher.allowed(["foo", f"{self.GROUP}#aai.example.org"]))
+        self.assertFalse(matcher.allowed([f"{self.GROUP}#other.example.org"]))
+        self.assertFalse(matcher.allowed([self.GROUP]))
+        self.assertFalse(matcher.allowed([f"{self.GROUP}:sub#aai.example.org"]))
+
+    def test_subtree(self) -> None:
+        matcher = EntitlementMatcher([f"{self.GROUP}:*"])
+        self.assertTrue(matcher.allowed([self.GROUP]))
+        self.assertTrue(matcher.allowed([f"{self.GROUP}:sub:role=member#aai"]))
+        self.assertFalse(matcher.allowed(["urn:geant:example.org:group:vo2"]))
+        self.assertFalse(matcher.allowed(["urn:geant:example.org:group"]))
+
+    def test_subtree_authority(self) -> None:
+        matcher = EntitlementMatcher([f"{self.GROUP}:*#aai.example.org"])
+        self.assertTrue(matcher.allowed([f"{self.GROUP}:sub#aai.example.org"]))
+        self.assertFalse(matcher.allowed([f"{self.GROUP}:sub#other.example.org"]))
+
+    def test_ignore_authority(self) -> None:
+        matcher = EntitlementMatcher(
+            [f"{self.GROUP}#aai.example.org", "urn:other:*#aai.example.org"],
+            ignore_authority=True,
+        )
+        self.assertTrue(matcher.allowed([f"{self.GROUP}#other.example.org"]))
+        self.assertTrue(matcher.allowed([self.GROUP]))
+        self.assertTrue(matcher.allowed(["urn:other:group#other.example.org"]))
+
+    def test_single_value(self) -> None:
+        matcher = EntitlementMatcher([self.GROUP])
+        self.assertTrue(matcher.allowed(self.GROUP))
+        self.assertFalse(matcher.allowed("urn:geant"))
+
+
+class LoadJWKTest(unittest.TestCase):
+    KEY = {
+        "kty": "oct",
+        "alg": "HS256",
+        "k": base64.urlsafe_b64encode(b"secret" * 6).decode().rstrip("="),
+    }
+
+    def test_reuses_key_objects(self) -> None:
+        jwk = load_jwk(self.KEY)
+        self.assertIs(load_jwk(dict(reversed(self.KEY.items()))), jwk)
+        self.assertIsNot(load_jwk({**self.KEY, "kid": "other"}), jwk)
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_expiry(self) -> None:
+        cache = TTLCache()
+        with patch("time.monotonic", return_value=100):
+            cache.set("foo", "bar", 10)
+            self.assertEqual(cache.get("foo"), "bar")
+        with patch("time.monotonic", return_value=111):
+            self.assertIsNone(cache.get("foo"))
+            self.assertEqual(len(cache), 0)
+
+    def test_maxsize(self) -> None:
+        cache = TTLCache(maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key, 60)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual([cache.get("b"), cache.get("c")], ["b", "c"])
+
+    def test_load_shared_cache(self) -> None:
+        default = TTLCache()
+        self.assertIs(load_shared_cache(None, default), default)
+        cache = load_shared_cache("social_core.utils.TTLCache", default)
+        self.assertIsInstance(cache, TTLCache)
+        self.assertIsNot(cache, default)
+        self.assertIs(load_shared_cache("social_core.utils.TTLCache", default), cache)
+
+
+class SealedTokenTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        token = seal_token("secret", "github", {"state": "foo"})
+        payload = open_token("secret", "github", token, 60)
+        self.assertEqual(payload["state"], "foo")
+        self.assertNotIn("foo", token)
+
+    def test_invalid_tokens(self) -> None:
+        token = seal_token("secret", "github", {"state": "foo"})
+        for key, context, value in (
+            ("other", "github", token),
+            ("secret", "gitlab", token),
+            ("secret", "github", token[:-4] + "AAAA"),
+            ("secret", "github", "not a token"),
+        ):
+            with self.assertRaises(ValueError):
+                open_token(key, context, value, 60)
+
+    def test_expired_token(self) -> None:
+        with patch("time.time", return_value=1000):
+            token = seal_token("secret", "github", {})
+        with patch("time.time", return_value=1061), self.assertRaises(ValueError):
+            open_token("secret", "github", token, 60)
+
+
 class BuildAbsoluteURITest(unittest.TestCase):
     host = "http://foobar.com"
 
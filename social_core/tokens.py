@@ -0,0 +1,415 @@
+"""Access token maintenance for stored social associations"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Protocol, cast
+
+from .exceptions import InvalidExpiryValue, TokenRefreshLockTimeout
+from .utils import module_member, social_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .backends.oauth import OAuthAuth
+    from .storage import UserMixin
+    from .strategy import BaseStrategy
+
+DEFAULT_REFRESH_LEAD_TIME = 300
+DEFAULT_REFRESH_MAX_WORKERS = 8
+DEFAULT_REFRESH_BATCH_SIZE = 100
+DEFAULT_REFRESH_LOCK_TIMEOUT = 30
+DEFAULT_REVOKE_MAX_WORKERS = 4
+DEFAULT_REVOKE_TIMEOUT = 10
+
+
+class RefreshLock(Protocol):
+    """Lock serializing token refreshes of a social association.
+
+    Configure a distributed implementation (for example backed by Redis or
+    database advisory locks) with the TOKEN_REFRESH_LOCK setting to serialize
+    refreshes across processes.
+    """
+
+    def acquire(self, key: str, timeout: float) -> bool: ...
+
+    def release(self, key: str) -> None: ...
+
+
+class LocalRefreshLock:
+    """In-process RefreshLock implementation"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: dict[str, tuple[threading.Lock, int]] = {}
+
+    def acquire(self, key: str, timeout: float) -> bool:
+        with self._lock:
+            lock, users = self._locks.get(key, (threading.Lock(), 0))
+            self._locks[key] = (lock, users + 1)
+        if lock.acquire(timeout=timeout):
+            return True
+        self._forget(key)
+        return False
+
+    def release(self, key: str) -> None:
+        self._locks[key][0].release()
+        self._forget(key)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            lock, users = self._locks[key]
+            if users > 1:
+                self._locks[key] = (lock, users - 1)
+            else:
+                del self._locks[key]
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.extra_data: dict[str, Any] | None = None
+        self.error: Exception | None = None
+
+
+LOCAL_REFRESH_LOCK = LocalRefreshLock()
+_REFRESH_LOCKS: dict[str, RefreshLock] = {}
+_FLIGHTS: dict[str, _Flight] = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def get_refresh_lock(strategy: BaseStrategy) -> RefreshLock:
+    """Return the RefreshLock configured in TOKEN_REFRESH_LOCK"""
+    path = cast("str | None", strategy.setting("TOKEN_REFRESH_LOCK"))
+    if not path:
+        return LOCAL_REFRESH_LOCK
+    if path not in _REFRESH_LOCKS:
+        _REFRESH_LOCKS[path] = module_member(path)()
+    return _REFRESH_LOCKS[path]
+
+
+def refresh_key(social: UserMixin) -> str:
+    return f"{social.provider}:{social.uid}"
+
+
+def refresh_token_once(social: UserMixin, strategy: BaseStrategy) -> None:
+    """Refresh the association token, at most once at a time.
+
+    Concurrent callers in this process wait for the refresh already in flight
+    and reuse its result. The refresh itself runs under the configured
+    RefreshLock, and is skipped when another process already stored a newer
+    token while waiting for it.
+    """
+    key = refresh_key(social)
+    timeout = cast(
+        "float",
+        strategy.setting("TOKEN_REFRESH_LOCK_TIMEOUT", DEFAULT_REFRESH_LOCK_TIMEOUT),
+    )
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(key)
+        leader = flight is None
+        if flight is None:
+            flight = _FLIGHTS[key] = _Flight()
+
+    if not leader:
+        if flight.done.wait(timeout):
+            if flight.error is not None:
+                raise flight.error
+            if flight.extra_data is not None:
+                social.set_extra_data(dict(flight.extra_data))
+            return
+        # The refresh in flight is stuck, fall back to the storage lock
+        _refresh_locked(social, strategy, key, timeout)
+        return
+
+    try:
+        _refresh_locked(social, strategy, key, timeout)
+        flight.extra_data = dict(social.extra_data or {})
+    except Exception as error:
+        flight.error = error
+        raise
+    finally:
+        with _FLIGHTS_LOCK:
+            del _FLIGHTS[key]
+        flight.done.set()
+
+
+def _refresh_locked(
+    social: UserMixin, strategy: BaseStrategy, key: str, timeout: float
+) -> None:
+    lock = get_refresh_lock(strategy)
+    if not lock.acquire(key, timeout):
+        # Refreshing without the lock could rotate the refresh token twice,
+        # only a token stored by the current lock holder can be used
+        if not _reuse_stored_token(social):
+            raise TokenRefreshLockTimeout(key)
+        return
+    try:
+        if not _reuse_stored_token(social):
+            social.refresh_token(strategy)
+    finally:
+        lock.release(key)
+
+
+def _reuse_stored_token(social: UserMixin) -> bool:
+    """Load a valid token stored by another process since social was read"""
+    stored = social.get_social_auth(social.provider, social.uid)
+    if (
+        stored is None
+        or stored is social
+        or stored.access_token == social.access_token
+        or stored.access_token_expired()
+    ):
+        return False
+    social.set_extra_data(dict(stored.extra_data))
+    return True
+
+
+@dataclass
+class TokenRefreshFailure:
+    social: UserMixin
+    error: Exception
+
+
+@dataclass
+class TokenRefreshReport:
+    refreshed: list[UserMixin] = field(default_factory=list)
+    skipped: list[UserMixin] = field(default_factory=list)
+    failed: list[TokenRefreshFailure] = field(default_factory=list)
+
+
+@dataclass
+class TokenRevocationResult:
+    social: UserMixin
+    # Value returned by revoke_token, None when nothing was revoked
+    revoked: bool | None = None
+    error: Exception | None = None
+
+
+class TokenRefreshManager:
+    """Refresh access tokens ahead of their expiry, off the request path.
+
+    Candidates are loaded with UserMixin.get_social_auth_expiring_before() and
+    refreshed in batches on a bounded thread pool. The behavior is controlled
+    by these settings (constructor arguments take precedence):
+
+        TOKEN_REFRESH_LEAD_TIME              Seconds before expiry a token is
+                                             refreshed (300)
+        TOKEN_REFRESH_MAX_WORKERS            Size of the worker pool (8)
+        TOKEN_REFRESH_BATCH_SIZE             Associations loaded per batch (100)
+        TOKEN_REFRESH_PROVIDER_CONCURRENCY   Mapping of provider name to the
+                                             maximum number of concurrent
+                                             refreshes for that provider
+
+    Failures do not stop the run, they are logged and collected in the
+    returned TokenRefreshReport.
+    """
+
+    def __init__(
+        self,
+        strategy: BaseStrategy,
+        lead_time: float | None = None,
+        max_workers: int | None = None,
+        batch_size: int | None = None,
+        provider_concurrency: dict[str, int] | None = None,
+    ) -> None:
+        self.strategy = strategy
+        self.lead_time = cast(
+            "float",
+            lead_time
+            if lead_time is not None
+            else strategy.setting("TOKEN_REFRESH_LEAD_TIME", DEFAULT_REFRESH_LEAD_TIME),
+        )
+        self.max_workers = cast(
+            "int",
+            max_workers
+            or strategy.setting(
+                "TOKEN_REFRESH_MAX_WORKERS", DEFAULT_REFRESH_MAX_WORKERS
+            ),
+        )
+        self.batch_size = cast(
+            "int",
+            batch_size
+            or strategy.setting("TOKEN_REFRESH_BATCH_SIZE", DEFAULT_REFRESH_BATCH_SIZE),
+        )
+        self.provider_concurrency = cast(
+            "dict[str, int]",
+            provider_concurrency
+            if provider_concurrency is not None
+            else strategy.setting("TOKEN_REFRESH_PROVIDER_CONCURRENCY", {}),
+        )
+
+    def expiring(self, provider: str | None = None) -> Iterable[UserMixin]:
+        """Return the associations expiring within the lead time"""
+        before = datetime.now(timezone.utc) + timedelta(seconds=self.lead_time)
+        return self.strategy.storage.user.get_social_auth_expiring_before(
+            before, provider
+        )
+
+    def run(self, provider: str | None = None) -> TokenRefreshReport:
+        """Refresh every association expiring within the lead time"""
+        report = TokenRefreshReport()
+        candidates = iter(self.expiring(provider))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while batch := list(islice(candidates, self.batch_size)):
+                due: list[UserMixin] = []
+                for social in batch:
+                    try:
+                        if social.access_token_expires_within(self.lead_time):
+                            due.append(social)
+                        else:
+                            report.skipped.append(social)
+                    except InvalidExpiryValue as error:
+                        self._failed(report, social, error)
+                self._refresh_batch(executor, due, report)
+        return report
+
+    def _refresh_batch(
+        self,
+        executor: ThreadPoolExecutor,
+        due: list[UserMixin],
+        report: TokenRefreshReport,
+    ) -> None:
+        """Refresh the due associations, a provider never has more than its
+        TOKEN_REFRESH_PROVIDER_CONCURRENCY refreshes submitted to the pool so
+        its backlog doesn't hold workers other providers could use"""
+        queues: dict[str, deque[UserMixin]] = {}
+        for social in due:
+            queues.setdefault(social.provider, deque()).append(social)
+        running: dict[Future, UserMixin] = {}
+        active: Counter[str] = Counter()
+
+        def schedule(provider: str) -> None:
+            queue = queues[provider]
+            limit = self.provider_concurrency.get(provider)
+            while queue and (not limit or active[provider] < limit):
+                social = queue.popleft()
+                active[provider] += 1
+                future = executor.submit(refresh_token_once, social, self.strategy)
+                running[future] = social
+
+        for provider in queues:
+            schedule(provider)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                social = running.pop(future)
+                active[social.provider] -= 1
+                try:
+                    future.result()
+                # pylint: disable-next=broad-exception-caught
+                except Exception as error:  # noqa: BLE001
+                    self._failed(report, social, error)
+                else:
+                    report.refreshed.append(social)
+                schedule(social.provider)
+
+    def _failed(
+        self, report: TokenRefreshReport, social: UserMixin, error: Exception
+    ) -> None:
+        social_logger.warning(
+            "Token refresh failed for %s association %s: %s",
+            social.provider,
+            social.uid,
+            error,
+        )
+        report.failed.append(TokenRefreshFailure(social, error))
+
+
+def revoke_access_tokens(
+    strategy: BaseStrategy,
+    entries: Iterable[UserMixin],
+    max_workers: int | None = None,
+    timeout: float | None = None,
+) -> list[TokenRevocationResult]:
+    """Revoke the access tokens of the given associations concurrently.
+
+    Revocations run on a pool of REVOKE_TOKENS_MAX_WORKERS threads (4), a call
+    still running after REVOKE_TOKENS_TIMEOUT seconds (10) is reported as
+    failed with TimeoutError. One backend instance is created per provider.
+
+    Returns one TokenRevocationResult per entry, in the given order; errors
+    are collected there instead of being raised.
+    """
+    max_workers = cast(
+        "int",
+        max_workers
+        or strategy.setting("REVOKE_TOKENS_MAX_WORKERS", DEFAULT_REVOKE_MAX_WORKERS),
+    )
+    timeout = cast(
+        "float",
+        timeout
+        if timeout is not None
+        else strategy.setting("REVOKE_TOKENS_TIMEOUT", DEFAULT_REVOKE_TIMEOUT),
+    )
+    results = [TokenRevocationResult(entry) for entry in entries]
+    backends: dict[str, OAuthAuth | None] = {}
+    futures: dict[Future, TokenRevocationResult] = {}
+
+    def revoke(backend: OAuthAuth, social: UserMixin) -> bool | None:
+        return backend.revoke_token(social.extra_data["access_token"], social.uid)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for result in results:
+            social = result.social
+            if "access_token" not in (social.extra_data or {}):
+                continue
+            if social.provider not in backends:
+                backends[social.provider] = cast(
+                    "OAuthAuth | None", social.get_backend_instance(strategy)
+                )
+            backend = backends[social.provider]
+            if backend is not None:
+                futures[executor.submit(revoke, backend, social)] = result
+        _collect_revocations(futures, timeout)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for result in results:
+        if result.error is not None:
+            social_logger.warning(
+                "Token revocation failed for %s association %s: %s",
+                result.social.provider,
+                result.social.uid,
+                result.error,
+            )
+    return results
+
+
+def _collect_revocations(
+    futures: dict[Future, TokenRevocationResult], timeout: float
+) -> None:
+    """Wait for the revocations, timing out each call individually"""
+    started: dict[Future, float] = {}
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        for future in pending:
+            if future not in started and future.running():
+                started[future] = now
+        deadlines = [
+            started[future] + timeout for future in pending if future in started
+        ]
+        # Queued calls are polled until they start running
+        wait_for = max(min(deadlines) - now, 0) if deadlines else 0.05
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                futures[future].revoked = future.result()
+            # pylint: disable-next=broad-exception-caught
+            except Exception as error:  # noqa: BLE001
+                futures[future].error = error
+        now = time.monotonic()
+        for future in list(pending):
+            if future in started and now - started[future] >= timeout:
+                pending.discard(future)
+                futures[future].error = TimeoutError(
+                    f"Token revocation did not finish in {timeout} seconds"
+                )
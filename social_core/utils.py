@@ -1,19 +1,29 @@
 from __future__ import annotations
 
+import base64
 import contextlib
 import functools
 import hmac
+import json
 import logging
+import os
 import re
+import threading
 import time
 import unicodedata
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from importlib import import_module
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 from urllib.parse import parse_qs as battery_parse_qs
 from urllib.parse import unquote, urlencode, urlparse, urlunparse
 
+import jwt
 import requests
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 import social_core
 from social_core.pipeline.utils import is_dict_type, to_plain_dict
@@ -26,7 +36,7 @@ from .exceptions import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Collection
+    from collections.abc import Callable, Collection, Hashable, Iterable
 
     from .backends.base import BaseAuth
     from .storage import PartialMixin, UserProtocol
@@ -550,8 +560,15 @@ class cache:
 
     It maintains a cache per class and method arguments, so subclasses have a
     different cache entry for the same cached method.
+
+    Decorated methods are registered in cache.instances by their dotted path
+    so their entries can be saved to and restored from a snapshot. Values
+    used inside cache.refreshing() are refetched once.
     """
 
+    instances: ClassVar[dict[str, cache]] = {}
+    _local = threading.local()
+
     def __init__(self, ttl: int) -> None:
         self.ttl = ttl
         self.cache: dict[
@@ -569,10 +586,18 @@ class cache:
 
             # ignoring this type issue is safe; if cached_value is returned, last_updated
             # is also set, but the type checker doesn't know it.
-            if not cached_value or not last_updated or now - last_updated > self.ttl:
+            refreshed = getattr(self._local, "refreshed", None)
+            if (
+                not cached_value
+                or not last_updated
+                or now - last_updated > self.ttl
+                or (refreshed is not None and (self, cache_key) not in refreshed)
+            ):
                 try:
                     cached_value = fn(this, *args, **kwargs)
                     self.cache[cache_key] = (now, cached_value)
+                    if refreshed is not None:
+                        refreshed.add((self, cache_key))
                 # pylint: disable-next=broad-exception-caught
                 except Exception:
                     # Use previously cached value when call fails, if available
@@ -581,7 +606,425 @@ class cache:
             return cached_value
 
         cast("Any", wrapped).invalidate = self._invalidate
+        cache.instances[f"{fn.__module__}.{fn.__qualname__}"] = self
         return wrapped
 
     def _invalidate(self) -> None:
         self.cache.clear()
+
+    @classmethod
+    @contextlib.contextmanager
+    def refreshing(cls):
+        """Refetch, once, every cached value used in the current thread"""
+        cls._local.refreshed = set()
+        try:
+            yield
+        finally:
+            cls._local.refreshed = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry time to live.
+
+    It holds up to maxsize entries, evicting the oldest ones first. Besides
+    being used directly, it documents the get/set interface expected from
+    pluggable caches shared across workers.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return default
+            return entry[1]
+
+    def set(self, key, value, ttl: float) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.monotonic() + ttl, value)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+_SHARED_CACHES: dict[str, Any] = {}
+
+
+def load_shared_cache(path: str | None, default: Any) -> Any:
+    """Return the cache selected by a setting, the import path of a class
+    with TTLCache get() and set() methods, or default when it's not set.
+
+    Each class is instantiated once per process, callers prefix their keys.
+    """
+    if not path:
+        return default
+    if path not in _SHARED_CACHES:
+        _SHARED_CACHES[path] = module_member(path)()
+    return _SHARED_CACHES[path]
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker guarding the requests made to a provider.
+
+    Outcomes are tracked over a sliding window of window seconds. Once at
+    least min_requests were made in the window and the share of failures
+    reaches failure_rate the breaker opens and calls are rejected. After
+    reset_timeout seconds a single probe request is let through (half-open):
+    the breaker closes when it succeeds and opens again when it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_requests: int = 10,
+        window: float = 60,
+        reset_timeout: float = 30,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.outcomes: deque[tuple[float, bool]] = deque()
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self.outcomes and self.outcomes[0][0] <= now - self.window:
+            self.outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Return True if a request may be made now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if (
+                self.state == self.OPEN
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of a request allowed by allow()"""
+        now = time.monotonic()
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self.outcomes.clear()
+                else:
+                    self.state = self.OPEN
+                    self.opened_at = now
+                return
+            self.outcomes.append((now, success))
+            self._expire(now)
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if (
+                self.state == self.CLOSED
+                and len(self.outcomes) >= self.min_requests
+                and failures >= self.failure_rate * len(self.outcomes)
+            ):
+                self.state = self.OPEN
+                self.opened_at = now
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the current state and window counters"""
+        with self.lock:
+            self._expire(time.monotonic())
+            return {
+                "state": self.state,
+                "requests": len(self.outcomes),
+                "failures": sum(1 for _, ok in self.outcomes if not ok),
+                "opened_at": self.opened_at if self.state != self.CLOSED else None,
+            }
+
+
+CIRCUIT_BREAKERS: dict[str, CircuitBreaker] = {}
+CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(key: str, **options) -> CircuitBreaker:
+    """Return the process-wide breaker for key, creating it with options"""
+    with CIRCUIT_BREAKERS_LOCK:
+        breaker = CIRCUIT_BREAKERS.get(key)
+        if breaker is None:
+            breaker = CIRCUIT_BREAKERS[key] = CircuitBreaker(**options)
+        return breaker
+
+
+def circuit_breaker_states() -> dict[str, dict[str, Any]]:
+    """Return a snapshot of every circuit breaker keyed by backend and host"""
+    with CIRCUIT_BREAKERS_LOCK:
+        breakers = list(CIRCUIT_BREAKERS.items())
+    return {key: breaker.snapshot() for key, breaker in breakers}
+
+
+def reset_circuit_breakers(key: str | None = None) -> None:
+    """Forget the state of one circuit breaker, or of all of them"""
+    with CIRCUIT_BREAKERS_LOCK:
+        if key is None:
+            CIRCUIT_BREAKERS.clear()
+        else:
+            CIRCUIT_BREAKERS.pop(key, None)
+
+
+class LatencyTracker:
+    """Recent request latencies per key, used to pick hedging delays"""
+
+    def __init__(self, size: int = 100, min_samples: int = 20) -> None:
+        self.size = size
+        self.min_samples = min_samples
+        self.samples: dict[str, deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self.lock:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=self.size)
+            samples.append(seconds)
+
+    def percentile(self, key: str, percentile: float) -> float | None:
+        """Return the given latency percentile, None without enough samples"""
+        with self.lock:
+            samples = sorted(self.samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.samples.clear()
+
+
+REQUEST_LATENCIES = LatencyTracker()
+
+
+@functools.lru_cache(maxsize=128)
+def _load_jwk(serialized: str) -> jwt.PyJWK:
+    return jwt.PyJWK(json.loads(serialized))
+
+
+def load_jwk(key: dict[str, Any]) -> jwt.PyJWK:
+    """Return the PyJWK for a JWK dict, reusing the key object built for an
+    identical JWK so unchanged key sets don't rebuild their public keys"""
+    return _load_jwk(json.dumps(key, sort_keys=True))
+
+
+class CompiledSettings:
+    """
+    Values compiled from settings, reused until a setting value is replaced.
+
+    Each entry remembers the setting values it was compiled from and compares
+    them by identity, so a lookup costs a few ``is`` checks whatever the size
+    of the settings. Values mutated in place are not noticed, assign a new
+    value or call clear() to recompile.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[Hashable, tuple[tuple[Any, ...], Any]] = {}
+
+    def get(
+        self, key: Hashable, sources: tuple[Any, ...], compile_value: Callable[[], Any]
+    ) -> Any:
+        entry = self.entries.get(key)
+        if (
+            entry is not None
+            and len(entry[0]) == len(sources)
+            and all(old is new for old, new in zip(entry[0], sources, strict=True))
+        ):
+            return entry[1]
+        value = compile_value()
+        # Holding the sources keeps their ids from being reused
+        self.entries[key] = (sources, value)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+COMPILED_SETTINGS = CompiledSettings()
+
+
+class EmailAllowlist:
+    """
+    Compiled WHITELISTED_EMAILS / WHITELISTED_DOMAINS matcher.
+
+    Emails and domains are matched case-insensitively through hashed sets.
+    Domains prefixed with ``*.`` allow any subdomain of the given domain, they
+    are stored in a trie keyed by the reversed domain labels so lookups cost
+    one step per label regardless of the allowlist size.
+    """
+
+    def __init__(self, emails: Iterable[str] = (), domains: Iterable[str] = ()) -> None:
+        self.emails = frozenset(email.lower() for email in emails)
+        domains = [domain.lower() for domain in domains]
+        self.domains = frozenset(
+            domain for domain in domains if not domain.startswith("*.")
+        )
+        self.wildcards: dict[str, dict] = {}
+        for domain in domains:
+            if domain.startswith("*."):
+                node = self.wildcards
+                for label in reversed(domain[2:].split(".")):
+                    node = node.setdefault(label, {})
+                node[""] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.emails or self.domains or self.wildcards)
+
+    def domain_allowed(self, domain: str) -> bool:
+        domain = domain.lower()
+        if domain in self.domains:
+            return True
+        labels = domain.split(".")
+        node: dict | None = self.wildcards
+        for index in range(len(labels) - 1, 0, -1):
+            node = cast("dict", node).get(labels[index])
+            if node is None:
+                return False
+            if "" in node:
+                return True
+        return False
+
+    def email_allowed(self, email: str) -> bool:
+        email = email.lower()
+        parts = email.split("@", 1)
+        if len(parts) != 2:
+            return False
+        return email in self.emails or self.domain_allowed(parts[1])
+
+
+class EntitlementMatcher:
+    """
+    Compiled ALLOWED_ENTITLEMENTS matcher for eduPersonEntitlement values.
+
+    Entitlements are matched exactly through a hashed set. Entries ending in
+    ``:*`` (optionally followed by ``#authority``) grant the entitlement before
+    it and everything below it, e.g. ``urn:example:group:vo:*`` matches
+    ``urn:example:group:vo:sub:role=member``; these are stored in a trie keyed
+    by the URN components. The ``#authority`` suffix is ignored on both sides
+    when ignore_authority is set.
+    """
+
+    def __init__(
+        self, allowed: Iterable[str] = (), ignore_authority: bool = False
+    ) -> None:
+        self.ignore_authority = ignore_authority
+        exact = set()
+        # Each trie node maps URN components to (children, authorities)
+        self.subtrees: dict[str, tuple[dict, set[str | None]]] = {}
+        for entitlement in allowed:
+            path, authority = self.split(entitlement)
+            if path.endswith(":*"):
+                node = self.subtrees
+                authorities: set[str | None] = set()
+                for part in path[:-2].split(":"):
+                    node, authorities = node.setdefault(part, ({}, set()))
+                authorities.add(authority)
+            else:
+                exact.add(path if ignore_authority else entitlement)
+        self.exact = frozenset(exact)
+
+    def __bool__(self) -> bool:
+        return bool(self.exact or self.subtrees)
+
+    @staticmethod
+    def split(entitlement: str) -> tuple[str, str | None]:
+        path, _, authority = entitlement.partition("#")
+        return path, authority or None
+
+    def allowed(self, entitlements: Iterable[str] | str) -> bool:
+        """Return True if any of the given entitlements is granted"""
+        if isinstance(entitlements, str):
+            entitlements = [entitlements]
+        return any(self.entitlement_allowed(value) for value in entitlements)
+
+    def entitlement_allowed(self, entitlement: str) -> bool:
+        path, authority = self.split(entitlement)
+        if (path if self.ignore_authority else entitlement) in self.exact:
+            return True
+        node = self.subtrees
+        for part in path.split(":"):
+            if part not in node:
+                return False
+            node, authorities = node[part]
+            if authorities and (
+                self.ignore_authority or None in authorities or authority in authorities
+            ):
+                return True
+        return False
+
+
+def _sealed_token_cipher(key: str | bytes, context: str) -> AESGCM:
+    if isinstance(key, str):
+        key = key.encode()
+    derived = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=f"social-auth:{context}".encode(),
+    ).derive(key)
+    return AESGCM(derived)
+
+
+def seal_token(key: str | bytes, context: str, payload: dict[str, Any]) -> str:
+    """
+    Encrypt and authenticate payload into an URL safe token.
+
+    The token is bound to context and records its issue time, open_token()
+    refuses it once it's older than the given max age.
+    """
+    nonce = os.urandom(12)
+    data = json.dumps({**payload, "iat": int(time.time())}).encode()
+    sealed = _sealed_token_cipher(key, context).encrypt(nonce, data, None)
+    return base64.urlsafe_b64encode(nonce + sealed).rstrip(b"=").decode()
+
+
+def open_token(
+    key: str | bytes, context: str, token: str, max_age: int
+) -> dict[str, Any]:
+    """Return the payload sealed in token, raise ValueError if it was tampered
+    with, sealed for another context or expired"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = _sealed_token_cipher(key, context).decrypt(raw[:12], raw[12:], None)
+        payload = json.loads(data)
+    except (InvalidTag, TypeError, ValueError) as error:
+        raise ValueError("Invalid token") from error
+    age = time.time() - payload.get("iat", 0)
+    if age > max_age or age < -60:
+        raise ValueError("Expired token")
+    return payload